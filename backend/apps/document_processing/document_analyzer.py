@@ -1,21 +1,30 @@
 """
 Document analysis using Azure OpenAI for legal compliance checking
 """
-import openai
 from django.conf import settings
 import json
 import logging
 
+from apps.speech_processing.openai_transport import create_chat_completion
+
 logger = logging.getLogger(__name__)
 
 class DocumentAnalyzer:
     def __init__(self):
-        openai.api_type = "azure"
-        openai.api_base = settings.AZURE_OPENAI_ENDPOINT
-        openai.api_version = settings.AZURE_OPENAI_API_VERSION
-        openai.api_key = settings.AZURE_OPENAI_API_KEY
         self.deployment_name = settings.AZURE_OPENAI_DEPLOYMENT_NAME
 
+    def _chat_completion(self, operation, system_prompt, prompt, **params):
+        """Chat completion on the process-wide Azure OpenAI client"""
+        return create_chat_completion(
+            self.deployment_name,
+            operation,
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            **params
+        )
+
     def analyze_application(self, application):
         """Analyze legal application for completeness and compliance"""
         try:
@@ -54,17 +63,15 @@ class DocumentAnalyzer:
             }}
             """
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": "You are a legal document analyst with expertise in Indian law."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = self._chat_completion(
+                'document_review',
+                "You are a legal document analyst with expertise in Indian law.",
+                prompt,
                 max_tokens=1000,
                 temperature=0.2
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             return result
             
         except Exception as e:
@@ -109,17 +116,15 @@ class DocumentAnalyzer:
             }}
             """
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": "You are a legal advisor providing document improvement suggestions."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = self._chat_completion(
+                'document_review',
+                "You are a legal advisor providing document improvement suggestions.",
+                prompt,
                 max_tokens=800,
                 temperature=0.3
             )
             
-            return json.loads(response.choices[0].message.content)
+            return json.loads(content)
             
         except Exception as e:
             logger.error(f"Improvement suggestion failed: {e}")
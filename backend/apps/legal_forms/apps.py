@@ -6,3 +6,6 @@ class LegalFormsConfig(AppConfig):
     name = 'apps.legal_forms'
     label = 'legal_forms'
     verbose_name = 'Legal Forms'
+
+    def ready(self):
+        from . import signals  # noqa: F401
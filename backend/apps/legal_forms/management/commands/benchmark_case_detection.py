@@ -0,0 +1,101 @@
+# apps/legal_forms/management/commands/benchmark_case_detection.py
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.legal_forms.services.detection_benchmark import (
+    STAGES, check_thresholds, load_corpus, run_benchmark
+)
+
+class Command(BaseCommand):
+    help = 'Measure case type detection accuracy and latency on the labeled corpus with stubbed BHASHINI/OpenAI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            type=str,
+            help='Path to the labeled corpus; defaults to fixtures/case_detection_corpus.json',
+            default=None
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            help='Passes over the corpus for latency and throughput',
+            default=5
+        )
+        parser.add_argument(
+            '--bhashini-latency-ms',
+            type=float,
+            help='Simulated latency of each stubbed translation request',
+            default=0.0
+        )
+        parser.add_argument(
+            '--openai-latency-ms',
+            type=float,
+            help='Simulated latency of each stubbed LLM request',
+            default=0.0
+        )
+        parser.add_argument(
+            '--json',
+            type=str,
+            help='Also write the full report to this file',
+            default=None
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Exit with an error when the corpus's thresholds are not met (for CI)",
+        )
+
+    def handle(self, *args, **options):
+        corpus = load_corpus(options['corpus'])
+        report = run_benchmark(
+            corpus, options['iterations'], options['bhashini_latency_ms'], options['openai_latency_ms']
+        )
+        report['failures'] = check_thresholds(report, corpus.get('thresholds', {}))
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+        self.write_report(report)
+
+        if report['failures']:
+            message = 'Detection benchmark regressed: ' + '; '.join(report['failures'])
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('All detection benchmark thresholds met'))
+
+    def write_report(self, report):
+        self.stdout.write(
+            f"Corpus v{report['corpus_version']}: {report['samples']} samples x {report['iterations']} iterations"
+        )
+        self.stdout.write(f"Accuracy: {report['accuracy']:.3f}")
+        self.stdout.write('Resolved at: ' + ', '.join(f'{k}={v}' for k, v in sorted(report['resolved_at'].items())))
+
+        self.stdout.write(f"Latency (ms, runner baseline {report['baseline_ms']:.2f}ms):")
+        for stage in STAGES:
+            stats = report['latency_ms'][stage]
+            if stats['count']:
+                self.stdout.write(
+                    f"  {stage:<18} p50={stats['p50']:>8.2f}  p95={stats['p95']:>8.2f}  "
+                    f"p95/baseline={report['p95_vs_baseline'][stage]:>6.2f}  n={stats['count']}"
+                )
+
+        throughput = report['throughput_texts_per_s']
+        self.stdout.write(f"Throughput: single={throughput['single']} texts/s, batch={throughput['batch']} texts/s")
+        requests = report['backend_requests_per_pass']
+        self.stdout.write(f"Backend requests per pass: translation={requests['translation']}, llm={requests['llm']}")
+
+        labels = report['labels']
+        width = max(len(label) for label in labels)
+        self.stdout.write('Confusion matrix (rows: expected, columns: predicted):')
+        self.stdout.write(' ' * (width + 2) + ' '.join(f'{index:>4}' for index in range(len(labels))))
+        for index, expected in enumerate(labels):
+            row = report['confusion_matrix'][expected]
+            self.stdout.write(
+                f'{expected:<{width}}  ' + ' '.join(f'{row[predicted]:>4}' for predicted in labels) + f'  [{index}]'
+            )
+
+        for error in report['errors']:
+            self.stdout.write(f"  miss {error['id']}: expected {error['expected']}, got {error['predicted']}")
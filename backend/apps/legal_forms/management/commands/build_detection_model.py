@@ -0,0 +1,34 @@
+# apps/legal_forms/management/commands/build_detection_model.py
+from django.core.management.base import BaseCommand
+from apps.legal_forms.services.detection_model import build_model_artifacts
+
+class Command(BaseCommand):
+    help = 'Fit the case type detection models and write memory-mappable artifacts for the workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory',
+            type=str,
+            help='Artifact directory; defaults to CASE_DETECTION_MODEL_DIR',
+            default=None
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            help='Number of artifact versions to keep; defaults to CASE_DETECTION_MODEL_KEEP_VERSIONS',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        summary = build_model_artifacts(options['directory'], options['keep'])
+
+        if not summary['path']:
+            self.stdout.write(self.style.WARNING('No active case type mappings; nothing was written'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Model {summary['fingerprint']} with {summary['case_types']} case types and "
+            f"{summary['transcripts']} transcripts written to {summary['path']}"
+        ))
+        if summary['removed_versions']:
+            self.stdout.write(f"Removed old versions: {', '.join(summary['removed_versions'])}")
@@ -1,100 +1,251 @@
 # apps/legal_forms/services/case_processor.py
 import re
 import json
+import time
 import logging
+import threading
 from typing import Dict, List, Tuple, Optional
 from django.conf import settings
 from django.utils import timezone
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 
 from ..models import CaseTypeMapping, QuestionMapping, LegalCase, CaseProcessingLog
+from .keyword_matcher import keyword_matcher
+from .detection_model import CHAR_SIMILARITY_THRESHOLD, detection_model_registry, normalize_char_text
 from apps.speech_processing.bhashini_client import BhashiniClient
 from apps.speech_processing.azure_openai_client import AzureOpenAIClient
 
 logger = logging.getLogger(__name__)
 
+def clean_input_text(text: str) -> str:
+    """
+    Casefold, strip punctuation and collapse whitespace before translation/detection.
+
+    Indic vowel signs and viramas are kept, so native-script keywords still
+    match the cleaned text.
+    """
+    return normalize_char_text(text)
+
+class DetectionStageStats:
+    """Process-local counts of where the detection cascade stopped, and per-stage latency"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.resolved = {}
+        self.latency_ms = {}
+
+    def record(self, resolved_stage: str, timings: Dict[str, float]):
+        with self._lock:
+            self.resolved[resolved_stage] = self.resolved.get(resolved_stage, 0) + 1
+            for stage, ms in timings.items():
+                total, count = self.latency_ms.get(stage, (0.0, 0))
+                self.latency_ms[stage] = (total + ms, count + 1)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = sum(self.resolved.values())
+            return {
+                'detections': total,
+                'resolved_fraction': {
+                    stage: round(count / total, 4) for stage, count in self.resolved.items()
+                } if total else {},
+                'avg_stage_latency_ms': {
+                    stage: round(ms / count, 2) for stage, (ms, count) in self.latency_ms.items()
+                },
+            }
+
+
+detection_stage_stats = DetectionStageStats()
+
 class CaseTypeDetector:
     """Detect case type from user input using keyword matching and AI"""
     
     def __init__(self):
         self.bhashini_client = BhashiniClient()
         self.openai_client = AzureOpenAIClient()
-        self.vectorizer = None
-        self.case_type_vectors = None
-        self.case_types = []
-        self._initialize_models()
 
-    def _initialize_models(self):
-        """Initialize ML models for case type detection"""
-        try:
-            # Get all active case type mappings
-            mappings = CaseTypeMapping.objects.filter(is_active=True).order_by('-priority')
-            
-            if not mappings.exists():
-                logger.warning("No case type mappings found")
-                return
-
-            # Prepare training data
-            documents = []
-            self.case_types = []
-            
-            for mapping in mappings:
-                # Combine keywords into a document
-                keywords_text = ' '.join(mapping.keywords)
-                documents.append(keywords_text)
-                self.case_types.append(mapping)
-
-            # Create TF-IDF vectors
-            self.vectorizer = TfidfVectorizer(
-                stop_words='english',
-                ngram_range=(1, 2),
-                max_features=1000
-            )
-            
-            if documents:
-                self.case_type_vectors = self.vectorizer.fit_transform(documents)
-                logger.info(f"Initialized case type detector with {len(documents)} case types")
-
-        except Exception as e:
-            logger.error(f"Failed to initialize case type detector: {e}")
-
-    def detect_case_type(self, input_text: str, language: str = 'hi') -> Tuple[Optional[CaseTypeMapping], float, List[str]]:
+    def detect_case_type(self, input_text: str, language: str = 'hi',
+                         translated_text: Optional[str] = None) -> Tuple[Optional[CaseTypeMapping], float, List[str]]:
         """
         Detect case type from input text
+        translated_text: English translation already obtained (e.g. from a chained ASR pipeline)
         Returns: (detected_case_type, confidence, detected_keywords)
+
+        Runs as a cascade: keyword and TF-IDF matching on the text at hand
+        (plus the character n-gram model on the native-script input) first,
+        then translation to English, then the LLM, stopping as soon as the
+        best candidate is confident and clearly ahead of the next one
+        (CASE_DETECTION_CASCADE).
+        """
+        return self.detect_case_types_batch([input_text], [language], [translated_text])[0]
+
+    def detect_case_types_batch(self, texts: List[str], languages: List[str],
+                                translated_texts: Optional[List[Optional[str]]] = None
+                                ) -> List[Tuple[Optional[CaseTypeMapping], float, List[str]]]:
         """
+        Detect the case type of many texts; results match detect_case_type per text.
+
+        Each cascade stage runs once for every text still undecided: all
+        texts are vectorized together and scored with one sparse matrix
+        product, and translation is batched per source language.
+        """
+        count = len(texts)
+        translated_texts = translated_texts or [None] * count
+        timings = {}
         try:
-            # Translate to English if needed for better processing
-            processed_text = self._preprocess_text(input_text, language)
-            
-            # Method 1: Keyword-based detection
-            keyword_result = self._detect_by_keywords(processed_text)
-            
-            # Method 2: ML-based detection
-            ml_result = self._detect_by_similarity(processed_text)
-            
-            # Method 3: AI-based detection
-            ai_result = self._detect_by_ai(processed_text)
-            
-            # Combine results and select best match
-            final_result = self._combine_detection_results(
-                keyword_result, ml_result, ai_result
-            )
-            
-            return final_result
+            cascade = self._cascade_settings()
+            # Stages each text went through; the last one is where it resolved
+            stages = [['local'] for _ in range(count)]
+
+            # Stage 1: local methods, no network calls
+            current = [
+                translated if translated and language != 'en' else clean_input_text(text)
+                for text, language, translated in zip(texts, languages, translated_texts)
+            ]
+
+            def match_locally():
+                char_results = self._detect_by_char_similarity_batch(texts)
+                local = self._local_candidates_batch(current)
+                for text_candidates, char_result in zip(local, char_results):
+                    text_candidates += self._weighted_candidates(char_result=char_result[:2])
+                return local, char_results
+
+            candidates, char_results = self._timed('local', timings, match_locally)
+            # A confident native-script match needs neither translation nor the LLM
+            settled = [self._is_char_confident(char_result, cascade) for char_result in char_results]
+
+            # Stage 2: translate to English and match again
+            pending = [
+                index for index in range(count)
+                if not settled[index] and not self._is_decisive(candidates[index], cascade)
+                and languages[index] != 'en' and not translated_texts[index]
+            ]
+            if pending:
+                translations = self._timed('translation', timings, lambda: self._translate_batch(
+                    [texts[index] for index in pending], [languages[index] for index in pending]
+                ))
+                matches = self._timed('translation_local', timings, lambda: self._local_candidates_batch(translations))
+                for index, translation, match in zip(pending, translations, matches):
+                    current[index] = translation
+                    candidates[index] += match
+                    stages[index] += ['translation', 'translation_local']
+
+            # Stage 3: LLM classification
+            pending = [
+                index for index in range(count)
+                if not settled[index] and not self._is_decisive(candidates[index], cascade)
+            ]
+            if pending and cascade['use_llm']:
+                def classify():
+                    mappings = list(CaseTypeMapping.objects.filter(is_active=True))
+                    return [self._detect_by_ai(current[index], mappings) for index in pending]
+
+                for index, ai_result in zip(pending, self._timed('ai', timings, classify)):
+                    candidates[index] += self._weighted_candidates(ai_result=ai_result)
+                    stages[index].append('ai')
+
+            results = [self._select_candidate(text_candidates) for text_candidates in candidates]
+            self._record_stages(results, stages, timings)
+            return results
 
         except Exception as e:
             logger.error(f"Case type detection failed: {e}")
-            return None, 0.0, []
+            return [(None, 0.0, [])] * count
+
+    @staticmethod
+    def _record_stages(results: List[Tuple], stages: List[List[str]], timings: Dict[str, float]):
+        """Record where each text resolved, charging it an equal share of every batched stage it ran"""
+        participants = {}
+        for text_stages in stages:
+            for name in text_stages:
+                participants[name] = participants.get(name, 0) + 1
+
+        resolved_counts = {}
+        for result, text_stages in zip(results, stages):
+            resolved = text_stages[-1] if result[0] else 'unresolved'
+            resolved = 'translation' if resolved == 'translation_local' else resolved
+            resolved_counts[resolved] = resolved_counts.get(resolved, 0) + 1
+            detection_stage_stats.record(resolved, {
+                name: timings[name] / participants[name] for name in text_stages
+            })
 
-    def _preprocess_text(self, text: str, language: str) -> str:
+        logger.info(
+            f"Case type detection of {len(results)} text(s) resolved at "
+            f"{', '.join(f'{name}={count}' for name, count in resolved_counts.items())}; "
+            f"stage latency ms: {', '.join(f'{name}={ms:.1f}' for name, ms in timings.items())}"
+        )
+
+    @staticmethod
+    def _cascade_settings() -> Dict:
+        cascade = {
+            'accept_confidence': 0.25, 'min_margin': 0.1, 'use_llm': True,
+            'char_accept_similarity': 0.3, 'char_min_margin': 0.1,
+        }
+        cascade.update(getattr(settings, 'CASE_DETECTION_CASCADE', {}))
+        return cascade
+
+    @staticmethod
+    def _timed(stage: str, timings: Dict, run):
+        started = time.perf_counter()
+        try:
+            return run()
+        finally:
+            timings[stage] = (time.perf_counter() - started) * 1000
+
+    def _local_candidates_batch(self, texts: List[str]) -> List[List[Dict]]:
+        similarity_results = self._detect_by_similarity_batch(texts)
+        return [
+            self._weighted_candidates(keyword_result=self._detect_by_keywords(text), ml_result=ml_result)
+            for text, ml_result in zip(texts, similarity_results)
+        ]
+
+    @staticmethod
+    def _is_decisive(candidates: List[Dict], cascade: Dict) -> bool:
+        """Best candidate is confident and ahead of the best different case type by min_margin"""
+        best = {}
+        for candidate in candidates:
+            key = candidate['case_type'].pk
+            best[key] = max(best.get(key, 0.0), candidate['confidence'])
+        if not best:
+            return False
+
+        scores = sorted(best.values(), reverse=True)
+        runner_up = scores[1] if len(scores) > 1 else 0.0
+        return scores[0] >= cascade['accept_confidence'] and scores[0] - runner_up >= cascade['min_margin']
+
+    @staticmethod
+    def _is_char_confident(char_result: Tuple, cascade: Dict) -> bool:
+        """Character model is sure enough on its own: similar enough and well ahead of the next case type"""
+        case_type, score, margin = char_result
+        return bool(case_type) and score >= cascade['char_accept_similarity'] and margin >= cascade['char_min_margin']
+
+    def _translate_batch(self, texts: List[str], languages: List[str]) -> List[str]:
+        """Clean and translate texts to English with one batched BHASHINI call per language"""
+        translations = [None] * len(texts)
+        by_language = {}
+        for position, language in enumerate(languages):
+            by_language.setdefault(language, []).append(position)
+
+        for language, positions in by_language.items():
+            cleaned = [clean_input_text(texts[position]) for position in positions]
+            try:
+                results = self.bhashini_client.translate_batch(cleaned, language, 'en')
+                for position, text, result in zip(positions, cleaned, results):
+                    translations[position] = result.get('translated_text', text)
+            except Exception as e:
+                # Fall back to one call per text, each of which degrades to the original on failure
+                logger.warning(f"Batch translation from {language} failed, translating one by one: {e}")
+                for position in positions:
+                    translations[position] = self._preprocess_text(texts[position], language)
+        return translations
+
+    def _preprocess_text(self, text: str, language: str, translated_text: Optional[str] = None) -> str:
         """Preprocess and translate text if needed"""
+        if translated_text and language != 'en':
+            return translated_text
+
         try:
             # Clean text
-            text = re.sub(r'[^\w\s]', ' ', text.lower())
-            text = ' '.join(text.split())  # Remove extra whitespace
+            text = clean_input_text(text)
             
             # Translate to English if not already
             if language != 'en':
@@ -121,14 +272,9 @@ class CaseTypeDetector:
         matched_keywords = []
 
         try:
-            for case_type in CaseTypeMapping.objects.filter(is_active=True):
-                score = 0.0
-                current_keywords = []
-                
-                for keyword in case_type.keywords:
-                    if keyword.lower() in text.lower():
-                        score += 1.0
-                        current_keywords.append(keyword)
+            # One pass over the text finds the keywords of every case type
+            for case_type, current_keywords in keyword_matcher.case_type_matches(text):
+                score = float(len(current_keywords))
                 
                 # Normalize score by number of keywords
                 if case_type.keywords:
@@ -144,35 +290,34 @@ class CaseTypeDetector:
 
         return best_match, best_score, matched_keywords
 
-    def _detect_by_similarity(self, text: str) -> Tuple[Optional[CaseTypeMapping], float]:
-        """Detect case type using TF-IDF similarity"""
-        if not self.vectorizer or self.case_type_vectors is None:
-            return None, 0.0
-
+    def _detect_by_similarity_batch(self, texts: List[str]) -> List[Tuple[Optional[CaseTypeMapping], float]]:
+        """Detect case types using TF-IDF similarity against the shared model"""
         try:
-            # Vectorize input text
-            input_vector = self.vectorizer.transform([text])
-            
-            # Calculate similarities
-            similarities = cosine_similarity(input_vector, self.case_type_vectors)[0]
-            
-            # Find best match
-            best_idx = np.argmax(similarities)
-            best_score = similarities[best_idx]
-            
-            if best_score > 0.3:  # Minimum similarity threshold
-                return self.case_types[best_idx], best_score
-            
+            return detection_model_registry.current().most_similar_batch(texts)
         except Exception as e:
             logger.error(f"Similarity detection failed: {e}")
 
-        return None, 0.0
+        return [(None, 0.0)] * len(texts)
+
+    def _detect_by_char_similarity_batch(self, texts: List[str]) -> List[Tuple[Optional[CaseTypeMapping], float, float]]:
+        """Score native-script texts against the character n-gram model: (case type, similarity, margin)"""
+        try:
+            return [
+                result if result[1] > CHAR_SIMILARITY_THRESHOLD else (None, 0.0, 0.0)
+                for result in detection_model_registry.current().best_matches(texts, 'char')
+            ]
+        except Exception as e:
+            logger.error(f"Character similarity detection failed: {e}")
 
-    def _detect_by_ai(self, text: str) -> Tuple[Optional[str], float]:
+        return [(None, 0.0, 0.0)] * len(texts)
+
+    def _detect_by_ai(self, text: str, mappings: Optional[List[CaseTypeMapping]] = None) -> Tuple[Optional[str], float]:
         """Detect case type using AI/OpenAI"""
         try:
             # Get available case types
-            case_types = [ct.case_type for ct in CaseTypeMapping.objects.filter(is_active=True)]
+            if mappings is None:
+                mappings = CaseTypeMapping.objects.filter(is_active=True)
+            case_types = [ct.case_type for ct in mappings]
             
             prompt = f"""
             Analyze the following legal case description and classify it into one of these categories:
@@ -211,12 +356,12 @@ class CaseTypeDetector:
 
         return None, 0.0
 
-    def _combine_detection_results(self, keyword_result, ml_result, ai_result) -> Tuple[Optional[CaseTypeMapping], float, List[str]]:
-        """Combine results from different detection methods"""
+    def _weighted_candidates(self, keyword_result=None, ml_result=None, ai_result=None, char_result=None) -> List[Dict]:
+        """Weighted candidates from whichever detection methods were run"""
         results = []
         
         # Add keyword result
-        if keyword_result[0]:
+        if keyword_result and keyword_result[0]:
             results.append({
                 'case_type': keyword_result[0],
                 'confidence': keyword_result[1] * 0.4,  # Weight: 40%
@@ -225,7 +370,7 @@ class CaseTypeDetector:
             })
         
         # Add ML result
-        if ml_result[0]:
+        if ml_result and ml_result[0]:
             results.append({
                 'case_type': ml_result[0],
                 'confidence': ml_result[1] * 0.3,  # Weight: 30%
@@ -233,8 +378,17 @@ class CaseTypeDetector:
                 'method': 'similarity'
             })
         
+        # Add character n-gram result
+        if char_result and char_result[0]:
+            results.append({
+                'case_type': char_result[0],
+                'confidence': char_result[1] * 0.3,  # Weight: 30%
+                'keywords': [],
+                'method': 'char_similarity'
+            })
+        
         # Add AI result
-        if ai_result[0]:
+        if ai_result and ai_result[0]:
             results.append({
                 'case_type': ai_result[0],
                 'confidence': ai_result[1] * 0.3,  # Weight: 30%
@@ -242,6 +396,9 @@ class CaseTypeDetector:
                 'method': 'ai'
             })
         
+        return results
+
+    def _select_candidate(self, results: List[Dict]) -> Tuple[Optional[CaseTypeMapping], float, List[str]]:
         if not results:
             return None, 0.0, []
         
@@ -265,7 +422,8 @@ class CaseProcessor:
         self.bhashini_client = BhashiniClient()
         self.openai_client = AzureOpenAIClient()
 
-    def process_initial_input(self, user, input_text: str, mode: str, language: str = 'hi') -> LegalCase:
+    def process_initial_input(self, user, input_text: str, mode: str, language: str = 'hi',
+                              translated_text: Optional[str] = None) -> LegalCase:
         """Process initial user input and detect case type"""
         
         # Create new case
@@ -281,7 +439,7 @@ class CaseProcessor:
             case.add_processing_step("Input received")
             
             # Detect case type
-            case_type, confidence, keywords = self.detector.detect_case_type(input_text, language)
+            case_type, confidence, keywords = self.detector.detect_case_type(input_text, language, translated_text)
             
             if case_type:
                 case.detected_case_type = case_type
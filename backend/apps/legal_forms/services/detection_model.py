@@ -0,0 +1,389 @@
+# apps/legal_forms/services/detection_model.py
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from ..models import CaseTypeMapping, LegalCase
+from .versioned import VersionedResource
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'case_detection_model:version'
+# Minimum cosine similarity for the word model to return a case type
+SIMILARITY_THRESHOLD = 0.3
+# Character n-gram similarities run lower; unrelated complaints stay below this
+CHAR_SIMILARITY_THRESHOLD = 0.2
+
+
+def normalize_char_text(text: str) -> str:
+    """NFC, casefold and drop punctuation/symbols without splitting Indic vowel signs"""
+    text = unicodedata.normalize('NFC', text).casefold()
+    return ' '.join(''.join(' ' if unicodedata.category(char)[0] in 'PSZ' else char for char in text).split())
+
+
+# 'word': English word n-grams over the keywords, scored after translation.
+# 'char': character n-grams over keywords in every script plus past
+# transcripts, scored on the native-script input.
+VECTORIZER_PARAMS = {
+    'word': {'stop_words': 'english', 'ngram_range': (1, 2)},
+    'char': {'analyzer': 'char_wb', 'ngram_range': (3, 5), 'sublinear_tf': True, 'preprocessor': normalize_char_text},
+}
+MAX_FEATURES = {'word': 1000, 'char': 20000}
+# Bumped whenever the on-disk layout changes; older artifacts are ignored
+ARTIFACT_FORMAT = 3
+ARRAY_FILES = ('terms', 'idf', 'data', 'indices', 'indptr')
+
+
+def mapping_fingerprint(mappings: List[CaseTypeMapping]) -> str:
+    """Identifies the keywords (and order) a model was fitted on; names its artifact directory"""
+    material = json.dumps([[mapping.id, mapping.keywords] for mapping in mappings], ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+
+
+def load_active_mappings() -> List[CaseTypeMapping]:
+    return list(CaseTypeMapping.objects.filter(is_active=True).order_by('-priority', 'case_type', 'id'))
+
+
+def load_training_transcripts(mappings: List[CaseTypeMapping]) -> Dict[int, List[str]]:
+    """Inputs of the most recent completed cases per detected case type, for the char model"""
+    limit = getattr(settings, 'CASE_DETECTION_CHAR_MODEL_MAX_TRANSCRIPTS', 2000)
+    if not limit or not mappings:
+        return {}
+
+    transcripts: Dict[int, List[str]] = {}
+    rows = LegalCase.objects.filter(
+        status='completed', detected_case_type__in=[mapping.id for mapping in mappings]
+    ).exclude(initial_input='').order_by('-created_at').values_list('detected_case_type_id', 'initial_input')[:limit]
+    for case_type_id, text in rows:
+        transcripts.setdefault(case_type_id, []).append(text)
+    return transcripts
+
+
+def model_directory() -> str:
+    return getattr(settings, 'CASE_DETECTION_MODEL_DIR', None) or os.path.join(settings.BASE_DIR, 'models', 'case_detection')
+
+
+class MappedVectorizer:
+    """
+    TF-IDF transform over a vocabulary memory-mapped from artifacts.
+
+    The terms are a sorted fixed-width string array whose positions are the
+    matrix columns, so the vocabulary is shared between workers like the
+    matrices instead of being rebuilt as a dict in every process. Each
+    text's n-grams are looked up with one np.searchsorted. transform()
+    matches TfidfVectorizer.transform with the same parameters.
+    """
+
+    def __init__(self, terms: np.ndarray, idf: np.ndarray, params: Dict):
+        self.terms = terms
+        self.idf_ = idf
+        self.sublinear_tf = params.get('sublinear_tf', False)
+        self._analyze = TfidfVectorizer(**params).build_analyzer()
+
+    def transform(self, texts: List[str]) -> sparse.csr_matrix:
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            grams = self._analyze(text)
+            if not grams:
+                continue
+            grams = np.array(grams)
+            positions = np.minimum(np.searchsorted(self.terms, grams), len(self.terms) - 1)
+            found = positions[self.terms[positions] == grams]
+            columns.append(found)
+            rows.append(np.full(len(found), row))
+
+        columns = np.concatenate(columns) if columns else np.empty(0, dtype=np.intp)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+        # Duplicate (row, column) pairs are summed into term counts
+        counts = sparse.csr_matrix(
+            (np.ones(len(columns)), (rows, columns)), shape=(len(texts), len(self.terms))
+        )
+        counts.sum_duplicates()
+        if self.sublinear_tf:
+            counts.data = np.log(counts.data) + 1
+        counts.data *= self.idf_[counts.indices]
+        return normalize(counts, copy=False)
+
+
+class DetectionModel:
+    """
+    Immutable TF-IDF snapshot of the active case types, one index per kind
+    in VECTORIZER_PARAMS.
+
+    Never modified after construction, so any number of threads can score
+    against it while a replacement is being fitted. source is 'fitted' or
+    'artifact' (memory-mapped from files written by save()).
+    """
+
+    def __init__(self, version, case_types: List[CaseTypeMapping],
+                 indexes: Optional[Dict[str, Tuple[TfidfVectorizer, sparse.csr_matrix]]] = None,
+                 source: str = 'fitted'):
+        self.version = version
+        self.case_types = case_types
+        self.indexes = indexes or {}
+        self.source = source
+        self.fingerprint = mapping_fingerprint(case_types)
+        self.built_at = time.time()
+
+    @classmethod
+    def fit(cls, version, mappings: List[CaseTypeMapping],
+            transcripts: Optional[Dict[int, List[str]]] = None) -> 'DetectionModel':
+        if not mappings:
+            logger.warning("No case type mappings found")
+            return cls(version, [])
+
+        transcripts = transcripts or {}
+        documents = {
+            # Combine keywords into a document
+            'word': [' '.join(mapping.keywords) for mapping in mappings],
+            'char': [' '.join(list(mapping.keywords) + transcripts.get(mapping.id, [])) for mapping in mappings],
+        }
+        indexes = {}
+        for kind, kind_documents in documents.items():
+            vectorizer = TfidfVectorizer(max_features=MAX_FEATURES[kind], **VECTORIZER_PARAMS[kind])
+            indexes[kind] = (vectorizer, vectorizer.fit_transform(kind_documents))
+        return cls(version, list(mappings), indexes)
+
+    @classmethod
+    def load(cls, version, mappings: List[CaseTypeMapping], directory: Optional[str] = None) -> Optional['DetectionModel']:
+        """
+        Memory-map the artifacts fitted on exactly these mappings, or None if
+        there are none. The arrays are read-only views of the files, so every
+        worker on the host shares the same pages.
+        """
+        path = os.path.join(directory or model_directory(), mapping_fingerprint(mappings))
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+        except FileNotFoundError:
+            return None
+        if meta.get('format') != ARTIFACT_FORMAT or meta.get('case_type_ids') != [m.id for m in mappings]:
+            return None
+
+        indexes = {}
+        for kind, shape in meta['shapes'].items():
+            arrays = {
+                name: np.load(os.path.join(path, f'{kind}_{name}.npy'), mmap_mode='r') for name in ARRAY_FILES
+            }
+            vectorizer = MappedVectorizer(arrays['terms'], arrays['idf'], VECTORIZER_PARAMS[kind])
+            indexes[kind] = (vectorizer, sparse.csr_matrix(
+                (arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(shape), copy=False
+            ))
+        return cls(version, mappings, indexes, source='artifact')
+
+    def save(self, directory: Optional[str] = None, replace: bool = False) -> Optional[str]:
+        """
+        Write each index's sorted terms, IDF weights and CSR matrix as .npy
+        files under <directory>/<fingerprint>/ and return that path. An existing version
+        is kept unless replace is set (the char model also learns from
+        transcripts, which change without the fingerprint changing).
+
+        Files are written to a staging directory that is renamed into place,
+        so a loading worker never sees a partial version.
+        """
+        if not self.indexes:
+            return None
+
+        root = directory or model_directory()
+        target = os.path.join(root, self.fingerprint)
+        if os.path.isdir(target) and not replace:
+            return target
+
+        os.makedirs(root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=root)
+        retired = None
+        try:
+            shapes = {}
+            for kind, (vectorizer, case_type_vectors) in self.indexes.items():
+                vocabulary = vectorizer.vocabulary_
+                terms = np.array(sorted(vocabulary, key=vocabulary.get))
+                # Columns in term order, so MappedVectorizer can binary-search the terms
+                order = np.argsort(terms, kind='stable')
+                matrix = sparse.csr_matrix(case_type_vectors)[:, order]
+                matrix.sort_indices()
+                arrays = {
+                    'terms': terms[order], 'idf': np.asarray(vectorizer.idf_)[order],
+                    'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr,
+                }
+                for name in ARRAY_FILES:
+                    np.save(os.path.join(staging, f'{kind}_{name}.npy'), np.ascontiguousarray(arrays[name]))
+                shapes[kind] = list(matrix.shape)
+            with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as meta_file:
+                json.dump({
+                    'format': ARTIFACT_FORMAT,
+                    'fingerprint': self.fingerprint,
+                    'case_type_ids': [mapping.id for mapping in self.case_types],
+                    'shapes': shapes,
+                    'built_at': self.built_at,
+                }, meta_file)
+
+            if os.path.isdir(target):
+                # Renaming a directory onto an empty one replaces it
+                retired = tempfile.mkdtemp(prefix='.retired-', dir=root)
+                os.rename(target, retired)
+            os.rename(staging, target)
+        except OSError:
+            # Another builder published the same fingerprint first
+            if not os.path.isdir(target):
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+            if retired:
+                # Workers that mapped the old files keep their pages until they reload
+                shutil.rmtree(retired, ignore_errors=True)
+        return target
+
+    def best_matches(self, texts: List[str], kind: str = 'word') -> List[Tuple[Optional[CaseTypeMapping], float, float]]:
+        """
+        (best case type, its similarity, lead over the runner-up) per text,
+        scored with one sparse matrix product.
+        """
+        if kind not in self.indexes or not texts:
+            return [(None, 0.0, 0.0)] * len(texts)
+
+        vectorizer, case_type_vectors = self.indexes[kind]
+        input_vectors = vectorizer.transform(texts)
+        # Rows are L2-normalized, so dot products are cosine similarities.
+        # The case type matrix stays on the left: as the right operand scipy
+        # would convert its transpose back to CSR, copying the memory map.
+        similarities = (case_type_vectors @ input_vectors.T).T.toarray()
+
+        results = []
+        for row in similarities:
+            # Stable, so ties go to the higher-priority case type
+            ranked = np.argsort(-row, kind='stable')
+            best_score = float(row[ranked[0]])
+            runner_up = float(row[ranked[1]]) if len(ranked) > 1 else 0.0
+            results.append((self.case_types[ranked[0]] if best_score > 0 else None, best_score, best_score - runner_up))
+        return results
+
+    def most_similar(self, text: str) -> Tuple[Optional[CaseTypeMapping], float]:
+        return self.most_similar_batch([text])[0]
+
+    def most_similar_batch(self, texts: List[str]) -> List[Tuple[Optional[CaseTypeMapping], float]]:
+        """Best case type and similarity per text from the word model, if above SIMILARITY_THRESHOLD"""
+        return [
+            (case_type, score) if score > SIMILARITY_THRESHOLD else (None, 0.0)
+            for case_type, score, _ in self.best_matches(texts, 'word')
+        ]
+
+
+class DetectionModelRegistry(VersionedResource[DetectionModel]):
+    """
+    Process-wide holder of the current DetectionModel.
+
+    The model is memory-mapped from the artifacts of build_detection_model
+    when they match the active mappings and fitted in-process otherwise.
+    Workers load it at startup (see warm_up_case_detection) and again, in
+    the background as a VersionedResource, whenever the mappings change.
+    Fitting never runs on the request path: a worker that was not warmed
+    up maps matching artifacts on first use, or serves an empty model
+    (detection falls through to translation and the LLM) while a
+    background thread fits one.
+    """
+
+    version_key = VERSION_CACHE_KEY
+    description = 'case type detection model'
+
+    def _load_first(self, version):
+        try:
+            model = DetectionModel.load(version, load_active_mappings())
+        except Exception as e:
+            logger.warning(f"Case detection model artifacts unavailable on first use: {e}")
+            model = None
+
+        if model is not None:
+            self._value, self._version = model, version
+            self._checked_at = time.monotonic()
+            return
+
+        logger.warning("Case detection model was not warmed up; fitting it in the background")
+        self._value = self._fallback()
+        # Expire the check so current() starts the background fit right away
+        self._checked_at = 0.0
+
+    def _load(self, version) -> DetectionModel:
+        started = time.perf_counter()
+        mappings = load_active_mappings()
+        model = None
+        try:
+            model = DetectionModel.load(version, mappings)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable case detection model artifacts: {e}")
+        if model is None:
+            model = DetectionModel.fit(version, mappings, load_training_transcripts(mappings))
+
+        logger.info(f"Loaded case type detection model v{version} ({model.source}, {model.fingerprint}) "
+                    f"with {len(model.case_types)} case types in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return model
+
+    def _fallback(self) -> DetectionModel:
+        return DetectionModel(None, [])
+
+
+detection_model_registry = DetectionModelRegistry()
+
+
+def warm_up_case_detection():
+    """Load the keyword automaton and detection model before a worker serves requests"""
+    from .keyword_matcher import keyword_matcher
+
+    started = time.perf_counter()
+    keyword_matcher.warm_up()
+    detection_model_registry.warm_up()
+    logger.info(f"Warmed up case type detection in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+def build_model_artifacts(directory: Optional[str] = None, keep: Optional[int] = None) -> Dict:
+    """
+    Fit the model on the active mappings and recent transcripts, publish it
+    for workers to memory-map, delete all but the newest `keep` versions
+    and tell every worker to reload.
+    """
+    root = directory or model_directory()
+    keep = keep or getattr(settings, 'CASE_DETECTION_MODEL_KEEP_VERSIONS', 3)
+
+    mappings = load_active_mappings()
+    transcripts = load_training_transcripts(mappings)
+    model = DetectionModel.fit(None, mappings, transcripts)
+    path = model.save(root, replace=True)
+    removed = prune_model_artifacts(root, keep, current=model.fingerprint)
+    detection_model_registry.invalidate()
+
+    return {
+        'fingerprint': model.fingerprint,
+        'path': path,
+        'case_types': len(model.case_types),
+        'transcripts': sum(len(texts) for texts in transcripts.values()),
+        'removed_versions': removed,
+    }
+
+
+def prune_model_artifacts(directory: str, keep: int, current: Optional[str] = None) -> List[str]:
+    """Delete artifact versions beyond the newest `keep` (never `current`)"""
+    try:
+        versions = [entry for entry in os.scandir(directory) if entry.is_dir() and not entry.name.startswith('.')]
+    except FileNotFoundError:
+        return []
+
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    removed = []
+    for entry in versions[keep:]:
+        if entry.name == current:
+            continue
+        # Workers that mapped these files keep their pages until they reload
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed.append(entry.name)
+    return removed
@@ -0,0 +1,160 @@
+# apps/legal_forms/services/keyword_matcher.py
+import logging
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from ..models import CaseTypeMapping
+from .versioned import VersionedResource
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_LEGAL_KEYWORDS = [
+    'complaint', 'petition', 'case', 'court', 'legal', 'law', 'judge', 'lawyer',
+    'damage', 'injury', 'accident', 'contract', 'agreement', 'breach', 'violation',
+    'property', 'rent', 'tenant', 'landlord', 'money', 'payment', 'compensation',
+    # Hindi/regional language keywords
+    'शिकायत', 'न्यायालय', 'कानून', 'न्यायाधीश', 'वकील', 'नुकसान', 'चोट', 'दुर्घटना',
+    'अनुबंध', 'समझौता', 'उल्लंघन', 'संपत्ति', 'किराया', 'किरायेदार', 'मकान मालिक',
+]
+
+# Owner of the built-in keywords; case type keywords are owned by their mapping id
+BUILTIN = 'builtin'
+
+VERSION_CACHE_KEY = 'keyword_matcher:version'
+
+
+def normalize_keyword_text(text: str) -> str:
+    """NFC-normalize and casefold, so keywords match regardless of case or Unicode composition"""
+    return unicodedata.normalize('NFC', text).casefold()
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over normalized keywords.
+
+    Finds every keyword occurring anywhere in a text (substring semantics,
+    like ``keyword in text``) in one pass, independent of the number of
+    keywords. Each keyword carries the (owner, original spelling) pairs it
+    was added with.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[object, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        self.owners: Dict[str, List[Tuple[object, str]]] = {}
+
+        for owner, keyword in keywords:
+            normalized = normalize_keyword_text(keyword).strip()
+            if not normalized:
+                continue
+            if normalized not in self.owners:
+                self.owners[normalized] = []
+                self._add(normalized)
+            self.owners[normalized].append((owner, keyword))
+        self._link()
+
+    def _add(self, keyword: str):
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(keyword)
+
+    def _link(self):
+        """Breadth-first failure links; each node also inherits its failure node's outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> List[str]:
+        """Distinct normalized keywords found in text, in order of first occurrence"""
+        found = {}
+        node = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in normalize_keyword_text(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for keyword in output[node]:
+                found.setdefault(keyword, None)
+        return list(found)
+
+    def match(self, text: str) -> Dict[object, List[str]]:
+        """Matched keywords (original spelling) grouped by owner"""
+        matches: Dict[object, List[str]] = {}
+        for keyword in self.find(text):
+            for owner, original in self.owners[keyword]:
+                matches.setdefault(owner, []).append(original)
+        return matches
+
+
+class KeywordMatcher(VersionedResource[Tuple[KeywordAutomaton, List[CaseTypeMapping]]]):
+    """
+    Process-wide automaton over every active CaseTypeMapping's keywords plus
+    BUILTIN_LEGAL_KEYWORDS.
+
+    Built on first use and rebuilt as a VersionedResource when mappings
+    change. The automaton takes milliseconds to build, so the worker that
+    saved the mapping rebuilds it right away in invalidate().
+    """
+
+    version_key = VERSION_CACHE_KEY
+    description = 'keyword matcher'
+
+    def match(self, text: str) -> Dict[object, List[str]]:
+        """Matched keywords grouped by owner: a CaseTypeMapping id or BUILTIN"""
+        return self.current()[0].match(text or '')
+
+    def detect_legal_keywords(self, text: str) -> List[str]:
+        """Built-in legal keywords occurring in text"""
+        return self.match(text).get(BUILTIN, [])
+
+    def case_type_matches(self, text: str) -> List[Tuple[CaseTypeMapping, List[str]]]:
+        """(mapping, matched keywords) for every active mapping, in priority order"""
+        automaton, mappings = self.current()
+        matches = automaton.match(text or '')
+        return [(mapping, matches.get(mapping.id, [])) for mapping in mappings]
+
+    def keywords_for_case_type(self, text: str, case_type: CaseTypeMapping) -> List[str]:
+        """Keywords of one mapping occurring in text (including inactive mappings)"""
+        automaton, mappings = self.current()
+        if not any(mapping.id == case_type.id for mapping in mappings):
+            automaton = KeywordAutomaton((case_type.id, keyword) for keyword in case_type.keywords)
+        return automaton.match(text or '').get(case_type.id, [])
+
+    def invalidate(self):
+        """Make every worker rebuild its automaton; this one rebuilds now"""
+        super().invalidate()
+        self.rebuild()
+
+    def _load(self, version) -> Tuple[KeywordAutomaton, List[CaseTypeMapping]]:
+        mappings = list(CaseTypeMapping.objects.filter(is_active=True))
+        keywords = [(BUILTIN, keyword) for keyword in BUILTIN_LEGAL_KEYWORDS]
+        for mapping in mappings:
+            keywords.extend((mapping.id, keyword) for keyword in mapping.keywords or [] if isinstance(keyword, str))
+
+        automaton = KeywordAutomaton(keywords)
+        logger.info(f"Built keyword automaton with {len(automaton.owners)} keywords "
+                    f"for {len(mappings)} case types")
+        return automaton, mappings
+
+    def _fallback(self) -> Tuple[KeywordAutomaton, List[CaseTypeMapping]]:
+        return KeywordAutomaton((BUILTIN, keyword) for keyword in BUILTIN_LEGAL_KEYWORDS), []
+
+
+keyword_matcher = KeywordMatcher()
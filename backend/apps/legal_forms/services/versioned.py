@@ -0,0 +1,139 @@
+# apps/legal_forms/services/versioned.py
+import time
+import logging
+import threading
+from typing import Generic, Optional, TypeVar
+
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# How often a worker checks the shared version for mapping changes made elsewhere
+VERSION_CHECK_INTERVAL = 5
+
+# Version of a resource that has not been loaded successfully yet; never equal to a shared version
+NOT_LOADED = object()
+
+T = TypeVar('T')
+
+
+class VersionedResource(Generic[T]):
+    """
+    A per-process value derived from the case type mappings, rebuilt when a
+    version counter in the shared cache changes.
+
+    Subclasses set version_key and implement _load(version). Saving or
+    deleting a CaseTypeMapping bumps the counter (see signals.py); workers
+    notice the new version within VERSION_CHECK_INTERVAL seconds, rebuild in
+    a background thread and swap the reference when done. Requests keep
+    using the previous value meanwhile and never wait on the lock.
+
+    warm_up() loads the first value at worker startup. A value that is
+    still missing on first use is loaded by _load_first, which subclasses
+    whose _load is expensive override to stay off the request path.
+    """
+
+    version_key: str = ''
+    description: str = 'resource'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._version = NOT_LOADED
+        self._checked_at = 0.0
+        self._rebuilding = False
+
+    def current(self) -> T:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._load_first(self._shared_version())
+
+        value = self._value
+        now = time.monotonic()
+        if now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return value
+
+        self._checked_at = now
+        version = self._shared_version()
+        if version != self._version:
+            self._rebuild_in_background(version)
+        return value
+
+    def rebuild(self) -> T:
+        """Load the value for the current shared version and swap it in"""
+        with self._lock:
+            self._swap(self._shared_version())
+            return self._value
+
+    def warm_up(self) -> T:
+        """Load the value unless one is loaded already; for worker startup, before requests arrive"""
+        if self._version is NOT_LOADED:
+            return self.rebuild()
+        return self._value
+
+    def invalidate(self):
+        """Make every worker rebuild, this one included"""
+        try:
+            cache.add(self.version_key, 0, timeout=None)
+            cache.incr(self.version_key)
+        except Exception as e:
+            logger.warning(f"Failed to bump {self.description} version: {e}")
+        self._checked_at = 0.0
+
+    def _shared_version(self):
+        try:
+            return cache.get(self.version_key, 0)
+        except Exception as e:
+            logger.warning(f"{self.description.capitalize()} version unavailable: {e}")
+            return None
+
+    def _load(self, version) -> T:
+        raise NotImplementedError
+
+    def _fallback(self) -> T:
+        """Value served when nothing could be loaded yet"""
+        raise NotImplementedError
+
+    def _load_first(self, version):
+        # Called with the lock held
+        self._swap(version)
+
+    def _swap(self, version):
+        # Called with the lock held
+        try:
+            value = self._load(version)
+        except Exception as e:
+            logger.error(f"Failed to load {self.description}: {e}")
+            # Keep serving whatever we had; the version stays stale so the next check retries
+            if self._value is None:
+                self._value = self._fallback()
+            self._checked_at = time.monotonic()
+            return
+
+        self._value, self._version = value, version
+        self._checked_at = time.monotonic()
+
+    def _rebuild_in_background(self, version):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            try:
+                try:
+                    value = self._load(version)
+                except Exception as e:
+                    logger.error(f"Failed to rebuild {self.description}: {e}")
+                    return
+                with self._lock:
+                    self._value, self._version = value, version
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+                # The thread opened its own database connection
+                connection.close()
+
+        threading.Thread(target=run, name=f"{self.version_key}-rebuild", daemon=True).start()
@@ -0,0 +1,50 @@
+# apps/legal_forms/signals.py
+import logging
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CaseTypeMapping, QuestionMapping
+
+logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender=QuestionMapping)
+def warm_question_voice_prompt(sender, instance, created, update_fields=None, **kwargs):
+    """Pre-synthesize the question's voice prompts once the save is committed"""
+    if update_fields is not None and 'question' not in update_fields:
+        return
+
+    from apps.speech_processing.tasks import warm_question_voice_prompts
+
+    def enqueue():
+        try:
+            warm_question_voice_prompts.delay([instance.id])
+        except Exception as e:
+            # A broker outage must not fail the admin save; warm_voice_prompts can catch up
+            logger.error(f"Failed to enqueue voice prompt warming for question {instance.id}: {e}")
+
+    transaction.on_commit(enqueue)
+
+@receiver(post_save, sender=CaseTypeMapping)
+@receiver(post_delete, sender=CaseTypeMapping)
+def rebuild_case_type_models(sender, instance, **kwargs):
+    """Rebuild the keyword automaton and detection model in every worker once the change is committed"""
+    from .services.keyword_matcher import keyword_matcher
+
+    transaction.on_commit(keyword_matcher.invalidate)
+    # The build bumps the model version only after publishing its artifacts,
+    # so workers memory-map the new model instead of each refitting it
+    transaction.on_commit(enqueue_detection_model_build)
+
+def enqueue_detection_model_build():
+    """Publish memory-mapped model artifacts for the new mappings"""
+    from .services.detection_model import detection_model_registry
+
+    try:
+        from .tasks import build_detection_model
+
+        build_detection_model.delay()
+    except Exception as e:
+        logger.error(f"Failed to enqueue case detection model build: {e}")
+        # No artifacts are coming; workers refit in-process instead
+        detection_model_registry.invalidate()
@@ -313,8 +313,11 @@ def batch_process_pending_cases():
             status__in=['input_received', 'case_type_detected']
         ).order_by('created_at')
         
+        cases = list(pending_cases[:10])  # Process maximum 10 cases at a time
+        _pretranslate_case_inputs(cases)
+
         processed_count = 0
-        for case in pending_cases[:10]:  # Process maximum 10 cases at a time
+        for case in cases:
             try:
                 # Queue for async processing
                 process_case_async.delay(str(case.case_id))
@@ -330,11 +333,33 @@ def batch_process_pending_cases():
         logger.error(f"Batch processing failed: {e}")
         return {'error': str(e)}
 
+def _pretranslate_case_inputs(cases):
+    """Translate pending inputs in one batched call per language so re-detection hits the translation memo"""
+    from apps.legal_forms.services.case_processor import clean_input_text
+    from apps.speech_processing.bhashini_client import BhashiniClient
+
+    texts_by_language = {}
+    for case in cases:
+        if case.initial_input and case.input_language != 'en':
+            texts_by_language.setdefault(case.input_language, []).append(clean_input_text(case.initial_input))
+
+    if not texts_by_language:
+        return
+
+    bhashini_client = BhashiniClient()
+    for language, texts in texts_by_language.items():
+        try:
+            bhashini_client.translate_batch(texts, language, 'en')
+        except Exception as e:
+            # Detection still translates per case if the batch fails
+            logger.warning(f"Batch pre-translation failed for {language}: {e}")
+
 @shared_task
 def optimize_case_detection_models():
     """Optimize case detection models based on recent data"""
     try:
         from apps.legal_forms.services.case_processor import CaseTypeDetector
+        from apps.legal_forms.services.detection_model import detection_model_registry
         
         # Get recent successful cases for training data
         recent_cases = LegalCase.objects.filter(
@@ -347,20 +372,20 @@ def optimize_case_detection_models():
             logger.info("Not enough recent cases for model optimization")
             return {'message': 'Insufficient data for optimization'}
         
-        # Re-initialize detector with fresh data
+        # Refit the shared model with fresh data
+        detection_model_registry.rebuild()
         detector = CaseTypeDetector()
-        detector._initialize_models()
         
         # Test accuracy on recent cases
-        correct_predictions = 0
-        total_tests = min(recent_cases.count(), 50)  # Test on up to 50 cases
+        test_cases = list(recent_cases[:50])  # Test on up to 50 cases
+        total_tests = len(test_cases)
+        predictions = detector.detect_case_types_batch(
+            [case.initial_input for case in test_cases],
+            [case.input_language for case in test_cases]
+        )
         
-        for case in recent_cases[:total_tests]:
-            predicted_type, confidence, _ = detector.detect_case_type(
-                case.initial_input,
-                case.input_language
-            )
-            
+        correct_predictions = 0
+        for case, (predicted_type, confidence, _) in zip(test_cases, predictions):
             if predicted_type and predicted_type.id == case.detected_case_type.id:
                 correct_predictions += 1
         
@@ -379,6 +404,24 @@ def optimize_case_detection_models():
         logger.error(f"Model optimization failed: {e}")
         return {'error': str(e)}
 
+@shared_task(bind=True, max_retries=2)
+def build_detection_model(self):
+    """Fit the case detection model and publish it as memory-mapped artifacts for all workers"""
+    from apps.legal_forms.services.detection_model import build_model_artifacts, detection_model_registry
+
+    try:
+        summary = build_model_artifacts()
+        logger.info(f"Published case detection model: {summary}")
+        return summary
+
+    except Exception as e:
+        logger.error(f"Case detection model build failed: {e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=60, exc=e)
+        # Out of retries: without new artifacts, workers refit in-process
+        detection_model_registry.invalidate()
+        return {'success': False, 'error': str(e)}
+
 def _calculate_progress(case):
     """Calculate case completion progress"""
     if case.status == 'completed':
@@ -8,6 +8,15 @@ import redis
 import os
 import psutil
 from datetime import datetime
+from apps.speech_processing.transport import get_pool_stats
+from apps.speech_processing.pipeline_cache import pipeline_config_cache
+from apps.speech_processing.tts_cache import tts_audio_cache
+from apps.speech_processing.translation_memo import translation_memo
+from apps.speech_processing.transcript_cache import transcript_cache
+from apps.speech_processing.language_id import language_id_stats
+from apps.speech_processing.llm_cache import llm_response_cache
+from apps.legal_forms.services.case_processor import detection_stage_stats
+from apps.speech_processing.resilience import get_breaker_stats
 
 @require_GET
 @never_cache
@@ -99,6 +108,15 @@ def metrics(request):
             'users_active_today': active_users_today,
             'system_cpu_percent': cpu_percent,
             'system_memory_percent': memory.percent,
+            'bhashini_transport': get_pool_stats(),
+            'bhashini_pipeline_config_cache': pipeline_config_cache.get_stats(),
+            'tts_audio_cache': tts_audio_cache.get_stats(),
+            'bhashini_translation_memo': translation_memo.get_stats(),
+            'asr_transcript_cache': transcript_cache.get_stats(),
+            'asr_language_id': language_id_stats.get_stats(),
+            'azure_openai_response_cache': llm_response_cache.get_stats(),
+            'case_detection_cascade': detection_stage_stats.get_stats(),
+            'bhashini_circuit_breakers': get_breaker_stats(),
         }
         
         return JsonResponse(metrics_data)
@@ -0,0 +1,269 @@
+# apps/speech_processing/async_bhashini_client.py
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .audio_processing import TARGET_SAMPLE_RATE
+from .bhashini_client import BaseBhashiniClient, NoSpeechRecognized
+from .pipeline_cache import pipeline_config_cache
+from .resilience import get_circuit_breaker
+from .streaming import BufferMeter, aiter_body
+from .translation_memo import translation_memo
+from .transport import (
+    RETRY_STATUS_CODES, get_async_bhashini_client, get_async_timeout, get_timeout, retry_delay
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBhashiniClient(BaseBhashiniClient):
+    """
+    asyncio counterpart of BhashiniClient for ASGI views and consumers.
+
+    Exposes the same speech_to_text / text_to_speech / translate_text API as
+    coroutines, sharing one pooled httpx client per event loop and the same
+    pipeline configuration cache, circuit breakers, audio preparation and
+    transcript cache as the sync client. Anything that reads audio or touches
+    the shared cache runs in a worker thread, off the event loop.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.http = get_async_bhashini_client()
+        self.max_concurrency = getattr(settings, 'BHASHINI_ASYNC_MAX_CONCURRENCY', 8)
+
+    async def get_auth_token(self, task_type="asr", source_language="hi", target_language=None):
+        """Get pipeline configuration from BHASHINI, retrying transient failures"""
+        payload = self._config_payload(task_type, source_language, target_language)
+        retries = getattr(settings, 'BHASHINI_CONFIG_RETRIES', 3)
+
+        for attempt in range(retries + 1):
+            try:
+                response = await self.http.post(
+                    self.config_url,
+                    json=payload,
+                    headers=self._config_headers(),
+                    timeout=get_async_timeout('config')
+                )
+                if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                    await asyncio.sleep(retry_delay(attempt))
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except httpx.TransportError as e:
+                if attempt < retries:
+                    await asyncio.sleep(retry_delay(attempt))
+                    continue
+                logger.error(f"Failed to get auth token: {e}")
+                raise
+            except httpx.HTTPStatusError as e:
+                logger.error(f"Failed to get auth token: {e}")
+                raise
+
+    async def speech_to_text(self, audio_data, source_language="hi", audio_hash=None):
+        """
+        Convert speech to text using BHASHINI ASR.
+
+        Accepts the same audio as BhashiniClient.speech_to_text and prepares
+        it the same way: normalized, cut into concurrently transcribed
+        segments when long, and streamed into the request body. With
+        audio_hash the transcript cache is consulted and filled.
+        """
+        try:
+            cached = await sync_to_async(self._cached_transcript, thread_sensitive=False)(
+                audio_hash, source_language
+            )
+            if cached:
+                return cached
+
+            result = await self._recognize(audio_data, source_language)
+            await sync_to_async(self._cache_transcript, thread_sensitive=False)(audio_hash, source_language, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"Async speech to text conversion failed: {e}")
+            raise
+
+    async def text_to_speech(self, text, target_language="hi", gender="female", sampling_rate=22050):
+        """Convert text to speech using BHASHINI TTS"""
+        try:
+            result = await self._run_inference(
+                "tts", target_language, None,
+                lambda service_id: self._tts_payload(service_id, text, target_language, gender, sampling_rate)
+            )
+            return self._parse_tts_result(result)
+
+        except Exception as e:
+            logger.error(f"Async text to speech conversion failed: {e}")
+            raise
+
+    async def translate_text(self, text, source_language, target_language):
+        """Translate text between languages using BHASHINI, memoizing the result"""
+        try:
+            memoized = await sync_to_async(translation_memo.get, thread_sensitive=False)(
+                text, source_language, target_language
+            )
+            if memoized is not None:
+                return dict(memoized)
+
+            result = await self._run_inference(
+                "translation", source_language, target_language,
+                lambda service_id: self._translation_payload(service_id, text, source_language, target_language)
+            )
+            translation = self._parse_translation_result(result, source_language, target_language)
+            await sync_to_async(translation_memo.set, thread_sensitive=False)(
+                text, source_language, target_language, translation
+            )
+            return translation
+
+        except Exception as e:
+            logger.error(f"Async translation failed: {e}")
+            raise
+
+    async def translate_many(self, texts: List[str], source_language: str, target_language: str) -> List[Dict]:
+        """Translate independent texts concurrently, returning results in input order"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def translate_one(text):
+            async with semaphore:
+                return await self.translate_text(text, source_language, target_language)
+
+        return await asyncio.gather(*(translate_one(text) for text in texts))
+
+    async def translate_batch(self, texts: List[str], source_language: str, target_language: str) -> List[Dict]:
+        """Translate many texts in packed multi-segment requests, sent concurrently; results in input order"""
+        try:
+            results, pending, batches = await sync_to_async(self._plan_translation_batch, thread_sensitive=False)(
+                texts, source_language, target_language
+            )
+            pending_texts = list(pending)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def translate_one(batch):
+                batch_texts = [pending_texts[position] for position in batch]
+                async with semaphore:
+                    result = await self._run_inference(
+                        "translation", source_language, target_language,
+                        lambda service_id: self._translation_payload(service_id, batch_texts, source_language, target_language)
+                    )
+                await sync_to_async(self._fill_translation_batch, thread_sensitive=False)(
+                    results, pending, batch,
+                    self._parse_batch_translation_result(result, len(batch_texts)),
+                    source_language, target_language
+                )
+
+            await asyncio.gather(*(translate_one(batch) for batch in batches))
+            return results
+
+        except Exception as e:
+            logger.error(f"Async batch translation failed: {e}")
+            raise
+
+    async def _recognize(self, audio_data, source_language, target_language=None):
+        """Normalize, segment if long, and transcribe (optionally chained with translation)"""
+        # Probing, resampling and silence detection read the whole recording
+        audio, sampling_rate, normalization, segments = await asyncio.to_thread(
+            self._prepare_recognition, audio_data
+        )
+        # Shared by every request body of this recording, so the stats show the combined peak
+        meter = BufferMeter()
+
+        try:
+            if segments:
+                semaphore = asyncio.Semaphore(max(1, self.max_parallel_segments))
+
+                async def transcribe_segment(segment):
+                    async with semaphore:
+                        try:
+                            return await self._transcribe(
+                                segment['audio'], source_language, target_language, sampling_rate, meter
+                            )
+                        except NoSpeechRecognized:
+                            # A segment of pure silence or noise should not fail the recording
+                            return None
+
+                results = await asyncio.gather(*(transcribe_segment(segment) for segment in segments))
+                result = self._stitch_segments(segments, results, source_language)
+                result['payload_stats']['peak_buffer_bytes'] = meter.peak
+            else:
+                result = await self._transcribe(audio, source_language, target_language, sampling_rate, meter)
+        finally:
+            if normalization:
+                # The normalized recording is a temporary file
+                audio.close()
+
+        if normalization:
+            result['payload_stats']['normalization'] = normalization
+        return result
+
+    async def _transcribe(self, audio_data, source_language, target_language=None,
+                          sampling_rate=TARGET_SAMPLE_RATE, meter=None):
+        """Run ASR on one recording, chained with translation when target_language is given"""
+        bodies = []
+        build_payload = self._asr_payload_builder(
+            audio_data, source_language, target_language, sampling_rate, meter, bodies
+        )
+        task_type = "asr+translation" if target_language else "asr"
+        result = await self._run_inference(task_type, source_language, target_language, build_payload)
+        transcript = await sync_to_async(self._parse_transcript, thread_sensitive=False)(
+            result, source_language, target_language
+        )
+        transcript['payload_stats'] = bodies[0].stats()
+        return transcript
+
+    async def _get_pipeline_config(self, task_type, source_language, target_language=None):
+        cache_key = self._config_cache_key(task_type, source_language, target_language)
+
+        async def fetch():
+            auth_response = await self.get_auth_token(task_type, source_language, target_language)
+            return self._parse_pipeline_config(auth_response)
+
+        config = await pipeline_config_cache.aget(cache_key, fetch)
+        return cache_key, config
+
+    async def _run_inference(self, task_type, source_language, target_language, build_payload):
+        cache_key, config = await self._get_pipeline_config(task_type, source_language, target_language)
+
+        breaker = get_circuit_breaker(config['callback_url'])
+        # Fails fast with CircuitOpenError while the endpoint is known to be down
+        await sync_to_async(breaker.before_call, thread_sensitive=False)()
+        slow_after = get_timeout(task_type)[1] * breaker.config['slow_call_fraction']
+
+        payload = build_payload(*config.get('service_ids', [config['service_id']]))
+        headers = self._inference_headers()
+        if isinstance(payload, dict):
+            body = {'json': payload}
+        else:
+            # Streaming bodies are already serialized JSON with a known length
+            body = {'content': aiter_body(payload)}
+            headers['Content-Length'] = str(len(payload))
+
+        started = time.monotonic()
+        try:
+            response = await self.http.post(
+                config['callback_url'],
+                headers=headers,
+                timeout=get_async_timeout(task_type),
+                **body
+            )
+        except httpx.RequestError:
+            await sync_to_async(breaker.record, thread_sensitive=False)(success=False)
+            raise
+
+        await sync_to_async(self._record_outcome, thread_sensitive=False)(
+            breaker, task_type, response.status_code, time.monotonic() - started, slow_after
+        )
+
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError:
+            if self._should_invalidate_config(response.status_code):
+                await sync_to_async(pipeline_config_cache.invalidate, thread_sensitive=False)(cache_key)
+            raise
+
+        return response.json()
@@ -0,0 +1,85 @@
+# apps/speech_processing/async_views.py
+import asyncio
+import json
+import logging
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .async_bhashini_client import AsyncBhashiniClient
+from .audio_metadata import probe_wav, upload_limit_error
+from .transcript_cache import hash_audio
+
+logger = logging.getLogger(__name__)
+
+# Plain Django async views: DRF's @api_view is sync-only, so authentication
+# relies on core.middleware.JWTAuthenticationMiddleware having set request.user.
+
+
+def _unauthorized():
+    return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+
+
+@csrf_exempt
+@require_POST
+async def speech_to_text_async(request):
+    """Speech to text without holding a worker while BHASHINI runs ASR"""
+    if not request.user.is_authenticated:
+        return _unauthorized()
+
+    audio_file = request.FILES.get('audio')
+    source_language = request.POST.get('language', 'hi')
+
+    if not audio_file:
+        return JsonResponse({'error': 'Audio file is required'}, status=400)
+
+    # Uploads may be spooled to disk; reading them blocks, so it happens in worker threads
+    limit_error = upload_limit_error(audio_file.size, await asyncio.to_thread(probe_wav, audio_file))
+    if limit_error:
+        return JsonResponse({'error': 'Audio upload too large', 'details': limit_error}, status=413)
+
+    try:
+        audio_hash = await asyncio.to_thread(hash_audio, audio_file)
+        result = await AsyncBhashiniClient().speech_to_text(audio_file, source_language, audio_hash)
+        return JsonResponse({
+            'success': True,
+            'transcription': result['text'],
+            'confidence': result['confidence'],
+            'language': result['language'],
+        })
+    except Exception as e:
+        logger.error(f"Async speech to text failed: {e}")
+        return JsonResponse({'error': 'Speech recognition failed', 'details': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_POST
+async def translate_texts_async(request):
+    """Translate several texts (e.g. a set of answers) in as few BHASHINI calls as possible"""
+    if not request.user.is_authenticated:
+        return _unauthorized()
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    texts = data.get('texts')
+    source_language = data.get('source_language')
+    target_language = data.get('target_language', 'en')
+
+    if not isinstance(texts, list) or not texts or not source_language:
+        return JsonResponse({'error': 'texts (list) and source_language are required'}, status=400)
+
+    try:
+        results = await AsyncBhashiniClient().translate_batch(texts, source_language, target_language)
+        return JsonResponse({
+            'success': True,
+            'translations': [result['translated_text'] for result in results],
+            'source_language': source_language,
+            'target_language': target_language,
+        })
+    except Exception as e:
+        logger.error(f"Async batch translation failed: {e}")
+        return JsonResponse({'error': 'Translation failed', 'details': str(e)}, status=500)
@@ -0,0 +1,148 @@
+# apps/speech_processing/audio_metadata.py
+import io
+import os
+import struct
+import logging
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_ALAW = 0x0006
+WAVE_FORMAT_MULAW = 0x0007
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+FORMAT_NAMES = {
+    WAVE_FORMAT_PCM: 'pcm',
+    WAVE_FORMAT_IEEE_FLOAT: 'float',
+    WAVE_FORMAT_ALAW: 'alaw',
+    WAVE_FORMAT_MULAW: 'mulaw',
+}
+
+# Chunks (LIST, fact, ...) before "data" are skipped by seeking; stop after this many
+MAX_CHUNKS = 32
+
+
+def probe_wav(source) -> Optional[dict]:
+    """
+    Read sample rate, channels, bit depth and frame count from a RIFF/WAVE header.
+
+    Only the header chunks are read (chunks before "data" are seeked over),
+    so the cost does not depend on the recording length. Handles
+    WAVE_FORMAT_EXTENSIBLE, and "data" sizes left as 0 or 0xFFFFFFFF by
+    streaming recorders (the size is then taken from the file length).
+    Returns None if source is not a WAV file; file-like sources are rewound.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        handle, total_size = io.BytesIO(source), len(source)
+    elif isinstance(source, str):
+        handle, total_size = None, os.path.getsize(source)
+    else:
+        handle, total_size = source, getattr(source, 'size', None)
+
+    try:
+        if handle is None:
+            with open(source, 'rb') as wav_file:
+                return _parse_riff(wav_file, total_size)
+        handle.seek(0)
+        return _parse_riff(handle, total_size)
+    except (OSError, struct.error, ValueError) as e:
+        logger.info(f"Could not probe audio header: {e}")
+        return None
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+
+def _parse_riff(handle, total_size: Optional[int]) -> Optional[dict]:
+    header = handle.read(12)
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    position = 12
+    for _ in range(MAX_CHUNKS):
+        chunk_header = handle.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+        position += 8
+
+        if chunk_id == b'fmt ':
+            fmt = _parse_fmt(handle.read(chunk_size))
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            data_bytes = chunk_size
+            if total_size is not None and (chunk_size in (0, 0xFFFFFFFF) or position + chunk_size > total_size):
+                data_bytes = total_size - position
+            frames = data_bytes // fmt['block_align'] if fmt['block_align'] else 0
+            return {
+                'format': fmt['format'],
+                'sample_rate': fmt['sample_rate'],
+                'channels': fmt['channels'],
+                'bits_per_sample': fmt['bits_per_sample'],
+                'frames': frames,
+                'duration': round(frames / float(fmt['sample_rate']), 3) if fmt['sample_rate'] else 0.0,
+                'data_offset': position,
+                'data_bytes': data_bytes,
+                'block_align': fmt['block_align'],
+            }
+        else:
+            handle.seek(chunk_size, 1)
+
+        # Chunks are word-aligned
+        if chunk_size & 1:
+            handle.seek(1, 1)
+        position += chunk_size + (chunk_size & 1)
+
+    return None
+
+
+def _parse_fmt(chunk: bytes) -> dict:
+    if len(chunk) < 16:
+        raise ValueError("fmt chunk too short")
+
+    format_tag, channels, sample_rate, _, block_align, bits_per_sample = struct.unpack('<HHIIHH', chunk[:16])
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(chunk) >= 40:
+        # The first two bytes of the SubFormat GUID carry the actual format tag
+        format_tag = struct.unpack('<H', chunk[24:26])[0]
+
+    return {
+        'format': FORMAT_NAMES.get(format_tag, f'0x{format_tag:04x}'),
+        'channels': channels,
+        'sample_rate': sample_rate,
+        'block_align': block_align,
+        'bits_per_sample': bits_per_sample,
+    }
+
+
+def upload_limit_error(size: int, metadata: Optional[dict]) -> Optional[str]:
+    """
+    Reason an upload exceeds AUDIO_UPLOAD_MAX_BYTES / AUDIO_UPLOAD_MAX_SECONDS, or None.
+
+    The byte limit applies to what is sent to ASR: PCM WAVs are normalized
+    to 16 kHz mono first, so a 48 kHz stereo browser recording is judged by
+    its duration and normalized size, not its six times larger raw size.
+    Other uploads are sent as-is and judged by their raw size.
+    """
+    from .audio_processing import TARGET_SAMPLE_RATE
+
+    max_bytes = getattr(settings, 'AUDIO_UPLOAD_MAX_BYTES', 25 * 1024 * 1024)
+    max_seconds = getattr(settings, 'AUDIO_UPLOAD_MAX_SECONDS', 600)
+
+    if metadata and metadata['duration'] > max_seconds:
+        return f"Audio is {metadata['duration']:.1f} seconds long; the limit is {max_seconds} seconds"
+
+    if metadata and metadata.get('format') == 'pcm' and getattr(settings, 'BHASHINI_ASR_NORMALIZE_AUDIO', True):
+        normalized_size = int(metadata['duration'] * TARGET_SAMPLE_RATE * 2)
+        if normalized_size > max_bytes:
+            return f"Audio is {normalized_size} bytes once normalized; the limit is {max_bytes} bytes"
+        return None
+
+    if size is not None and size > max_bytes:
+        return f"Audio file is {size} bytes; the limit is {max_bytes} bytes"
+    return None
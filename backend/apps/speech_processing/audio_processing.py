@@ -0,0 +1,476 @@
+# apps/speech_processing/audio_processing.py
+import io
+import wave
+import struct
+import tempfile
+import logging
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_metadata import probe_wav
+from .streaming import AudioSection, source_size
+
+logger = logging.getLogger(__name__)
+
+# BHASHINI ASR models are trained on 16 kHz mono speech
+TARGET_SAMPLE_RATE = 16000
+# Speech kept on either side of trimmed leading/trailing silence
+TRIM_PADDING_MS = 200
+
+VAD_FRAME_MS = 30
+MIN_SILENCE_MS = 300
+# Frames quieter than the noise floor plus this margin count as silence
+SILENCE_MARGIN_DB = 10.0
+# ...but always at least this far below typical speech level, for recordings with few pauses
+SPEECH_MARGIN_DB = 15.0
+ABSOLUTE_SILENCE_DB = -50.0
+# Recordings are scanned this many VAD frames at a time, so memory does not grow with length
+BLOCK_VAD_FRAMES = 32
+# Normalized audio is kept in memory up to this size, then spilled to a temporary file
+NORMALIZED_SPOOL_BYTES = 2 * 1024 * 1024
+
+
+def read_wav(source) -> Tuple[np.ndarray, int]:
+    """
+    Decode a 16-bit PCM WAV into an int16 array of shape (frames, channels).
+
+    source may be bytes, a path or a file-like object; file-like sources are
+    rewound afterwards so they can still be streamed as-is.
+    """
+    handle = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        with wave.open(handle, 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                raise wave.Error(f"Unsupported sample width {wav.getsampwidth() * 8} bits")
+            channels = wav.getnchannels()
+            sample_rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+    samples = np.frombuffer(frames, dtype='<i2').reshape(-1, channels)
+    return samples, sample_rate
+
+
+def read_pcm(source) -> Tuple[np.ndarray, int, int]:
+    """
+    Decode an 8/16/24/32-bit PCM WAV into float32 samples in [-1, 1].
+
+    Returns (samples of shape (frames, channels), sample rate, sample width in bytes).
+    """
+    handle = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        with wave.open(handle, 'rb') as wav:
+            channels = wav.getnchannels()
+            sample_rate = wav.getframerate()
+            sample_width = wav.getsampwidth()
+            frames = wav.readframes(wav.getnframes())
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+    return decode_pcm(frames, sample_width, channels), sample_rate, sample_width
+
+
+def decode_pcm(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """Little-endian PCM frames as float32 samples in [-1, 1], shaped (frames, channels)"""
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        packed = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = ((packed ^ 0x800000) - 0x800000).astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        raise wave.Error(f"Unsupported sample width {sample_width * 8} bits")
+
+    return samples.reshape(-1, channels)
+
+
+@contextmanager
+def _open_audio(source):
+    """A readable, seekable handle on bytes, a path or a file-like source (rewound afterwards)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    elif isinstance(source, str):
+        with open(source, 'rb') as audio_file:
+            yield audio_file
+    else:
+        try:
+            yield source
+        finally:
+            source.seek(0)
+
+
+def iter_pcm_blocks(source, metadata: dict, block_frames: int, start_frame: int = 0,
+                    end_frame: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Decode frames [start_frame, end_frame) of a PCM WAV block_frames at a
+    time, as float32 arrays of shape (frames, channels).
+    """
+    block_align = metadata['block_align']
+    end_frame = metadata['frames'] if end_frame is None else min(end_frame, metadata['frames'])
+    with _open_audio(source) as handle:
+        handle.seek(metadata['data_offset'] + start_frame * block_align)
+        position = start_frame
+        while position < end_frame:
+            count = min(block_frames, end_frame - position)
+            raw = handle.read(count * block_align)
+            count = len(raw) // block_align
+            if not count:
+                break
+            yield decode_pcm(raw[:count * block_align], block_align // metadata['channels'], metadata['channels'])
+            position += count
+
+
+def wav_frame_energies(source, metadata: dict) -> np.ndarray:
+    """frame_energies_db of a PCM WAV's mono mix, decoded block by block"""
+    frame_length = max(1, int(metadata['sample_rate'] * VAD_FRAME_MS / 1000))
+    energies = [
+        frame_energies_db(block.mean(axis=1) * 32768.0, metadata['sample_rate'])
+        for block in iter_pcm_blocks(source, metadata, frame_length * BLOCK_VAD_FRAMES)
+    ]
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+
+def wav_header(channels: int, sample_rate: int, sample_width: int, frames: int) -> bytes:
+    """44-byte PCM WAV header for frames of the given format"""
+    data_bytes = frames * channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_bytes, b'WAVE', b'fmt ', 16, 1, channels, sample_rate,
+        sample_rate * channels * sample_width, channels * sample_width, sample_width * 8, b'data', data_bytes
+    )
+
+
+def wav_section(source, metadata: dict, start_frame: int, end_frame: int, lock=None) -> AudioSection:
+    """Frames [start_frame, end_frame) of a PCM WAV as a standalone WAV, streamed from source"""
+    block_align = metadata['block_align']
+    header = wav_header(
+        metadata['channels'], metadata['sample_rate'], block_align // metadata['channels'], end_frame - start_frame
+    )
+    return AudioSection(
+        source, metadata['data_offset'] + start_frame * block_align, (end_frame - start_frame) * block_align,
+        header=header, lock=lock
+    )
+
+
+def wav_duration(source) -> Optional[float]:
+    """Duration in seconds from the WAV header, or None if source is not a readable WAV"""
+    metadata = probe_wav(source)
+    return metadata['frames'] / float(metadata['sample_rate']) if metadata and metadata['sample_rate'] else None
+
+
+def wav_sample_rate(source) -> Optional[int]:
+    """Sample rate from the WAV header, or None if source is not a readable WAV"""
+    metadata = probe_wav(source)
+    return metadata['sample_rate'] if metadata else None
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode an int16 (frames, channels) array as a PCM WAV file"""
+    if samples.ndim == 1:
+        samples = samples.reshape(-1, 1)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(samples, dtype='<i2').tobytes())
+    return buffer.getvalue()
+
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    """Average all channels into a 1-D mono signal"""
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(signal: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample a mono float signal with a vectorized anti-aliased interpolator.
+
+    When downsampling, a Kaiser-windowed sinc low-pass removes content above
+    the new Nyquist frequency first; the filtered signal is then evaluated at
+    the target sample times with linear interpolation.
+    """
+    if source_rate == target_rate or signal.size == 0:
+        return signal.astype(np.float32)
+
+    resampler = StreamingResampler(source_rate, target_rate)
+    return np.concatenate([resampler.process(signal), resampler.flush()])
+
+
+class StreamingResampler:
+    """
+    resample() over a signal that arrives in blocks.
+
+    Keeps only the filter's context (a few dozen samples) between blocks, so
+    a recording of any length is resampled in constant memory; the
+    concatenated output equals resample() of the whole signal.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int):
+        self.ratio = source_rate / float(target_rate)
+        self.taps = None
+        self.half_width = 0
+        if target_rate < source_rate:
+            cutoff = 0.45 / self.ratio  # cycles per input sample, just under the new Nyquist
+            self.half_width = int(np.ceil(8 * self.ratio))
+            n = np.arange(-self.half_width, self.half_width + 1)
+            taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(len(n), 8.0)
+            self.taps = taps / taps.sum()
+
+        self.input_samples = 0
+        # Zeros stand in for the samples before the start, as in np.convolve(mode='same')
+        self._context = np.zeros(self.half_width)
+        self._filtered = np.zeros(0)
+        self._filtered_start = 0
+        self._next_output = 0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        self.input_samples += len(block)
+        return self._interpolate(self._filter(block), final=False)
+
+    def flush(self) -> np.ndarray:
+        """Output for the rest of the signal; the resampler cannot be reused afterwards"""
+        return self._interpolate(self._filter(np.zeros(self.half_width)), final=True)
+
+    def _filter(self, block: np.ndarray) -> np.ndarray:
+        if self.taps is None:
+            return block
+        buffered = np.concatenate([self._context, block])
+        if len(buffered) < len(self.taps):
+            self._context = buffered
+            return np.zeros(0)
+        self._context = buffered[len(buffered) - 2 * self.half_width:]
+        return np.convolve(buffered, self.taps, mode='valid')
+
+    def _interpolate(self, filtered: np.ndarray, final: bool) -> np.ndarray:
+        signal = np.concatenate([self._filtered, filtered])
+        last = self._filtered_start + len(signal) - 1
+        if final:
+            end = int(round(self.input_samples / self.ratio))
+        else:
+            # Both neighbours of every output position must have arrived
+            end = max(self._next_output, int(np.ceil(last / self.ratio)))
+
+        positions = np.arange(self._next_output, end) * self.ratio - self._filtered_start
+        if len(positions) and len(signal):
+            # Linear interpolation, holding the last sample past the end (as np.interp does)
+            positions = np.minimum(positions, len(signal) - 1)
+            left = positions.astype(np.int64)
+            right = np.minimum(left + 1, len(signal) - 1)
+            fraction = positions - left
+            output = signal[left] * (1 - fraction) + signal[right] * fraction
+        else:
+            output = np.zeros(len(positions))
+
+        self._next_output = end
+        keep_from = min(int(self._next_output * self.ratio), last + 1) - self._filtered_start
+        self._filtered = signal[max(0, keep_from):]
+        self._filtered_start += max(0, keep_from)
+        return output.astype(np.float32)
+
+
+def voiced_range(energies_db: np.ndarray, sample_rate: int, total: int,
+                 padding_ms: int = TRIM_PADDING_MS) -> Tuple[int, int]:
+    """(start, end) samples spanning the speech, with padding_ms of context; the whole signal if all silent"""
+    voiced = np.flatnonzero(~detect_silent_frames(energies_db))
+    if voiced.size == 0:
+        return 0, total
+
+    frame_length = max(1, int(sample_rate * VAD_FRAME_MS / 1000))
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, voiced[0] * frame_length - padding)
+    end = min(total, (voiced[-1] + 1) * frame_length + padding)
+    return start, end
+
+
+def trim_silence(signal: np.ndarray, sample_rate: int, padding_ms: int = TRIM_PADDING_MS) -> np.ndarray:
+    """Drop leading and trailing silence, keeping padding_ms of context around the speech"""
+    # frame_energies_db expects int16-scaled samples
+    start, end = voiced_range(frame_energies_db(signal * 32768.0, sample_rate), sample_rate, len(signal), padding_ms)
+    return signal[start:end]
+
+
+def to_int16(signal: np.ndarray) -> np.ndarray:
+    return np.clip(np.round(signal * 32767.0), -32768, 32767).astype(np.int16)
+
+
+def normalize_audio(source, target_rate: int = TARGET_SAMPLE_RATE, trim: bool = True) -> Optional[dict]:
+    """
+    Downmix, resample to target_rate and trim a PCM WAV recording for ASR.
+
+    Returns None when the source is not a readable PCM WAV, or is already
+    16-bit mono at target_rate (it is then streamed untouched). Otherwise
+    returns the normalized 16-bit mono WAV as a rewound temporary file
+    (spilled to disk past NORMALIZED_SPOOL_BYTES; the caller closes it)
+    with before/after sizes.
+
+    The recording is processed block by block: one pass measures frame
+    energies to find the speech, a second decodes, downmixes and resamples
+    only that range. Memory stays bounded by the block size, not the
+    recording length.
+    """
+    metadata = probe_wav(source)
+    if not metadata or metadata['format'] != 'pcm' or not metadata['sample_rate'] or not metadata['block_align']:
+        return None
+
+    channels, sample_rate = metadata['channels'], metadata['sample_rate']
+    sample_width = metadata['block_align'] // channels
+    if channels == 1 and sample_width == 2 and sample_rate == target_rate:
+        return None
+
+    block_frames = max(1, int(sample_rate * VAD_FRAME_MS / 1000)) * BLOCK_VAD_FRAMES
+    start, end = 0, metadata['frames']
+    try:
+        if trim:
+            start, end = voiced_range(wav_frame_energies(source, metadata), sample_rate, metadata['frames'])
+
+        resampler = StreamingResampler(sample_rate, target_rate)
+        output = tempfile.SpooledTemporaryFile(max_size=NORMALIZED_SPOOL_BYTES)
+        with wave.open(output, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(target_rate)
+            for block in iter_pcm_blocks(source, metadata, block_frames, start, end):
+                wav.writeframes(to_int16(resampler.process(downmix(block))).tobytes())
+            wav.writeframes(to_int16(resampler.flush()).tobytes())
+            normalized_frames = wav.getnframes()
+    except (wave.Error, OSError) as e:
+        logger.info(f"Not normalizing audio: {e}")
+        return None
+
+    normalized_bytes = output.tell()
+    output.seek(0)
+    original_bytes = source_size(source)
+    return {
+        'audio': output,
+        'sample_rate': target_rate,
+        'original_sample_rate': sample_rate,
+        'original_channels': channels,
+        'original_sample_width_bits': sample_width * 8,
+        'original_bytes': original_bytes,
+        'normalized_bytes': normalized_bytes,
+        'bytes_saved': original_bytes - normalized_bytes,
+        'trimmed_seconds': round((metadata['frames'] - (end - start)) / float(sample_rate), 3),
+        'normalized_seconds': round(normalized_frames / float(target_rate), 3),
+    }
+
+
+def frame_energies_db(samples: np.ndarray, sample_rate: int, frame_ms: int = VAD_FRAME_MS) -> np.ndarray:
+    """RMS energy in dBFS of consecutive non-overlapping frames (mono mix)"""
+    mono = samples.astype(np.float32).mean(axis=1) if samples.ndim == 2 else samples.astype(np.float32)
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(mono) // frame_length
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = mono[:frame_count * frame_length].reshape(frame_count, frame_length) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def silence_threshold_db(energies_db: np.ndarray) -> float:
+    """Energy below which a frame counts as silence, adapted to the recording's noise floor"""
+    if energies_db.size == 0:
+        return ABSOLUTE_SILENCE_DB
+
+    noise_floor = np.percentile(energies_db, 10)
+    speech_level = np.percentile(energies_db, 90)
+    threshold = min(noise_floor + SILENCE_MARGIN_DB, speech_level - SPEECH_MARGIN_DB)
+    return max(float(threshold), ABSOLUTE_SILENCE_DB)
+
+
+def detect_silent_frames(energies_db: np.ndarray) -> np.ndarray:
+    """Energy-based VAD: boolean mask of frames treated as silence"""
+    if energies_db.size == 0:
+        return np.zeros(0, dtype=bool)
+    return energies_db < silence_threshold_db(energies_db)
+
+
+def split_on_silence(samples: np.ndarray, sample_rate: int, max_segment_seconds: float,
+                     min_segment_seconds: float = 5.0) -> List[Tuple[int, int]]:
+    """
+    Split audio into (start, end) sample ranges no longer than max_segment_seconds.
+
+    Each cut is placed in the middle of the longest silence inside the allowed
+    window, so words are not split across segments; if the window has no
+    silence at least MIN_SILENCE_MS long, the cut falls back to the window end.
+    """
+    silent = detect_silent_frames(frame_energies_db(samples, sample_rate))
+    return split_on_silent_frames(silent, len(samples), sample_rate, max_segment_seconds, min_segment_seconds)
+
+
+def split_on_silent_frames(silent: np.ndarray, total: int, sample_rate: int, max_segment_seconds: float,
+                           min_segment_seconds: float = 5.0) -> List[Tuple[int, int]]:
+    """split_on_silence from a precomputed VAD mask of total samples"""
+    frame_length = max(1, int(sample_rate * VAD_FRAME_MS / 1000))
+    max_frames = max(1, int(max_segment_seconds * 1000 / VAD_FRAME_MS))
+    min_frames = min(max_frames, max(1, int(min_segment_seconds * 1000 / VAD_FRAME_MS)))
+    min_silence_frames = max(1, MIN_SILENCE_MS // VAD_FRAME_MS)
+    frame_count = len(silent)
+
+    segments = []
+    start_frame = 0
+    while (frame_count - start_frame) > max_frames:
+        window_start = start_frame + min_frames
+        window_end = start_frame + max_frames
+        cut = longest_silence_center(silent[window_start:window_end], min_silence_frames)
+        cut_frame = window_start + cut if cut is not None else window_end
+        segments.append((start_frame * frame_length, cut_frame * frame_length))
+        start_frame = cut_frame
+
+    segments.append((start_frame * frame_length, total))
+    return segments
+
+
+def segment_wav(source, max_segment_seconds: float) -> Optional[List[dict]]:
+    """
+    Plan cuts at silences for a WAV recording longer than max_segment_seconds.
+
+    Returns segment boundaries ({'start_frame', 'end_frame', 'start',
+    'duration'}), not audio: the recording is scanned block by block and
+    each segment is later streamed from the source with wav_section. Returns
+    None when the source is not a PCM WAV or already fits in one segment,
+    so callers can send it unchanged.
+    """
+    metadata = probe_wav(source)
+    if (not metadata or metadata['format'] != 'pcm' or not metadata['sample_rate']
+            or metadata['frames'] / float(metadata['sample_rate']) <= max_segment_seconds):
+        return None
+
+    try:
+        silent = detect_silent_frames(wav_frame_energies(source, metadata))
+    except (wave.Error, OSError) as e:
+        logger.info(f"Not segmenting audio: {e}")
+        return None
+
+    sample_rate = metadata['sample_rate']
+    return [
+        {'start_frame': start, 'end_frame': end, 'start': start / sample_rate, 'duration': (end - start) / sample_rate}
+        for start, end in split_on_silent_frames(silent, metadata['frames'], sample_rate, max_segment_seconds)
+        if end > start
+    ]
+
+
+def longest_silence_center(silent: np.ndarray, min_run: int) -> Optional[int]:
+    """Index of the middle of the longest run of True values, if it is at least min_run long"""
+    if silent.size == 0 or not silent.any():
+        return None
+
+    padded = np.concatenate(([False], silent, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[0::2], edges[1::2]
+    lengths = ends - starts
+    best = int(np.argmax(lengths))
+    if lengths[best] < min_run:
+        return None
+    return int((starts[best] + ends[best]) // 2)
@@ -1,5 +1,4 @@
 # apps/speech_processing/azure_openai_client.py (Enhanced)
-import openai
 from django.conf import settings
 import json
 import logging
@@ -7,40 +6,45 @@ from typing import Dict, List, Optional, Any
 import re
 from datetime import datetime
 
+from .openai_transport import create_chat_completion
+
 logger = logging.getLogger(__name__)
 
 class AzureOpenAIClient:
     def __init__(self):
-        openai.api_type = "azure"
-        openai.api_base = settings.AZURE_OPENAI_ENDPOINT
-        openai.api_version = settings.AZURE_OPENAI_API_VERSION
-        openai.api_key = settings.AZURE_OPENAI_API_KEY
         self.deployment_name = settings.AZURE_OPENAI_DEPLOYMENT_NAME
 
+    def _chat_completion(self, operation: str, system_prompt: str, prompt: str, **params) -> str:
+        """
+        Chat completion on the shared pooled client; operation selects the
+        timeout and response-cache TTL, use_cache=False bypasses the cache
+        """
+        return create_chat_completion(
+            self.deployment_name,
+            operation,
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            **params
+        )
+
     def analyze_speech_for_form_filling(self, transcribed_text: str, form_template: Dict) -> Dict:
         """Enhanced analysis for legal form filling with better context understanding"""
         try:
             # Prepare legal context prompt
             prompt = self._create_legal_analysis_prompt(transcribed_text, form_template)
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": self._get_legal_system_prompt()
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+            content = self._chat_completion(
+                'form_analysis',
+                self._get_legal_system_prompt(),
+                prompt,
                 max_tokens=1200,
                 temperature=0.2,
                 top_p=0.95
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             # Post-process and validate the result
             return self._post_process_analysis_result(result, transcribed_text)
@@ -49,7 +53,25 @@ class AzureOpenAIClient:
             logger.error(f"Azure OpenAI legal analysis failed: {e}")
             return self._get_fallback_analysis_result(transcribed_text)
 
-    def detect_case_type_advanced(self, transcribed_text: str, available_case_types: List[str]) -> Dict:
+    def analyze_text(self, prompt: str, operation: str = 'case_type', use_cache: bool = True) -> Optional[Dict]:
+        """Run a prompt that asks for a JSON answer; returns the parsed JSON, or None on failure"""
+        try:
+            content = self._chat_completion(
+                operation,
+                self._get_legal_system_prompt(),
+                prompt,
+                max_tokens=400,
+                temperature=0.1,
+                use_cache=use_cache
+            )
+            return json.loads(content)
+
+        except Exception as e:
+            logger.error(f"Azure OpenAI text analysis failed: {e}")
+            return None
+
+    def detect_case_type_advanced(self, transcribed_text: str, available_case_types: List[str],
+                                  use_cache: bool = True) -> Dict:
         """Advanced case type detection using GPT-4"""
         try:
             prompt = f"""
@@ -82,23 +104,16 @@ class AzureOpenAIClient:
             If no case type matches well, use "other" and explain in reasoning.
             """
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert legal advisor specializing in Indian law and legal procedures. You help citizens understand their legal issues and determine the appropriate legal remedies."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+            content = self._chat_completion(
+                'case_type',
+                "You are an expert legal advisor specializing in Indian law and legal procedures. You help citizens understand their legal issues and determine the appropriate legal remedies.",
+                prompt,
                 max_tokens=800,
-                temperature=0.3
+                temperature=0.3,
+                use_cache=use_cache
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             return self._validate_case_type_result(result, available_case_types)
 
         except Exception as e:
@@ -114,7 +129,7 @@ class AzureOpenAIClient:
                 "estimated_time": "Unknown"
             }
 
-    def generate_legal_questions(self, case_type: str, initial_context: str) -> List[Dict]:
+    def generate_legal_questions(self, case_type: str, initial_context: str, use_cache: bool = True) -> List[Dict]:
         """Generate contextual questions based on case type and initial input"""
         try:
             prompt = f"""
@@ -150,23 +165,16 @@ class AzureOpenAIClient:
             ]
             """
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a legal expert who creates comprehensive questionnaires for legal document preparation in India."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+            content = self._chat_completion(
+                'questions',
+                "You are a legal expert who creates comprehensive questionnaires for legal document preparation in India.",
+                prompt,
                 max_tokens=1500,
-                temperature=0.4
+                temperature=0.4,
+                use_cache=use_cache
             )
 
-            questions = json.loads(response.choices[0].message.content)
+            questions = json.loads(content)
             return self._validate_and_enhance_questions(questions, case_type)
 
         except Exception as e:
@@ -205,23 +213,15 @@ class AzureOpenAIClient:
             }}
             """
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a legal assistant who evaluates the quality and completeness of answers to legal questions."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+            content = self._chat_completion(
+                'answer_quality',
+                "You are a legal assistant who evaluates the quality and completeness of answers to legal questions.",
+                prompt,
                 max_tokens=600,
                 temperature=0.2
             )
 
-            return json.loads(response.choices[0].message.content)
+            return json.loads(content)
 
         except Exception as e:
             logger.error(f"Answer quality analysis failed: {e}")
@@ -238,7 +238,7 @@ class AzureOpenAIClient:
                 "confidence": 0.5
             }
 
-    def generate_document_review(self, document_data: Dict, case_type: str) -> Dict:
+    def generate_document_review(self, document_data: Dict, case_type: str, use_cache: bool = True) -> Dict:
         """Generate a comprehensive review of the generated document"""
         try:
             prompt = f"""
@@ -272,23 +272,16 @@ class AzureOpenAIClient:
             }}
             """
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a senior legal reviewer with expertise in Indian civil and criminal law, specializing in document review and legal compliance."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+            content = self._chat_completion(
+                'document_review',
+                "You are a senior legal reviewer with expertise in Indian civil and criminal law, specializing in document review and legal compliance.",
+                prompt,
                 max_tokens=1000,
-                temperature=0.3
+                temperature=0.3,
+                use_cache=use_cache
             )
 
-            return json.loads(response.choices[0].message.content)
+            return json.loads(content)
 
         except Exception as e:
             logger.error(f"Document review failed: {e}")
@@ -308,7 +301,8 @@ class AzureOpenAIClient:
                 "legal_precedents": []
             }
 
-    def translate_legal_content(self, content: str, source_lang: str, target_lang: str) -> Dict:
+    def translate_legal_content(self, content: str, source_lang: str, target_lang: str,
+                                use_cache: bool = True) -> Dict:
         """Translate legal content while preserving legal terminology"""
         try:
             prompt = f"""
@@ -329,23 +323,16 @@ class AzureOpenAIClient:
             }}
             """
             
-            response = openai.ChatCompletion.create(
-                engine=self.deployment_name,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a legal translator specializing in Indian legal documents and terminology."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+            response_content = self._chat_completion(
+                'translation',
+                "You are a legal translator specializing in Indian legal documents and terminology.",
+                prompt,
                 max_tokens=800,
-                temperature=0.2
+                temperature=0.2,
+                use_cache=use_cache
             )
 
-            return json.loads(response.choices[0].message.content)
+            return json.loads(response_content)
 
         except Exception as e:
             logger.error(f"Legal translation failed: {e}")
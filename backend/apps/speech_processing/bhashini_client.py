@@ -4,287 +4,700 @@ import json
 import base64
 from django.conf import settings
 import logging
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .audio_metadata import probe_wav
+from .audio_processing import TARGET_SAMPLE_RATE, normalize_audio, segment_wav, wav_sample_rate, wav_section
+from .pipeline_cache import pipeline_config_cache
+from .resilience import get_circuit_breaker, hedged_call, latency_tracker
+from .streaming import AUDIO_PLACEHOLDER, AudioSection, BufferMeter, StreamingAudioBody
+from .transcript_cache import transcript_cache
+from .translation_memo import translation_memo
+from .transport import get_bhashini_session, get_timeout
+from .tts_cache import tts_audio_cache
 
 logger = logging.getLogger(__name__)
 
-class BhashiniClient:
+
+class NoSpeechRecognized(Exception):
+    """BHASHINI ASR returned no transcript for the audio"""
+
+
+# Inference responses that mean the cached serviceId/callbackUrl can no longer be trusted
+CONFIG_INVALIDATING_STATUS_CODES = {401, 403, 404}
+
+# Only ASR requests are long enough for hedging to pay off
+HEDGED_TASK_TYPES = {'asr', 'asr+translation'}
+
+
+def pack_translation_batches(texts, max_chars, max_segments):
+    """Group text indices into consecutive batches within the character and segment limits"""
+    batches, current, current_chars = [], [], 0
+    for index, text in enumerate(texts):
+        if current and (current_chars + len(text) > max_chars or len(current) >= max_segments):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(index)
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class BaseBhashiniClient:
+    """Request building and response parsing shared by the sync and async clients"""
+
     def __init__(self):
         self.api_key = settings.BHASHINI_API_KEY
         self.user_id = settings.BHASHINI_USER_ID
         self.inference_api_key = settings.BHASHINI_INFERENCE_API_KEY
         self.base_url = settings.BHASHINI_BASE_URL
-        self.session = requests.Session()
+        self.pipeline_id = getattr(settings, 'BHASHINI_PIPELINE_ID', '64392f96daac500b55c543cd')
+        self.translation_batch_max_chars = getattr(settings, 'BHASHINI_TRANSLATION_BATCH_MAX_CHARS', 5000)
+        self.translation_batch_max_segments = getattr(settings, 'BHASHINI_TRANSLATION_BATCH_MAX_SEGMENTS', 25)
+        self.normalize_input_audio = getattr(settings, 'BHASHINI_ASR_NORMALIZE_AUDIO', True)
+        self.trim_silence = getattr(settings, 'BHASHINI_ASR_TRIM_SILENCE', True)
+        self.max_segment_seconds = getattr(settings, 'BHASHINI_ASR_MAX_SEGMENT_SECONDS', 30)
+        self.max_parallel_segments = getattr(settings, 'BHASHINI_ASR_MAX_PARALLEL_SEGMENTS', 4)
 
-    def get_auth_token(self):
-        """Get authentication token from BHASHINI"""
-        url = f"{self.base_url}/ulca/apis/v0/model/getModelsPipeline"
-        
-        payload = {
-            "pipelineTasks": [
-                {
-                    "taskType": "asr",
-                    "config": {
-                        "language": {
-                            "sourceLanguage": "hi"
-                        }
-                    }
+    @property
+    def config_url(self):
+        return f"{self.base_url}/ulca/apis/v0/model/getModelsPipeline"
+
+    def _config_payload(self, task_type, source_language, target_language=None):
+        # "asr+translation" asks for a chained pipeline; only the translation step has a target
+        pipeline_tasks = []
+        for task in task_type.split('+'):
+            language = {"sourceLanguage": source_language}
+            if target_language and task != 'asr':
+                language["targetLanguage"] = target_language
+            pipeline_tasks.append({
+                "taskType": task,
+                "config": {
+                    "language": language
                 }
-            ],
+            })
+
+        return {
+            "pipelineTasks": pipeline_tasks,
             "pipelineRequestConfig": {
-                "pipelineId": "64392f96daac500b55c543cd"
+                "pipelineId": self.pipeline_id
             }
         }
-        
-        headers = {
+
+    def _config_headers(self):
+        return {
             "userID": self.user_id,
             "ulcaApiKey": self.api_key,
             "Content-Type": "application/json"
         }
-        
+
+    def _inference_headers(self):
+        return {
+            "Content-Type": "application/json",
+            "Authorization": self.inference_api_key
+        }
+
+    def _prepare_audio(self, audio_data):
+        """Normalize WAV input for ASR; returns (audio, sampling rate, normalization stats or None)"""
+        normalized = None
+        if self.normalize_input_audio:
+            try:
+                normalized = normalize_audio(audio_data, TARGET_SAMPLE_RATE, self.trim_silence)
+            except Exception as e:
+                logger.warning(f"Audio normalization failed, sending original audio: {e}")
+
+        if normalized is None:
+            # Already 16 kHz mono, not a WAV, or not normalizable: declare what the header says
+            return audio_data, wav_sample_rate(audio_data) or TARGET_SAMPLE_RATE, None
+
+        stats = {key: value for key, value in normalized.items() if key != 'audio'}
+        logger.info(
+            f"Normalized audio {stats['original_sample_rate']} Hz x{stats['original_channels']} -> "
+            f"{stats['sample_rate']} Hz mono, saved {stats['bytes_saved']} bytes"
+        )
+        return normalized['audio'], normalized['sample_rate'], stats
+
+    def _prepare_recognition(self, audio_data):
+        """
+        Normalize a recording and plan its segments if it is long.
+
+        Returns (audio, sampling rate, normalization stats or None, segments);
+        segments is None for a recording sent whole, otherwise each segment's
+        'audio' is a section streamed from the recording itself. Reads the
+        whole recording, so async callers run it in a worker thread.
+        """
+        audio, sampling_rate, normalization = self._prepare_audio(audio_data)
         try:
-            response = self.session.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            logger.error(f"Failed to get auth token: {e}")
+            segments = segment_wav(audio, self.max_segment_seconds)
+            if segments:
+                # One lock serializes reads of a shared handle across the segments' bodies
+                metadata, lock = probe_wav(audio), threading.Lock()
+                for segment in segments:
+                    segment['audio'] = wav_section(audio, metadata, segment['start_frame'], segment['end_frame'], lock)
+        except Exception:
+            if normalization:
+                audio.close()
             raise
+        return audio, sampling_rate, normalization, segments
 
-    def speech_to_text(self, audio_data, source_language="hi"):
-        """Convert speech to text using BHASHINI ASR"""
-        try:
-            # Get model configuration
-            auth_response = self.get_auth_token()
-            
-            if not auth_response.get('pipelineResponseConfig'):
-                raise Exception("Failed to get pipeline configuration")
-
-            # Extract service details
-            pipeline_config = auth_response['pipelineResponseConfig'][0]
-            service_id = pipeline_config['config'][0]['serviceId']
-            inference_url = pipeline_config['config'][0]['inferenceEndPoint']['callbackUrl']
-            
-            # Prepare audio data
-            if isinstance(audio_data, bytes):
-                audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+    def _asr_payload_builder(self, audio_data, source_language, target_language, sampling_rate, meter, bodies):
+        """build_payload for one recording; every body it builds is appended to bodies"""
+        def build_payload(asr_service_id, translation_service_id=None):
+            if target_language:
+                payload = self._asr_translation_payload(
+                    asr_service_id, translation_service_id, source_language, target_language,
+                    AUDIO_PLACEHOLDER, sampling_rate
+                )
             else:
-                with open(audio_data, 'rb') as audio_file:
-                    audio_base64 = base64.b64encode(audio_file.read()).decode('utf-8')
+                payload = self._asr_payload(asr_service_id, source_language, AUDIO_PLACEHOLDER, sampling_rate)
+            bodies.append(StreamingAudioBody(payload, audio_data, meter=meter))
+            return bodies[-1]
 
-            # Prepare inference request
-            payload = {
-                "pipelineTasks": [
-                    {
-                        "taskType": "asr",
-                        "config": {
-                            "language": {
-                                "sourceLanguage": source_language
-                            },
-                            "serviceId": service_id,
-                            "audioFormat": "wav",
-                            "samplingRate": 16000
-                        }
-                    }
-                ],
-                "inputData": {
-                    "audio": [
-                        {
-                            "audioContent": audio_base64
-                        }
-                    ]
-                }
-            }
+        return build_payload
 
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": self.inference_api_key
-            }
+    def _parse_transcript(self, result, source_language, target_language=None):
+        """Parse an ASR result, memoizing the translation of a chained ASR→translation result"""
+        if not target_language:
+            return self._parse_asr_result(result, source_language)
 
-            # Make inference request
-            response = self.session.post(inference_url, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            if result.get('pipelineResponse') and result['pipelineResponse'][0].get('output'):
-                return {
-                    'text': result['pipelineResponse'][0]['output'][0]['source'],
-                    'confidence': result['pipelineResponse'][0]['output'][0].get('confidence', 0.0),
-                    'language': source_language
+        transcript = self._parse_asr_translation_result(result, source_language, target_language)
+        translation_memo.set(transcript['text'], source_language, target_language, {
+            'translated_text': transcript['translated_text'],
+            'source_language': source_language,
+            'target_language': target_language
+        })
+        return transcript
+
+    def _cached_transcript(self, audio_hash, source_language, target_language=None):
+        """Transcript of a recording (by sha256) transcribed before, e.g. a retried upload"""
+        if not audio_hash:
+            return None
+        cached = transcript_cache.get(audio_hash, source_language, target_language)
+        if cached:
+            logger.info(f"Serving cached transcript for audio {audio_hash[:12]}")
+        return cached
+
+    def _cache_transcript(self, audio_hash, source_language, result, target_language=None):
+        if audio_hash:
+            transcript_cache.set(audio_hash, source_language, result, target_language)
+
+    def _stitch_segments(self, segments, results, source_language):
+        """Join per-segment transcripts (None where nothing was recognized) in order"""
+        recognized = [
+            (segment, result) for segment, result in zip(segments, results)
+            if result and result['text'].strip()
+        ]
+        if not recognized:
+            raise NoSpeechRecognized("No speech recognized")
+
+        # Weight each segment's confidence by how much of the audio it covers
+        total_duration = sum(segment['duration'] for segment, _ in recognized)
+        confidence = sum(
+            result['confidence'] * segment['duration'] for segment, result in recognized
+        ) / total_duration
+
+        stitched = {
+            'text': ' '.join(result['text'].strip() for _, result in recognized),
+            'confidence': round(confidence, 4),
+            'language': source_language,
+            'segments': [
+                {
+                    'start': round(segment['start'], 3),
+                    'duration': round(segment['duration'], 3),
+                    'text': result['text'] if result else '',
+                    'confidence': result['confidence'] if result else 0.0,
                 }
-            else:
-                raise Exception("No speech recognized")
-                
-        except Exception as e:
-            logger.error(f"Speech to text conversion failed: {e}")
-            raise
+                for segment, result in zip(segments, results)
+            ],
+            'payload_stats': {
+                'segments': len(segments),
+                'audio_bytes': sum(result['payload_stats']['audio_bytes'] for _, result in recognized),
+                'peak_buffer_bytes': max(result['payload_stats']['peak_buffer_bytes'] for _, result in recognized),
+            },
+        }
+        if 'translated_text' in recognized[0][1]:
+            stitched['translated_text'] = ' '.join(result['translated_text'].strip() for _, result in recognized)
+            stitched['target_language'] = recognized[0][1]['target_language']
+        return stitched
 
-    def text_to_speech(self, text, target_language="hi"):
-        """Convert text to speech using BHASHINI TTS"""
-        try:
-            # Get TTS model configuration
-            url = f"{self.base_url}/ulca/apis/v0/model/getModelsPipeline"
-            
-            payload = {
-                "pipelineTasks": [
-                    {
-                        "taskType": "tts",
-                        "config": {
-                            "language": {
-                                "sourceLanguage": target_language
-                            }
-                        }
+    @staticmethod
+    def _record_outcome(breaker, task_type, status_code, elapsed, slow_after):
+        """Feed one completed inference call to the latency tracker and circuit breaker"""
+        latency_tracker.record(task_type, elapsed)
+        breaker.record(success=status_code < 500 and status_code != 429, slow=elapsed > slow_after)
+
+    def _config_cache_key(self, task_type, source_language, target_language=None):
+        return pipeline_config_cache.make_key(task_type, source_language, target_language, self.pipeline_id)
+
+    def _parse_pipeline_config(self, auth_response):
+        if not auth_response.get('pipelineResponseConfig'):
+            raise Exception("Failed to get pipeline configuration")
+
+        # Extract service details (one entry per pipeline task)
+        pipeline_config = auth_response['pipelineResponseConfig'][0]
+        return {
+            'service_id': pipeline_config['config'][0]['serviceId'],
+            'service_ids': [task['config'][0]['serviceId'] for task in auth_response['pipelineResponseConfig']],
+            'callback_url': pipeline_config['config'][0]['inferenceEndPoint']['callbackUrl']
+        }
+
+    @staticmethod
+    def _should_invalidate_config(status_code):
+        # Stale service ids and revoked keys surface as auth/service errors
+        return status_code in CONFIG_INVALIDATING_STATUS_CODES or status_code >= 500
+
+    def _asr_payload(self, service_id, source_language, audio_base64, sampling_rate=TARGET_SAMPLE_RATE):
+        return {
+            "pipelineTasks": [
+                {
+                    "taskType": "asr",
+                    "config": {
+                        "language": {
+                            "sourceLanguage": source_language
+                        },
+                        "serviceId": service_id,
+                        "audioFormat": "wav",
+                        "samplingRate": sampling_rate
                     }
-                ],
-                "pipelineRequestConfig": {
-                    "pipelineId": "64392f96daac500b55c543cd"
                 }
-            }
-            
-            headers = {
-                "userID": self.user_id,
-                "ulcaApiKey": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
-            response = self.session.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            auth_response = response.json()
-            
-            # Extract TTS service details
-            pipeline_config = auth_response['pipelineResponseConfig'][0]
-            service_id = pipeline_config['config'][0]['serviceId']
-            inference_url = pipeline_config['config'][0]['inferenceEndPoint']['callbackUrl']
-            
-            # Prepare TTS request
-            tts_payload = {
-                "pipelineTasks": [
+            ],
+            "inputData": {
+                "audio": [
                     {
-                        "taskType": "tts",
-                        "config": {
-                            "language": {
-                                "sourceLanguage": target_language
-                            },
-                            "serviceId": service_id,
-                            "gender": "female",
-                            "samplingRate": 22050
-                        }
+                        "audioContent": audio_base64
                     }
-                ],
-                "inputData": {
-                    "input": [
-                        {
-                            "source": text
-                        }
-                    ]
-                }
+                ]
             }
+        }
 
-            tts_headers = {
-                "Content-Type": "application/json",
-                "Authorization": self.inference_api_key
+    def _asr_translation_payload(self, asr_service_id, translation_service_id, source_language,
+                                 target_language, audio_base64, sampling_rate=TARGET_SAMPLE_RATE):
+        payload = self._asr_payload(asr_service_id, source_language, audio_base64, sampling_rate)
+        payload["pipelineTasks"].append({
+            "taskType": "translation",
+            "config": {
+                "language": {
+                    "sourceLanguage": source_language,
+                    "targetLanguage": target_language
+                },
+                "serviceId": translation_service_id
             }
+        })
+        return payload
 
-            # Make TTS request
-            tts_response = self.session.post(inference_url, json=tts_payload, headers=tts_headers)
-            tts_response.raise_for_status()
-            
-            result = tts_response.json()
-            
-            if result.get('pipelineResponse') and result['pipelineResponse'][0].get('audio'):
-                audio_content = result['pipelineResponse'][0]['audio'][0]['audioContent']
-                return base64.b64decode(audio_content)
-            else:
-                raise Exception("Text to speech conversion failed")
-                
-        except Exception as e:
-            logger.error(f"Text to speech conversion failed: {e}")
-            raise
-
-    def translate_text(self, text, source_language, target_language):
-        """Translate text between languages using BHASHINI"""
-        try:
-            # Get translation model configuration
-            url = f"{self.base_url}/ulca/apis/v0/model/getModelsPipeline"
-            
-            payload = {
-                "pipelineTasks": [
-                    {
-                        "taskType": "translation",
-                        "config": {
-                            "language": {
-                                "sourceLanguage": source_language,
-                                "targetLanguage": target_language
-                            }
-                        }
+    def _tts_payload(self, service_id, text, target_language, gender="female", sampling_rate=22050):
+        return {
+            "pipelineTasks": [
+                {
+                    "taskType": "tts",
+                    "config": {
+                        "language": {
+                            "sourceLanguage": target_language
+                        },
+                        "serviceId": service_id,
+                        "gender": gender,
+                        "samplingRate": sampling_rate
                     }
-                ],
-                "pipelineRequestConfig": {
-                    "pipelineId": "64392f96daac500b55c543cd"
                 }
-            }
-            
-            headers = {
-                "userID": self.user_id,
-                "ulcaApiKey": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
-            response = self.session.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            auth_response = response.json()
-            
-            # Extract translation service details
-            pipeline_config = auth_response['pipelineResponseConfig'][0]
-            service_id = pipeline_config['config'][0]['serviceId']
-            inference_url = pipeline_config['config'][0]['inferenceEndPoint']['callbackUrl']
-            
-            # Prepare translation request
-            translation_payload = {
-                "pipelineTasks": [
+            ],
+            "inputData": {
+                "input": [
                     {
-                        "taskType": "translation",
-                        "config": {
-                            "language": {
-                                "sourceLanguage": source_language,
-                                "targetLanguage": target_language
-                            },
-                            "serviceId": service_id
-                        }
+                        "source": text
+                    }
+                ]
+            }
+        }
+
+    def _translation_payload(self, service_id, text, source_language, target_language):
+        # A list of texts is sent as several inputData.input segments in one request
+        texts = text if isinstance(text, list) else [text]
+        return {
+            "pipelineTasks": [
+                {
+                    "taskType": "translation",
+                    "config": {
+                        "language": {
+                            "sourceLanguage": source_language,
+                            "targetLanguage": target_language
+                        },
+                        "serviceId": service_id
                     }
-                ],
-                "inputData": {
-                    "input": [
-                        {
-                            "source": text
-                        }
-                    ]
                 }
+            ],
+            "inputData": {
+                "input": [
+                    {
+                        "source": segment
+                    }
+                    for segment in texts
+                ]
+            }
+        }
+
+    def _parse_asr_result(self, result, source_language):
+        if result.get('pipelineResponse') and result['pipelineResponse'][0].get('output'):
+            return {
+                'text': result['pipelineResponse'][0]['output'][0]['source'],
+                'confidence': result['pipelineResponse'][0]['output'][0].get('confidence', 0.0),
+                'language': source_language
             }
+        raise NoSpeechRecognized("No speech recognized")
+
+    def _parse_asr_translation_result(self, result, source_language, target_language):
+        transcript = self._parse_asr_result(result, source_language)
+        responses = result['pipelineResponse']
+        if len(responses) < 2 or not responses[1].get('output'):
+            raise Exception("Translation of transcript failed")
+
+        transcript['translated_text'] = responses[1]['output'][0]['target']
+        transcript['target_language'] = target_language
+        return transcript
 
-            translation_headers = {
-                "Content-Type": "application/json",
-                "Authorization": self.inference_api_key
+    def _parse_tts_result(self, result):
+        if result.get('pipelineResponse') and result['pipelineResponse'][0].get('audio'):
+            audio_content = result['pipelineResponse'][0]['audio'][0]['audioContent']
+            return base64.b64decode(audio_content)
+        raise Exception("Text to speech conversion failed")
+
+    def _parse_translation_result(self, result, source_language, target_language):
+        if result.get('pipelineResponse') and result['pipelineResponse'][0].get('output'):
+            return {
+                'translated_text': result['pipelineResponse'][0]['output'][0]['target'],
+                'source_language': source_language,
+                'target_language': target_language
             }
+        raise Exception("Translation failed")
 
-            # Make translation request
-            translation_response = self.session.post(
-                inference_url, 
-                json=translation_payload, 
-                headers=translation_headers
+    def _parse_batch_translation_result(self, result, expected_count):
+        outputs = result.get('pipelineResponse') and result['pipelineResponse'][0].get('output')
+        if not outputs or len(outputs) != expected_count:
+            raise Exception(
+                f"Batch translation failed: expected {expected_count} outputs, got {len(outputs or [])}"
             )
-            translation_response.raise_for_status()
-            
-            result = translation_response.json()
-            
-            if result.get('pipelineResponse') and result['pipelineResponse'][0].get('output'):
-                return {
-                    'translated_text': result['pipelineResponse'][0]['output'][0]['target'],
+        return [output['target'] for output in outputs]
+
+    def _plan_translation_batch(self, texts, source_language, target_language):
+        """
+        Resolve what the memo already knows and group the rest into requests.
+
+        Returns (results, pending, batches): results has an entry per text
+        (None where a translation is still needed), pending maps each distinct
+        untranslated text to the result positions it fills, and batches lists
+        indices into pending's texts that fit in one request each.
+        """
+        results = [None] * len(texts)
+        pending = {}
+        for index, text in enumerate(texts):
+            if not text or not text.strip():
+                results[index] = {
+                    'translated_text': text or '',
                     'source_language': source_language,
                     'target_language': target_language
                 }
+                continue
+
+            memoized = translation_memo.get(text, source_language, target_language)
+            if memoized is not None:
+                results[index] = dict(memoized)
             else:
-                raise Exception("Translation failed")
-                
+                pending.setdefault(text, []).append(index)
+
+        batches = pack_translation_batches(
+            list(pending), self.translation_batch_max_chars, self.translation_batch_max_segments
+        )
+        return results, pending, batches
+
+    def _fill_translation_batch(self, results, pending, batch, translated_texts, source_language, target_language):
+        texts = list(pending)
+        for position, translated_text in zip(batch, translated_texts):
+            translation = {
+                'translated_text': translated_text,
+                'source_language': source_language,
+                'target_language': target_language
+            }
+            translation_memo.set(texts[position], source_language, target_language, translation)
+            for index in pending[texts[position]]:
+                results[index] = dict(translation)
+
+
+class BhashiniClient(BaseBhashiniClient):
+    def __init__(self):
+        super().__init__()
+        self.session = get_bhashini_session()
+        self.hedge_asr = getattr(settings, 'BHASHINI_ASR_HEDGING_ENABLED', False)
+        self.hedge_percentile = getattr(settings, 'BHASHINI_ASR_HEDGE_PERCENTILE', 95)
+
+    def get_auth_token(self, task_type="asr", source_language="hi", target_language=None):
+        """Get pipeline configuration (serviceId and inference endpoint) from BHASHINI"""
+        payload = self._config_payload(task_type, source_language, target_language)
+
+        try:
+            response = self.session.post(
+                self.config_url,
+                json=payload,
+                headers=self._config_headers(),
+                timeout=get_timeout('config')
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            logger.error(f"Failed to get auth token: {e}")
+            raise
+
+    def speech_to_text(self, audio_data, source_language="hi", audio_hash=None):
+        """
+        Convert speech to text using BHASHINI ASR.
+
+        audio_data may be bytes, a file path or an uploaded file; the audio is
+        base64-encoded into the request body as it is sent rather than being
+        buffered in full. WAV input that is not already 16 kHz mono is
+        downmixed, resampled and trimmed first. WAV recordings longer than
+        BHASHINI_ASR_MAX_SEGMENT_SECONDS are cut at silences and the segments
+        are transcribed concurrently. With audio_hash (sha256 of the upload)
+        the result is stored in and answered from the transcript cache.
+        """
+        try:
+            cached = self._cached_transcript(audio_hash, source_language)
+            if cached:
+                return cached
+
+            result = self._recognize(audio_data, source_language)
+            self._cache_transcript(audio_hash, source_language, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"Speech to text conversion failed: {e}")
+            raise
+
+    def speech_to_english(self, audio_data, source_language="hi", target_language="en", audio_hash=None):
+        """
+        Transcribe and translate speech in one chained ASR→translation pipeline call.
+
+        Returns the speech_to_text result plus 'translated_text', saving the
+        separate config lookup and inference round-trip of translate_text.
+        """
+        try:
+            if source_language == target_language:
+                result = self.speech_to_text(audio_data, source_language, audio_hash)
+                result['translated_text'] = result['text']
+                result['target_language'] = target_language
+                return result
+
+            cached = self._cached_transcript(audio_hash, source_language, target_language)
+            if cached:
+                return cached
+
+            result = self._recognize(audio_data, source_language, target_language)
+            self._cache_transcript(audio_hash, source_language, result, target_language)
+            return result
+
+        except Exception as e:
+            logger.error(f"Speech to English conversion failed: {e}")
+            raise
+
+    def text_to_speech(self, text, target_language="hi", gender="female", sampling_rate=22050):
+        """Convert text to speech using BHASHINI TTS"""
+        try:
+            result = self._run_inference(
+                "tts", target_language, None,
+                lambda service_id: self._tts_payload(service_id, text, target_language, gender, sampling_rate)
+            )
+            return self._parse_tts_result(result)
+
+        except Exception as e:
+            logger.error(f"Text to speech conversion failed: {e}")
+            raise
+
+    def text_to_speech_cached(self, text, target_language="hi", gender="female", sampling_rate=22050):
+        """
+        Synthesize text through the shared TTS audio cache.
+
+        Returns {'audio_url', 'path', 'size', 'cached'}; BHASHINI is only
+        called when this exact prompt has not been synthesized before.
+        """
+        return tts_audio_cache.get_or_synthesize(
+            text, target_language, gender, sampling_rate,
+            lambda: self.text_to_speech(text, target_language, gender, sampling_rate)
+        )
+
+    def translate_text(self, text, source_language, target_language):
+        """Translate text between languages using BHASHINI, memoizing the result"""
+        try:
+            memoized = translation_memo.get(text, source_language, target_language)
+            if memoized is not None:
+                return dict(memoized)
+
+            result = self._run_inference(
+                "translation", source_language, target_language,
+                lambda service_id: self._translation_payload(service_id, text, source_language, target_language)
+            )
+            translation = self._parse_translation_result(result, source_language, target_language)
+            translation_memo.set(text, source_language, target_language, translation)
+            return translation
+
         except Exception as e:
             logger.error(f"Translation failed: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def translate_batch(self, texts, source_language, target_language):
+        """
+        Translate many texts, packing several segments into each BHASHINI request.
+
+        Results come back in input order with the same shape as translate_text.
+        Memoized and duplicate texts are not sent; the rest are split into
+        requests of at most BHASHINI_TRANSLATION_BATCH_MAX_CHARS characters and
+        BHASHINI_TRANSLATION_BATCH_MAX_SEGMENTS segments.
+        """
+        try:
+            results, pending, batches = self._plan_translation_batch(texts, source_language, target_language)
+            pending_texts = list(pending)
+
+            for batch in batches:
+                batch_texts = [pending_texts[position] for position in batch]
+                result = self._run_inference(
+                    "translation", source_language, target_language,
+                    lambda service_id: self._translation_payload(service_id, batch_texts, source_language, target_language)
+                )
+                self._fill_translation_batch(
+                    results, pending, batch,
+                    self._parse_batch_translation_result(result, len(batch_texts)),
+                    source_language, target_language
+                )
+            return results
+
+        except Exception as e:
+            logger.error(f"Batch translation failed: {e}")
+            raise
+
+    def _recognize(self, audio_data, source_language, target_language=None):
+        """Normalize, segment if long, and transcribe (optionally chained with translation)"""
+        audio, sampling_rate, normalization, segments = self._prepare_recognition(audio_data)
+        # Shared by every request body of this recording, so the stats show the combined peak
+        meter = BufferMeter()
+
+        def transcribe(audio, language):
+            return self._transcribe(audio, language, target_language, sampling_rate, meter)
+
+        try:
+            if segments:
+                result = self._speech_to_text_segmented(segments, source_language, transcribe)
+                result['payload_stats']['peak_buffer_bytes'] = meter.peak
+            else:
+                result = transcribe(audio, source_language)
+        finally:
+            if normalization:
+                # The normalized recording is a temporary file
+                audio.close()
+
+        if normalization:
+            result['payload_stats']['normalization'] = normalization
+        return result
+
+    def _transcribe(self, audio_data, source_language, target_language=None, sampling_rate=TARGET_SAMPLE_RATE,
+                    meter=None):
+        """Run ASR on one recording, chained with translation when target_language is given"""
+        # A hedged request builds a second body; stats describe the first attempt
+        bodies = []
+        build_payload = self._asr_payload_builder(
+            audio_data, source_language, target_language, sampling_rate, meter, bodies
+        )
+        task_type = "asr+translation" if target_language else "asr"
+        result = self._run_inference(task_type, source_language, target_language, build_payload)
+        transcript = self._parse_transcript(result, source_language, target_language)
+        transcript['payload_stats'] = bodies[0].stats()
+        return transcript
+
+    def _speech_to_text_segmented(self, segments, source_language, transcribe=None):
+        """Transcribe segments in parallel and stitch them back together in order"""
+        transcribe = transcribe or self._transcribe
+
+        def transcribe_segment(segment):
+            try:
+                return transcribe(segment['audio'], source_language)
+            except NoSpeechRecognized:
+                # A segment of pure silence or noise should not fail the recording
+                return None
+
+        workers = max(1, min(self.max_parallel_segments, len(segments)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bhashini-asr') as executor:
+            results = list(executor.map(transcribe_segment, segments))
+        return self._stitch_segments(segments, results, source_language)
+
+    def _get_pipeline_config(self, task_type, source_language, target_language=None):
+        """Return the cached serviceId/callbackUrl for a task, fetching it on a miss"""
+        cache_key = self._config_cache_key(task_type, source_language, target_language)
+        config = pipeline_config_cache.get(
+            cache_key,
+            lambda: self._parse_pipeline_config(
+                self.get_auth_token(task_type, source_language, target_language)
+            )
+        )
+        return cache_key, config
+
+    def _hedge_delay(self, task_type, payload):
+        """
+        Seconds after which to re-send an ASR request, or None to not hedge.
+
+        Only payloads that can be built twice independently are hedged: dicts
+        and streaming bodies over in-memory audio or sections of a source,
+        which read at their own offsets (a bare file handle cannot be read by
+        two requests at once).
+        """
+        if not self.hedge_asr or task_type not in HEDGED_TASK_TYPES:
+            return None
+        if isinstance(payload, StreamingAudioBody) and not isinstance(
+            payload.audio, (bytes, bytearray, memoryview, AudioSection)
+        ):
+            return None
+        return latency_tracker.percentile(task_type, self.hedge_percentile)
+
+    def _run_inference(self, task_type, source_language, target_language, build_payload):
+        """POST an inference payload to the task's callback URL and return the JSON response"""
+        cache_key, config = self._get_pipeline_config(task_type, source_language, target_language)
+
+        service_ids = config.get('service_ids', [config['service_id']])
+        breaker = get_circuit_breaker(config['callback_url'])
+        # Fails fast with CircuitOpenError while the endpoint is known to be down
+        breaker.before_call()
+
+        timeout = get_timeout(task_type)
+        slow_after = timeout[1] * breaker.config['slow_call_fraction']
+
+        def send(payload):
+            # Streaming bodies are already serialized JSON; dict payloads are encoded by requests
+            body = {'json': payload} if isinstance(payload, dict) else {'data': payload}
+            started = time.monotonic()
+            try:
+                response = self.session.post(
+                    config['callback_url'],
+                    headers=self._inference_headers(),
+                    timeout=timeout,
+                    **body
+                )
+            except requests.RequestException:
+                breaker.record(success=False)
+                raise
+
+            self._record_outcome(breaker, task_type, response.status_code, time.monotonic() - started, slow_after)
+            return response
+
+        # Chained pipelines get one serviceId per task
+        payload = build_payload(*service_ids)
+        hedge_delay = self._hedge_delay(task_type, payload)
+        if hedge_delay is not None:
+            response = hedged_call(lambda: send(payload), lambda: send(build_payload(*service_ids)), hedge_delay)
+        else:
+            response = send(payload)
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            if self._should_invalidate_config(response.status_code):
+                pipeline_config_cache.invalidate(cache_key)
+            raise
+
+        return response.json()
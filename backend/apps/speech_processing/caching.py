@@ -0,0 +1,123 @@
+# apps/speech_processing/caching.py
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """Thread-safe in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout: Optional[float] = None):
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    In-process LRU in front of the shared Django cache (Redis in production).
+
+    Reads check the local tier first and fall back to the shared tier, promoting
+    shared hits into the local tier. Failures of the shared cache are logged and
+    treated as misses so a Redis outage never breaks the request path.
+    """
+
+    def __init__(self, namespace: str, timeout: int, max_local_entries: int = 1024,
+                 local_timeout: Optional[int] = None):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.local_timeout = local_timeout or timeout
+        self.local = LocalTTLCache(max_local_entries)
+        self._stats_lock = threading.Lock()
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    def shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._record('local_hits')
+            return value
+
+        try:
+            value = cache.get(self.shared_key(key), _MISSING)
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {self.namespace}: {e}")
+            value = _MISSING
+
+        if value is not _MISSING:
+            self.local.set(key, value, self.local_timeout)
+            self._record('shared_hits')
+            return value
+
+        self._record('misses')
+        return default
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None):
+        timeout = timeout or self.timeout
+        self.local.set(key, value, min(timeout, self.local_timeout))
+        try:
+            cache.set(self.shared_key(key), value, timeout)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {self.namespace}: {e}")
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        try:
+            cache.delete(self.shared_key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {self.namespace}: {e}")
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 4) if lookups else 0.0
+        stats['local_entries'] = len(self.local)
+        return stats
+
+    def _record(self, counter: str):
+        with self._stats_lock:
+            self.stats[counter] += 1
@@ -0,0 +1,127 @@
+# apps/speech_processing/language_id.py
+import time
+import bisect
+import threading
+from typing import Dict, Optional
+
+from django.conf import settings
+
+# (first code point, last code point, script); sorted by first code point
+SCRIPT_RANGES = [
+    (0x0041, 0x005A, 'latin'),
+    (0x0061, 0x007A, 'latin'),
+    (0x00C0, 0x024F, 'latin'),
+    (0x0600, 0x06FF, 'arabic'),
+    (0x0750, 0x077F, 'arabic'),
+    (0x0900, 0x097F, 'devanagari'),
+    (0x0980, 0x09FF, 'bengali'),
+    (0x0A00, 0x0A7F, 'gurmukhi'),
+    (0x0A80, 0x0AFF, 'gujarati'),
+    (0x0B00, 0x0B7F, 'oriya'),
+    (0x0B80, 0x0BFF, 'tamil'),
+    (0x0C00, 0x0C7F, 'telugu'),
+    (0x0C80, 0x0CFF, 'kannada'),
+    (0x0D00, 0x0D7F, 'malayalam'),
+    (0xFB50, 0xFDFF, 'arabic'),
+    (0xFE70, 0xFEFF, 'arabic'),
+]
+_RANGE_STARTS = [start for start, _, _ in SCRIPT_RANGES]
+
+# Languages written in each script; the first is assumed when the requested one is not among them
+SCRIPT_LANGUAGES = {
+    'latin': ('en',),
+    'arabic': ('ur',),
+    'devanagari': ('hi', 'mr'),
+    'bengali': ('bn',),
+    'gurmukhi': ('pa',),
+    'gujarati': ('gu',),
+    'oriya': ('or',),
+    'tamil': ('ta',),
+    'telugu': ('te',),
+    'kannada': ('kn',),
+    'malayalam': ('ml',),
+}
+
+
+def script_of(char: str) -> Optional[str]:
+    code = ord(char)
+    index = bisect.bisect_right(_RANGE_STARTS, code) - 1
+    if index >= 0 and code <= SCRIPT_RANGES[index][1]:
+        return SCRIPT_RANGES[index][2]
+    return None
+
+
+def identify_language(text: str, requested_language: Optional[str] = None) -> Dict:
+    """
+    Identify the language of a transcript from the Unicode script it is written in.
+
+    confidence is the share of script characters in the dominant script.
+    Scripts shared by several languages (Devanagari for Hindi and Marathi)
+    resolve to requested_language when it uses that script. mismatch is set
+    when the text is confidently in a different language than requested.
+    """
+    started = time.perf_counter()
+    counts: Dict[str, int] = {}
+    for char in text or '':
+        script = script_of(char)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+
+    total = sum(counts.values())
+    language = script = None
+    confidence = 0.0
+    if total:
+        script = max(counts, key=counts.get)
+        confidence = round(counts[script] / float(total), 4)
+        candidates = SCRIPT_LANGUAGES[script]
+        language = requested_language if requested_language in candidates else candidates[0]
+
+    min_confidence = getattr(settings, 'LANGUAGE_ID_MIN_CONFIDENCE', 0.8)
+    result = {
+        'language': language,
+        'script': script,
+        'confidence': confidence,
+        'requested_language': requested_language,
+        'mismatch': bool(language and requested_language and language != requested_language
+                         and confidence >= min_confidence),
+        'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+    }
+    language_id_stats.record_check(result)
+    return result
+
+
+class LanguageIdStats:
+    """
+    Process-local counters for the monitoring endpoint.
+
+    A re-route is confirmed when the transcript obtained in the identified
+    language is itself identified as that language, which gives a running
+    estimate of how often the identification was right.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {'checks': 0, 'mismatches': 0, 'reroutes': 0, 'reroutes_confirmed': 0, 'total_latency_ms': 0.0}
+
+    def record_check(self, result: Dict):
+        with self._lock:
+            self.stats['checks'] += 1
+            self.stats['mismatches'] += int(result['mismatch'])
+            self.stats['total_latency_ms'] += result['latency_ms']
+
+    def record_reroute(self, confirmed: bool):
+        with self._lock:
+            self.stats['reroutes'] += 1
+            self.stats['reroutes_confirmed'] += int(confirmed)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['avg_latency_ms'] = round(stats.pop('total_latency_ms') / stats['checks'], 4) if stats['checks'] else 0.0
+        stats['reroute_accuracy'] = (
+            round(stats['reroutes_confirmed'] / stats['reroutes'], 4) if stats['reroutes'] else None
+        )
+        return stats
+
+
+language_id_stats = LanguageIdStats()
@@ -0,0 +1,79 @@
+# apps/speech_processing/llm_cache.py
+import json
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .caching import TwoTierCache
+
+# Seconds to keep responses per operation; operations not listed are never cached
+DEFAULT_LLM_CACHE_TTLS = {
+    'case_type': 24 * 3600,
+    'questions': 7 * 24 * 3600,
+    'translation': 30 * 24 * 3600,
+    'document_review': 3600,
+}
+
+
+class LLMResponseCache:
+    """
+    Azure OpenAI chat completions keyed by a hash of (deployment, messages,
+    sampling parameters).
+
+    Low-temperature calls with byte-identical prompts (same case type and
+    canned context) are answered from the cache. Entries expire per
+    operation (AZURE_OPENAI_CACHE_TTLS); the in-process tier is bounded by
+    entry count and oversized responses are not stored.
+    """
+
+    def __init__(self, max_local_entries: Optional[int] = None, max_response_bytes: Optional[int] = None):
+        self.max_response_bytes = max_response_bytes or getattr(settings, 'AZURE_OPENAI_CACHE_MAX_RESPONSE_BYTES', 64 * 1024)
+        self.store = TwoTierCache(
+            'azure_openai_response',
+            timeout=max(DEFAULT_LLM_CACHE_TTLS.values()),
+            max_local_entries=max_local_entries or getattr(settings, 'AZURE_OPENAI_CACHE_LOCAL_ENTRIES', 1024),
+        )
+        self._stats_lock = threading.Lock()
+        self.saved_tokens = 0
+
+    @staticmethod
+    def ttl_for(operation: str) -> Optional[int]:
+        ttls = dict(DEFAULT_LLM_CACHE_TTLS)
+        ttls.update(getattr(settings, 'AZURE_OPENAI_CACHE_TTLS', {}))
+        return ttls.get(operation)
+
+    @staticmethod
+    def make_key(deployment: str, messages: List[Dict], params: Dict) -> str:
+        material = json.dumps([deployment, messages, params], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        with self._stats_lock:
+            self.saved_tokens += entry.get('total_tokens', 0)
+        return entry['content']
+
+    def set(self, key: str, operation: str, content: str, total_tokens: int = 0):
+        ttl = self.ttl_for(operation)
+        if not ttl or content is None or len(content.encode('utf-8')) > self.max_response_bytes:
+            return
+        # Every caller parses the reply as JSON; a malformed one must not be replayed
+        try:
+            json.loads(content)
+        except ValueError:
+            return
+        self.store.set(key, {'content': content, 'total_tokens': total_tokens}, timeout=ttl)
+
+    def get_stats(self) -> dict:
+        stats = self.store.get_stats()
+        stats['hits'] = stats['local_hits'] + stats['shared_hits']
+        with self._stats_lock:
+            stats['saved_tokens'] = self.saved_tokens
+        return stats
+
+
+llm_response_cache = LLMResponseCache()
@@ -0,0 +1,51 @@
+# apps/speech_processing/management/commands/warm_voice_prompts.py
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from apps.legal_forms.models import QuestionMapping
+from apps.speech_processing.voice_prompts import warm_voice_prompts
+
+class Command(BaseCommand):
+    help = 'Pre-synthesize TTS prompts for every QuestionMapping in every supported language'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--language',
+            action='append',
+            dest='languages',
+            help='Only warm this language (may be repeated); defaults to all SUPPORTED_LANGUAGES',
+        )
+        parser.add_argument(
+            '--case-type',
+            type=str,
+            help='Only warm questions for this case type',
+            default=None
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Maximum parallel BHASHINI calls',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        languages = options['languages'] or list(settings.SUPPORTED_LANGUAGES.keys())
+        unknown = set(languages) - set(settings.SUPPORTED_LANGUAGES)
+        if unknown:
+            raise CommandError(f"Unsupported language(s): {', '.join(sorted(unknown))}")
+
+        questions = QuestionMapping.objects.filter(case_type_mapping__is_active=True)
+        if options['case_type']:
+            questions = questions.filter(case_type_mapping__case_type=options['case_type'])
+        question_texts = list(questions.values_list('question', flat=True).distinct())
+
+        self.stdout.write(
+            f'Warming {len(question_texts)} questions in {len(languages)} languages...'
+        )
+        summary = warm_voice_prompts(question_texts, languages, options['concurrency'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Prompts: {summary['prompts']}, synthesized: {summary['synthesized']}, "
+            f"already cached: {summary['already_cached']}, failed: {summary['failed']}"
+        ))
+        if summary['failed']:
+            self.stdout.write(self.style.WARNING('Some prompts failed; see the log for details'))
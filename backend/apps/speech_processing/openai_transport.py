@@ -0,0 +1,105 @@
+# apps/speech_processing/openai_transport.py
+import os
+import threading
+import logging
+from typing import Dict, List
+
+import httpx
+import openai
+from django.conf import settings
+
+from .llm_cache import llm_response_cache
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds per Azure OpenAI operation
+DEFAULT_OPENAI_TIMEOUTS = {
+    'default': (3.05, 60),
+    'case_type': (3.05, 20),
+    'answer_quality': (3.05, 20),
+    'questions': (3.05, 45),
+    'form_analysis': (3.05, 60),
+    'document_review': (3.05, 60),
+    'translation': (3.05, 45),
+}
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_azure_openai_client() -> openai.AzureOpenAI:
+    """
+    Return the process-wide Azure OpenAI client.
+
+    One client (and so one pooled httpx connection pool) is shared by every
+    AzureOpenAIClient and DocumentAnalyzer in the process instead of
+    reconfiguring module-level openai state per instance. Rebuilt after a
+    fork so gunicorn/Celery children never share sockets with their parent.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            _client = _build_client()
+            _client_pid = pid
+            logger.info(f"Created pooled Azure OpenAI client for worker {pid}")
+    return _client
+
+
+def get_openai_timeout(operation: str) -> httpx.Timeout:
+    timeouts = dict(DEFAULT_OPENAI_TIMEOUTS)
+    timeouts.update(getattr(settings, 'AZURE_OPENAI_TIMEOUTS', {}))
+    connect, read = timeouts.get(operation, timeouts['default'])
+    return httpx.Timeout(read, connect=connect)
+
+
+def create_chat_completion(deployment: str, operation: str, messages: List[Dict], use_cache: bool = True,
+                           **params) -> str:
+    """
+    Run one chat completion on the shared client and return the message content.
+
+    Operations with a TTL in AZURE_OPENAI_CACHE_TTLS are answered from
+    llm_response_cache when the same deployment, messages and parameters were
+    sent before; pass use_cache=False to always call the model.
+    """
+    cache_key = None
+    if use_cache and llm_response_cache.ttl_for(operation):
+        cache_key = llm_response_cache.make_key(deployment, messages, params)
+        cached = llm_response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    response = get_azure_openai_client().chat.completions.create(
+        model=deployment,
+        messages=messages,
+        timeout=get_openai_timeout(operation),
+        **params
+    )
+    content = response.choices[0].message.content
+
+    if cache_key:
+        usage = getattr(response, 'usage', None)
+        llm_response_cache.set(cache_key, operation, content, getattr(usage, 'total_tokens', 0) or 0)
+    return content
+
+
+def _build_client() -> openai.AzureOpenAI:
+    pool_maxsize = getattr(settings, 'AZURE_OPENAI_POOL_MAXSIZE', 20)
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+        timeout=get_openai_timeout('default'),
+    )
+    # The SDK retries connection errors, 408/409/429 and 5xx with exponential
+    # backoff, honouring Retry-After
+    return openai.AzureOpenAI(
+        azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+        api_key=settings.AZURE_OPENAI_API_KEY,
+        api_version=settings.AZURE_OPENAI_API_VERSION,
+        max_retries=getattr(settings, 'AZURE_OPENAI_MAX_RETRIES', 2),
+        http_client=http_client,
+    )
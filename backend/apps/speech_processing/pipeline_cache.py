@@ -0,0 +1,142 @@
+# apps/speech_processing/pipeline_cache.py
+import time
+import asyncio
+import threading
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineConfigCache:
+    """
+    Cache of BHASHINI getModelsPipeline responses (serviceId and callbackUrl).
+
+    Entries are keyed by (task type, source language, target language, pipelineId)
+    and live both in-process and in the shared Django cache. An entry that is
+    close to expiry is still served while a background thread re-fetches it, so
+    the request path only blocks on a config call for a cold key.
+    """
+
+    def __init__(self, ttl: Optional[int] = None, refresh_margin: Optional[int] = None):
+        self.ttl = ttl or getattr(settings, 'BHASHINI_PIPELINE_CONFIG_TTL', 3600)
+        self.refresh_margin = refresh_margin or getattr(
+            settings, 'BHASHINI_PIPELINE_CONFIG_REFRESH_MARGIN', 300
+        )
+        self.store = TwoTierCache('bhashini_pipeline_config', timeout=self.ttl, max_local_entries=256)
+        self._refreshing = set()
+        self._background_tasks = set()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(task_type: str, source_language: str, target_language: Optional[str], pipeline_id: str) -> str:
+        return f"{task_type}:{source_language}:{target_language or '-'}:{pipeline_id}"
+
+    def get(self, key: str, fetcher: Callable[[], Dict]) -> Dict:
+        """Return the cached config for key, fetching it synchronously on a miss"""
+        entry = self.store.get(key)
+        now = time.time()
+
+        if entry and entry['expires_at'] > now:
+            if entry['expires_at'] - now <= self.refresh_margin:
+                self._refresh_in_background(key, fetcher)
+            return entry['config']
+
+        config = fetcher()
+        self._store(key, config)
+        return config
+
+    async def aget(self, key: str, fetcher: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Async counterpart of get() for the async client; fetcher is a coroutine function"""
+        entry = self.store.local.get(key)
+        if entry is None:
+            entry = await sync_to_async(self.store.get, thread_sensitive=False)(key)
+        now = time.time()
+
+        if entry and entry['expires_at'] > now:
+            if entry['expires_at'] - now <= self.refresh_margin and self._claim_refresh(key):
+                task = asyncio.ensure_future(self._arefresh(key, fetcher))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return entry['config']
+
+        # Concurrent misses for the same key on this loop share a single fetch
+        inflight_key = (id(asyncio.get_running_loop()), key)
+        inflight = self._inflight.get(inflight_key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._afetch_and_store(key, fetcher))
+            self._inflight[inflight_key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        return await asyncio.shield(inflight)
+
+    def invalidate(self, key: str):
+        """Drop a config that BHASHINI rejected so the next call re-fetches it"""
+        logger.info(f"Invalidating BHASHINI pipeline config {key}")
+        self.store.delete(key)
+
+    def get_stats(self) -> Dict:
+        return self.store.get_stats()
+
+    def _store(self, key: str, config: Dict):
+        self.store.set(key, {'config': config, 'expires_at': time.time() + self.ttl}, self.ttl)
+
+    def _claim_refresh(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        # Only one worker across the deployment refreshes a given key
+        try:
+            claimed = cache.add(f"{self.store.shared_key(key)}:refreshing", True, self.refresh_margin)
+        except Exception:
+            claimed = True
+
+        if not claimed:
+            with self._lock:
+                self._refreshing.discard(key)
+        return claimed
+
+    def _refresh_in_background(self, key: str, fetcher: Callable[[], Dict]):
+        if not self._claim_refresh(key):
+            return
+
+        thread = threading.Thread(
+            target=self._refresh, args=(key, fetcher), name="bhashini-config-refresh", daemon=True
+        )
+        thread.start()
+
+    def _refresh(self, key: str, fetcher: Callable[[], Dict]):
+        try:
+            self._store(key, fetcher())
+            logger.debug(f"Refreshed BHASHINI pipeline config {key}")
+        except Exception as e:
+            logger.warning(f"Background refresh of pipeline config {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _afetch_and_store(self, key: str, fetcher: Callable[[], Awaitable[Dict]]) -> Dict:
+        config = await fetcher()
+        await sync_to_async(self._store, thread_sensitive=False)(key, config)
+        return config
+
+    async def _arefresh(self, key: str, fetcher: Callable[[], Awaitable[Dict]]):
+        try:
+            await self._afetch_and_store(key, fetcher)
+            logger.debug(f"Refreshed BHASHINI pipeline config {key}")
+        except Exception as e:
+            logger.warning(f"Background refresh of pipeline config {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+pipeline_config_cache = PipelineConfigCache()
@@ -0,0 +1,244 @@
+# apps/speech_processing/resilience.py
+import time
+import hashlib
+import threading
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_BREAKER_SETTINGS = {
+    'failure_rate': 0.5,       # open when at least this fraction of calls fail...
+    'slow_call_rate': 0.8,     # ...or at least this fraction are slow
+    'slow_call_fraction': 0.5, # a call is slow past this fraction of its read timeout
+    'minimum_calls': 10,       # calls in the window before rates are evaluated
+    'window_seconds': 60,
+    'open_seconds': 30,        # how long to fail fast before probing again
+}
+
+
+class CircuitOpenError(Exception):
+    """BHASHINI endpoint is failing; the call was rejected without touching the network"""
+
+    code = 'bhashini_unavailable'
+
+    def __init__(self, endpoint: str, retry_after: int):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"BHASHINI endpoint {endpoint} is unavailable; retry in {retry_after}s")
+
+
+class CircuitBreaker:
+    """
+    Failure-rate and latency circuit breaker whose state lives in the shared cache.
+
+    Every worker records call outcomes in per-window Redis counters, so the
+    breaker opens for all workers at once. While open, calls fail fast with
+    CircuitOpenError. After open_seconds, one worker is allowed a probe call
+    (half-open); its outcome closes or re-opens the circuit. If the cache is
+    unreachable the breaker lets calls through.
+    """
+
+    def __init__(self, endpoint: str, **overrides):
+        self.endpoint = endpoint
+        self.config = dict(DEFAULT_BREAKER_SETTINGS)
+        self.config.update(getattr(settings, 'BHASHINI_CIRCUIT_BREAKER', {}))
+        self.config.update(overrides)
+        self.key_prefix = f"circuit:{hashlib.sha1(endpoint.encode('utf-8')).hexdigest()[:16]}"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the call may proceed"""
+        try:
+            opened_until = cache.get(f"{self.key_prefix}:open_until")
+            if opened_until is None:
+                return
+
+            now = time.time()
+            if now < opened_until:
+                raise CircuitOpenError(self.endpoint, int(opened_until - now) + 1)
+
+            # Half-open: a single probe call across all workers
+            if not cache.add(f"{self.key_prefix}:probe", 1, timeout=self.config['open_seconds']):
+                raise CircuitOpenError(self.endpoint, self.config['open_seconds'])
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.warning(f"Circuit breaker state unavailable for {self.endpoint}: {e}")
+
+    def record(self, success: bool, slow: bool = False):
+        """Record one call outcome and open or close the circuit as needed"""
+        try:
+            if self.state() == HALF_OPEN:
+                if success and not slow:
+                    self._close()
+                else:
+                    self._open()
+                return
+
+            window = self._window_key()
+            calls = self._incr(f"{window}:calls")
+            failures = self._incr(f"{window}:failures") if not success else cache.get(f"{window}:failures", 0)
+            slow_calls = self._incr(f"{window}:slow") if slow else cache.get(f"{window}:slow", 0)
+
+            if calls < self.config['minimum_calls']:
+                return
+            if (failures / calls >= self.config['failure_rate']
+                    or slow_calls / calls >= self.config['slow_call_rate']):
+                logger.error(
+                    f"Opening circuit for {self.endpoint}: {failures}/{calls} failed, {slow_calls}/{calls} slow"
+                )
+                self._open()
+        except Exception as e:
+            logger.warning(f"Failed to record circuit breaker outcome for {self.endpoint}: {e}")
+
+    def state(self) -> str:
+        opened_until = cache.get(f"{self.key_prefix}:open_until")
+        if opened_until is None:
+            return CLOSED
+        return OPEN if time.time() < opened_until else HALF_OPEN
+
+    def get_stats(self) -> Dict:
+        try:
+            window = self._window_key()
+            return {
+                'endpoint': self.endpoint,
+                'state': self.state(),
+                'window_calls': cache.get(f"{window}:calls", 0),
+                'window_failures': cache.get(f"{window}:failures", 0),
+                'window_slow_calls': cache.get(f"{window}:slow", 0),
+            }
+        except Exception as e:
+            return {'endpoint': self.endpoint, 'state': 'unknown', 'error': str(e)}
+
+    def _window_key(self) -> str:
+        return f"{self.key_prefix}:{int(time.time() // self.config['window_seconds'])}"
+
+    def _incr(self, key: str) -> int:
+        cache.add(key, 0, timeout=self.config['window_seconds'] * 2)
+        return cache.incr(key)
+
+    def _open(self):
+        # Kept well past open_until so the half-open state is observable
+        cache.set(
+            f"{self.key_prefix}:open_until",
+            time.time() + self.config['open_seconds'],
+            timeout=self.config['open_seconds'] * 10
+        )
+        cache.delete(f"{self.key_prefix}:probe")
+
+    def _close(self):
+        logger.info(f"Closing circuit for {self.endpoint}")
+        cache.delete_many([
+            f"{self.key_prefix}:open_until",
+            f"{self.key_prefix}:probe",
+            f"{self._window_key()}:calls",
+            f"{self._window_key()}:failures",
+            f"{self._window_key()}:slow",
+        ])
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """Breaker for the endpoint (scheme, host and path) that url points to"""
+    parts = urlsplit(url)
+    endpoint = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
+
+
+def get_breaker_stats():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.get_stats() for breaker in breakers]
+
+
+class LatencyTracker:
+    """Recent per-operation latencies in this process, for percentile-based hedging delays"""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(operation, deque(maxlen=self.size)).append(seconds)
+
+    def percentile(self, operation: str, percentile: float, minimum_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < minimum_samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+latency_tracker = LatencyTracker()
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BHASHINI_HEDGE_MAX_WORKERS', 8),
+                thread_name_prefix='bhashini-hedge'
+            )
+        return _hedge_executor
+
+
+def hedged_call(primary: Callable, backup: Callable, delay: float):
+    """
+    Run primary(); if it has not finished after delay seconds, also run
+    backup() and return whichever succeeds first.
+
+    The primary gets its own thread and only backups occupy the shared hedge
+    executor, so a burst of slow requests cannot exhaust the pool with
+    primaries. When one attempt fails the other is awaited; when both fail
+    the primary's error is raised. A blocking call cannot be interrupted, so
+    the losing attempt finishes in the background.
+    """
+    primary_future = Future()
+
+    def run_primary():
+        primary_future.set_running_or_notify_cancel()
+        try:
+            primary_future.set_result(primary())
+        except BaseException as e:
+            primary_future.set_exception(e)
+
+    threading.Thread(target=run_primary, name='bhashini-hedge-primary', daemon=True).start()
+
+    done, _ = wait([primary_future], timeout=delay)
+    if done:
+        return primary_future.result()
+
+    logger.info(f"Hedging slow BHASHINI request after {delay:.2f}s")
+    pending = {primary_future, _get_hedge_executor().submit(backup)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            if pending:
+                logger.warning(f"Hedged BHASHINI attempt failed, waiting for the other: {future.exception()}")
+    return primary_future.result()
@@ -0,0 +1,243 @@
+# apps/speech_processing/streaming.py
+import os
+import asyncio
+import base64
+import json
+import threading
+import logging
+from typing import AsyncIterator, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Stands in for audioContent while the surrounding JSON is serialized
+AUDIO_PLACEHOLDER = '__AUDIO_CONTENT_PLACEHOLDER__'
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamingAudioBody:
+    """
+    File-like JSON request body that base64-encodes audio while it is sent.
+
+    The inference payload is serialized once with a placeholder in place of
+    ``audioContent``; the audio itself is read from its source chunk by chunk,
+    encoded and written straight into the socket. Content-Length is computed
+    up front (base64 output size is known from the input size), so requests
+    sends a normal fixed-length body and never holds the encoded audio, the
+    raw audio and the JSON string in memory at the same time.
+
+    ``audio`` may be bytes/memoryview, a path, or a Django File/UploadedFile
+    (anything with ``chunks()`` or ``read()``), including an AudioSection.
+    ``peak_buffer_bytes`` records the largest amount of audio data buffered
+    at once, so memory per request stays bounded by the chunk size
+    regardless of recording length. Bodies sent concurrently (segments of one
+    recording) can share a BufferMeter to report their combined peak.
+    """
+
+    def __init__(self, payload: dict, audio, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 meter: Optional['BufferMeter'] = None):
+        serialized = json.dumps(payload).encode('utf-8')
+        marker = json.dumps(AUDIO_PLACEHOLDER).encode('utf-8')
+        if serialized.count(marker) != 1:
+            raise ValueError("Payload must contain exactly one audio placeholder")
+
+        prefix, suffix = serialized.split(marker)
+        self.prefix = prefix + b'"'
+        self.suffix = b'"' + suffix
+        self.audio = audio
+        self.chunk_size = chunk_size - chunk_size % 3 or 3
+        self.audio_size = source_size(audio)
+        self.encoded_size = 4 * ((self.audio_size + 2) // 3)
+
+        self.bytes_sent = 0
+        self.peak_buffer_bytes = 0
+        self.meter = meter or BufferMeter()
+        self._parts = None
+        self._buffer = b''
+        self._offset = 0
+
+    def __len__(self):
+        return len(self.prefix) + self.encoded_size + len(self.suffix)
+
+    def __iter__(self):
+        self.rewind()
+        while True:
+            block = self.read(self.chunk_size)
+            if not block:
+                break
+            yield block
+
+    def read(self, size: int = -1) -> bytes:
+        if self._parts is None:
+            self._parts = self._iter_parts()
+
+        pieces = []
+        remaining = size if size is not None and size >= 0 else None
+        while remaining is None or remaining > 0:
+            if self._offset >= len(self._buffer):
+                part = next(self._parts, None)
+                if part is None:
+                    break
+                self._buffer, self._offset = part, 0
+
+            end = len(self._buffer) if remaining is None else self._offset + remaining
+            piece = self._buffer[self._offset:end]
+            self._offset += len(piece)
+            if remaining is not None:
+                remaining -= len(piece)
+            pieces.append(piece)
+
+        data = b''.join(pieces)
+        self.bytes_sent += len(data)
+        return data
+
+    def rewind(self):
+        """Restart the body from the beginning (for resending the same audio)"""
+        if self._parts is not None and hasattr(self.audio, 'seek'):
+            self.audio.seek(0)
+        self._parts = None
+        self._buffer = b''
+        self._offset = 0
+        self.bytes_sent = 0
+
+    def stats(self) -> dict:
+        return {
+            'audio_bytes': self.audio_size,
+            'body_bytes': len(self),
+            'bytes_sent': self.bytes_sent,
+            'peak_buffer_bytes': self.peak_buffer_bytes,
+        }
+
+    def _iter_parts(self) -> Iterator[bytes]:
+        yield self.prefix
+
+        carry = b''
+        for chunk in _iter_source(self.audio, self.chunk_size):
+            data = carry + chunk if carry else chunk
+            usable = len(data) - len(data) % 3
+            self.peak_buffer_bytes = max(self.peak_buffer_bytes, len(data))
+            self.meter.acquire(len(data))
+            try:
+                if usable:
+                    yield base64.b64encode(data[:usable])
+            finally:
+                self.meter.release(len(data))
+            carry = bytes(data[usable:])
+
+        if carry:
+            yield base64.b64encode(carry)
+
+        yield self.suffix
+
+
+async def aiter_body(body: StreamingAudioBody) -> AsyncIterator[bytes]:
+    """
+    Stream a body from an event loop (httpx.AsyncClient content).
+
+    Reading the audio source blocks, so each chunk is read in a worker thread.
+    """
+    body.rewind()
+    while True:
+        block = await asyncio.to_thread(body.read, body.chunk_size)
+        if not block:
+            break
+        yield block
+
+
+class BufferMeter:
+    """Audio bytes currently buffered by one or more request bodies, and the peak"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, size: int):
+        with self._lock:
+            self.current += size
+            self.peak = max(self.peak, self.current)
+
+    def release(self, size: int):
+        with self._lock:
+            self.current -= size
+
+
+class AudioSection:
+    """
+    A byte range of an audio source, optionally preceded by a header.
+
+    Lets a segment of a long recording be streamed straight from the
+    upload instead of being copied out. Reads are positional and, for
+    file-like sources, serialized on a lock shared by every section of the
+    same source, so several request bodies can stream from one handle at
+    once. length=None runs to the end of the source.
+    """
+
+    def __init__(self, source, offset: int = 0, length: Optional[int] = None, header: bytes = b'',
+                 lock: Optional[threading.Lock] = None):
+        self.source = source
+        self.offset = offset
+        self.length = source_size(source) - offset if length is None else length
+        self.header = header
+        self.lock = lock or threading.Lock()
+        self.size = len(header) + self.length
+
+    def chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        if self.header:
+            yield self.header
+
+        if isinstance(self.source, (bytes, bytearray, memoryview)):
+            view = memoryview(self.source)[self.offset:self.offset + self.length]
+            for start in range(0, len(view), chunk_size):
+                yield view[start:start + chunk_size]
+        elif isinstance(self.source, str):
+            with open(self.source, 'rb') as audio_file:
+                audio_file.seek(self.offset)
+                yield from self._read_from(audio_file, chunk_size)
+        else:
+            yield from self._read_from(self.source, chunk_size, self.lock)
+
+    def _read_from(self, handle, chunk_size: int, lock: Optional[threading.Lock] = None) -> Iterator[bytes]:
+        position, end = self.offset, self.offset + self.length
+        while position < end:
+            if lock:
+                with lock:
+                    handle.seek(position)
+                    data = handle.read(min(chunk_size, end - position))
+            else:
+                data = handle.read(min(chunk_size, end - position))
+            if not data:
+                break
+            position += len(data)
+            yield data
+
+
+def source_size(audio) -> int:
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return len(audio)
+    if isinstance(audio, str):
+        return os.path.getsize(audio)
+    size = getattr(audio, 'size', None)
+    if size is not None:
+        return size
+    position = audio.tell()
+    audio.seek(0, 2)
+    size = audio.tell()
+    audio.seek(position)
+    return size
+
+
+def _iter_source(audio, chunk_size: int) -> Iterator[bytes]:
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        view = memoryview(audio)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+    elif isinstance(audio, str):
+        with open(audio, 'rb') as audio_file:
+            yield from iter(lambda: audio_file.read(chunk_size), b'')
+    elif hasattr(audio, 'read'):
+        # InMemoryUploadedFile.chunks() ignores chunk_size, so read explicitly
+        audio.seek(0)
+        yield from iter(lambda: audio.read(chunk_size), b'')
+    else:
+        yield from audio.chunks(chunk_size)
@@ -0,0 +1,318 @@
+# apps/speech_processing/streaming_transcription.py
+import time
+import json
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+import jwt
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .async_bhashini_client import AsyncBhashiniClient
+from .audio_processing import (
+    MIN_SILENCE_MS, TARGET_SAMPLE_RATE, VAD_FRAME_MS, encode_wav, frame_energies_db, longest_silence_center,
+    resample, silence_threshold_db, to_int16
+)
+
+logger = logging.getLogger(__name__)
+
+# The noise floor is estimated over this much recent audio
+THRESHOLD_HISTORY_SECONDS = 30
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 22050, 44100, 48000)
+
+# Close codes (4000-4999 are application defined)
+CLOSE_NORMAL = 1000
+CLOSE_TOO_LARGE = 1009
+CLOSE_INTERNAL_ERROR = 1011
+CLOSE_BAD_REQUEST = 4400
+CLOSE_UNAUTHORIZED = 4401
+
+
+class StreamingSegmenter:
+    """
+    Incremental energy VAD that cuts a live 16-bit mono PCM stream into segments.
+
+    A segment ends in the middle of the first pause of at least pause_ms once
+    it holds min_segment_seconds of audio, or at the longest pause inside the
+    window (hard cut if there is none) when it reaches max_segment_seconds.
+    Segments that contain no speech are dropped.
+    """
+
+    def __init__(self, sample_rate: int, pause_ms: Optional[int] = None,
+                 max_segment_seconds: Optional[float] = None, min_segment_seconds: float = 1.0):
+        pause_ms = pause_ms or getattr(settings, 'STREAMING_ASR_PAUSE_MS', 500)
+        max_segment_seconds = max_segment_seconds or getattr(settings, 'STREAMING_ASR_MAX_SEGMENT_SECONDS', 15)
+
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * VAD_FRAME_MS / 1000))
+        self.pause_frames = max(1, pause_ms // VAD_FRAME_MS)
+        self.max_frames = max(1, int(max_segment_seconds * 1000 / VAD_FRAME_MS))
+        self.min_frames = min(self.max_frames, max(1, int(min_segment_seconds * 1000 / VAD_FRAME_MS)))
+
+        self._pending = bytearray()
+        # Fed blocks in arrival order; _offset samples of the first are already taken
+        self._chunks = deque()
+        self._offset = 0
+        self._energies: List[float] = []
+        self._history = deque(maxlen=int(THRESHOLD_HISTORY_SECONDS * 1000 / VAD_FRAME_MS))
+        self._segment_start = 0
+        self._next_index = 0
+        self.total_samples = 0
+
+    @property
+    def total_seconds(self) -> float:
+        return self.total_samples / float(self.sample_rate)
+
+    def feed(self, data: bytes) -> List[Dict]:
+        """Add PCM bytes; returns the segments completed by them"""
+        self._pending.extend(data)
+        usable = len(self._pending) // (2 * self.frame_length) * self.frame_length * 2
+        if not usable:
+            return []
+
+        samples = np.frombuffer(bytes(self._pending[:usable]), dtype='<i2')
+        del self._pending[:usable]
+        self.total_samples += len(samples)
+
+        energies = frame_energies_db(samples, self.sample_rate)
+        self._chunks.append(samples)
+        self._energies.extend(energies.tolist())
+        self._history.extend(energies.tolist())
+        return self._cut()
+
+    def flush(self) -> List[Dict]:
+        """Return whatever is buffered as a final segment (if it contains speech)"""
+        silent = self._silent_mask()
+        frames = len(self._energies)
+        segment = self._emit(frames, silent) if frames else None
+        return [segment] if segment else []
+
+    def _silent_mask(self) -> np.ndarray:
+        threshold = silence_threshold_db(np.asarray(self._history, dtype=np.float32))
+        return np.asarray(self._energies, dtype=np.float32) < threshold
+
+    def _cut(self) -> List[Dict]:
+        segments = []
+        while True:
+            silent = self._silent_mask()
+            frames = len(silent)
+            trailing = frames - int(np.flatnonzero(~silent)[-1]) - 1 if (~silent).any() else frames
+
+            if trailing == frames:
+                # Nothing but silence so far: keep a short lead-in and drop the rest
+                if frames > self.pause_frames:
+                    self._take(frames - self.pause_frames)
+                return segments
+
+            if frames - trailing >= self.min_frames and trailing >= self.pause_frames:
+                cut = frames - trailing // 2
+            elif frames >= self.max_frames:
+                center = longest_silence_center(
+                    silent[self.min_frames:self.max_frames], max(1, MIN_SILENCE_MS // VAD_FRAME_MS)
+                )
+                cut = self.min_frames + center if center is not None else self.max_frames
+            else:
+                return segments
+
+            segment = self._emit(cut, silent)
+            if segment:
+                segments.append(segment)
+
+    def _emit(self, frames: int, silent: np.ndarray) -> Optional[Dict]:
+        has_speech = not silent[:frames].all()
+        samples = self._take(frames)
+        if not has_speech:
+            return None
+
+        segment = {
+            'index': self._next_index,
+            'samples': samples,
+            'start': round((self._segment_start - len(samples)) / float(self.sample_rate), 3),
+            'duration': round(len(samples) / float(self.sample_rate), 3),
+        }
+        self._next_index += 1
+        return segment
+
+    def _take(self, frames: int) -> np.ndarray:
+        # Only the blocks being taken are copied, once, instead of the whole buffer on every cut
+        split = frames * self.frame_length
+        parts, needed = [], split
+        while needed and self._chunks:
+            chunk = self._chunks[0]
+            part = chunk[self._offset:self._offset + needed]
+            parts.append(part)
+            needed -= len(part)
+            self._offset += len(part)
+            if self._offset == len(chunk):
+                self._chunks.popleft()
+                self._offset = 0
+        self._energies = self._energies[frames:]
+        self._segment_start += split
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+
+
+class TranscriptionSession:
+    """
+    One streaming transcription: segments are sent to ASR as soon as they are
+    cut, with at most BHASHINI_ASR_MAX_PARALLEL_SEGMENTS in flight, and each
+    transcript is pushed to the client as a "partial" message when it arrives.
+    """
+
+    def __init__(self, send_json, language: str, sample_rate: int, client: Optional[AsyncBhashiniClient] = None):
+        self.send_json = send_json
+        self.language = language
+        self.sample_rate = sample_rate
+        self.client = client or AsyncBhashiniClient()
+        self.segmenter = StreamingSegmenter(sample_rate)
+        self.semaphore = asyncio.Semaphore(getattr(settings, 'BHASHINI_ASR_MAX_PARALLEL_SEGMENTS', 4))
+        self.transcripts: Dict[int, str] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.started_at = time.monotonic()
+        self.first_text_latency = None
+
+    def feed(self, data: bytes):
+        for segment in self.segmenter.feed(data):
+            self._dispatch(segment)
+
+    async def finish(self) -> Dict:
+        """Transcribe the remaining audio, wait for every segment and return the final message"""
+        for segment in self.segmenter.flush():
+            self._dispatch(segment)
+        await asyncio.gather(*self.tasks)
+
+        text = ' '.join(self.transcripts[index] for index in sorted(self.transcripts) if self.transcripts[index])
+        return {
+            'type': 'final',
+            'text': text,
+            'language': self.language,
+            'segments': len(self.transcripts),
+            'audio_duration': round(self.segmenter.total_seconds, 3),
+            'time_to_first_text': self.first_text_latency,
+        }
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
+
+    def _dispatch(self, segment: Dict):
+        self.tasks.append(asyncio.create_task(self._transcribe(segment)))
+
+    def _encode(self, samples: np.ndarray) -> bytes:
+        """A segment as a 16 kHz WAV, the rate BHASHINI ASR expects"""
+        if self.sample_rate != TARGET_SAMPLE_RATE:
+            samples = to_int16(resample(samples / 32768.0, self.sample_rate, TARGET_SAMPLE_RATE))
+        return encode_wav(samples, TARGET_SAMPLE_RATE)
+
+    async def _transcribe(self, segment: Dict):
+        try:
+            # Resampling is CPU-bound; keep it off the event loop
+            audio = await asyncio.to_thread(self._encode, segment['samples'])
+            async with self.semaphore:
+                result = await self.client.speech_to_text(audio, self.language)
+        except Exception as e:
+            logger.error(f"Streaming ASR failed for segment {segment['index']}: {e}")
+            await self.send_json({'type': 'error', 'segment': segment['index'], 'error': str(e)})
+            return
+
+        self.transcripts[segment['index']] = result['text']
+        if self.first_text_latency is None:
+            self.first_text_latency = round(time.monotonic() - self.started_at, 3)
+        await self.send_json({
+            'type': 'partial',
+            'segment': segment['index'],
+            'start': segment['start'],
+            'duration': segment['duration'],
+            'text': result['text'],
+            'confidence': result.get('confidence'),
+        })
+
+
+async def _authenticate(token: Optional[str]):
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except jwt.PyJWTError as e:
+        logger.info(f"Rejected streaming transcription token: {e}")
+        return None
+
+    User = get_user_model()
+    try:
+        return await sync_to_async(User.objects.get)(id=payload.get('user_id'), is_active=True)
+    except User.DoesNotExist:
+        return None
+
+
+async def transcription_websocket(scope, receive, send):
+    """
+    ASGI WebSocket endpoint for live transcription.
+
+    Connect to /ws/speech/transcribe/?token=<jwt>&language=hi&sample_rate=16000,
+    send binary frames of 16-bit little-endian mono PCM while the user speaks,
+    then {"type": "end"}. The server replies with {"type": "partial", ...} per
+    segment as ASR finishes it and a closing {"type": "final", "text": ...}.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    params = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    user = await _authenticate(params.get('token', [None])[0])
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    language = params.get('language', ['hi'])[0]
+    try:
+        sample_rate = int(params.get('sample_rate', ['16000'])[0])
+    except ValueError:
+        sample_rate = None
+    if language not in settings.SUPPORTED_LANGUAGES or sample_rate not in SUPPORTED_SAMPLE_RATES:
+        await send({'type': 'websocket.close', 'code': CLOSE_BAD_REQUEST})
+        return
+
+    await send({'type': 'websocket.accept'})
+    send_lock = asyncio.Lock()
+
+    async def send_json(data):
+        async with send_lock:
+            await send({'type': 'websocket.send', 'text': json.dumps(data, ensure_ascii=False)})
+
+    async def close(code):
+        async with send_lock:
+            await send({'type': 'websocket.close', 'code': code})
+
+    max_seconds = getattr(settings, 'AUDIO_UPLOAD_MAX_SECONDS', 600)
+    session = TranscriptionSession(send_json, language, sample_rate)
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                session.cancel()
+                return
+
+            if message.get('bytes'):
+                session.feed(message['bytes'])
+                if session.segmenter.total_seconds > max_seconds:
+                    session.cancel()
+                    await send_json({'type': 'error', 'error': f"Stream exceeds {max_seconds} seconds"})
+                    await close(CLOSE_TOO_LARGE)
+                    return
+            elif message.get('text'):
+                try:
+                    command = json.loads(message['text'])
+                except ValueError:
+                    command = {}
+                if command.get('type') == 'end':
+                    await send_json(await session.finish())
+                    await close(CLOSE_NORMAL)
+                    return
+    except Exception as e:
+        logger.error(f"Streaming transcription failed for user {user.id}: {e}")
+        session.cancel()
+        await close(CLOSE_INTERNAL_ERROR)
@@ -0,0 +1,27 @@
+# apps/speech_processing/tasks.py
+from celery import shared_task
+import logging
+
+from .voice_prompts import warm_voice_prompts
+
+logger = logging.getLogger(__name__)
+
+@shared_task(bind=True, max_retries=2)
+def warm_question_voice_prompts(self, question_ids=None, languages=None):
+    """Pre-synthesize voice prompts for the given QuestionMappings (all active ones if None)"""
+    from apps.legal_forms.models import QuestionMapping
+
+    try:
+        questions = QuestionMapping.objects.filter(case_type_mapping__is_active=True)
+        if question_ids:
+            questions = questions.filter(id__in=question_ids)
+
+        summary = warm_voice_prompts(questions.values_list('question', flat=True), languages)
+        logger.info(f"Warmed voice prompts: {summary}")
+        return summary
+
+    except Exception as e:
+        logger.error(f"Voice prompt warming failed: {e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=300, exc=e)
+        return {'success': False, 'error': str(e)}
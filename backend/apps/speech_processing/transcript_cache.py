@@ -0,0 +1,76 @@
+# apps/speech_processing/transcript_cache.py
+import hashlib
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .caching import TwoTierCache
+
+# Per-upload details that do not describe the transcript itself
+UNCACHED_FIELDS = ('payload_stats',)
+
+
+def hash_audio(audio) -> str:
+    """
+    sha256 of an upload, bytes or file path.
+
+    Uploads received through the hashing upload handlers (FILE_UPLOAD_HANDLERS)
+    already carry their digest and are not read again. Other uploaded files
+    are hashed incrementally over chunks(), so large uploads spooled to disk
+    are never read into memory at once; the file is rewound.
+    """
+    precomputed = getattr(audio, 'sha256', None)
+    if isinstance(precomputed, str):
+        return precomputed
+
+    digest = hashlib.sha256()
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        digest.update(audio)
+    elif isinstance(audio, str):
+        with open(audio, 'rb') as audio_file:
+            for chunk in iter(lambda: audio_file.read(64 * 1024), b''):
+                digest.update(chunk)
+    else:
+        audio.seek(0)
+        for chunk in audio.chunks():
+            digest.update(chunk)
+        audio.seek(0)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """
+    ASR results keyed by (audio sha256, source language, target language).
+
+    Clients on flaky networks re-upload the same recording after a timeout;
+    the retry is answered from the cache instead of paying for another ASR
+    call. target_language is set for chained ASR→translation results.
+    """
+
+    def __init__(self, ttl: Optional[int] = None, max_local_entries: Optional[int] = None):
+        self.ttl = ttl or getattr(settings, 'ASR_TRANSCRIPT_CACHE_TTL', 24 * 3600)
+        self.store = TwoTierCache(
+            'asr_transcript',
+            timeout=self.ttl,
+            max_local_entries=max_local_entries or getattr(settings, 'ASR_TRANSCRIPT_CACHE_LOCAL_ENTRIES', 512),
+        )
+
+    @staticmethod
+    def make_key(audio_hash: str, source_language: str, target_language: Optional[str] = None) -> str:
+        return f"{audio_hash}:{source_language}:{target_language or ''}"
+
+    def get(self, audio_hash: str, source_language: str, target_language: Optional[str] = None) -> Optional[Dict]:
+        result = self.store.get(self.make_key(audio_hash, source_language, target_language))
+        return dict(result, cached=True) if result else None
+
+    def set(self, audio_hash: str, source_language: str, result: Dict, target_language: Optional[str] = None):
+        stored = {field: value for field, value in result.items() if field not in UNCACHED_FIELDS}
+        self.store.set(self.make_key(audio_hash, source_language, target_language), stored)
+
+    def get_stats(self) -> dict:
+        stats = self.store.get_stats()
+        stats['hits'] = stats['local_hits'] + stats['shared_hits']
+        return stats
+
+
+transcript_cache = TranscriptCache()
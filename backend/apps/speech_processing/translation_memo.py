@@ -0,0 +1,51 @@
+# apps/speech_processing/translation_memo.py
+import hashlib
+import json
+import unicodedata
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from .caching import TwoTierCache
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize and collapse whitespace so trivially different inputs share an entry"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+class TranslationMemo:
+    """
+    Memo of BHASHINI translations keyed by (normalized text, source, target).
+
+    Backed by a TwoTierCache, so repeated inputs within a worker are served
+    from memory and re-processed historical inputs from Redis; only texts
+    never translated before reach the network.
+    """
+
+    def __init__(self, ttl: Optional[int] = None, max_local_entries: Optional[int] = None):
+        self.ttl = ttl or getattr(settings, 'TRANSLATION_MEMO_TTL', 30 * 24 * 3600)
+        self.store = TwoTierCache(
+            'bhashini_translation',
+            timeout=self.ttl,
+            max_local_entries=max_local_entries or getattr(settings, 'TRANSLATION_MEMO_LOCAL_ENTRIES', 4096),
+        )
+
+    @staticmethod
+    def make_key(text: str, source_language: str, target_language: str) -> str:
+        material = json.dumps([normalize_text(text), source_language, target_language], ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, text: str, source_language: str, target_language: str) -> Optional[Dict]:
+        return self.store.get(self.make_key(text, source_language, target_language))
+
+    def set(self, text: str, source_language: str, target_language: str, result: Dict):
+        self.store.set(self.make_key(text, source_language, target_language), result)
+
+    def get_stats(self) -> dict:
+        stats = self.store.get_stats()
+        stats['hits'] = stats['local_hits'] + stats['shared_hits']
+        return stats
+
+
+translation_memo = TranslationMemo()
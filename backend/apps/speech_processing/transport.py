@@ -0,0 +1,171 @@
+# apps/speech_processing/transport.py
+import os
+import asyncio
+import random
+import threading
+import logging
+import weakref
+from typing import Dict, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds per BHASHINI operation
+DEFAULT_TIMEOUTS = {
+    'config': (3.05, 10),
+    'asr': (3.05, 60),
+    'tts': (3.05, 30),
+    'translation': (3.05, 15),
+    'asr+translation': (3.05, 75),
+}
+
+CONFIG_PATH_PREFIX = '/ulca/apis/v0/model/'
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+# httpx.AsyncClient instances are bound to the event loop they were created on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_bhashini_session() -> requests.Session:
+    """
+    Return the process-wide BHASHINI session.
+
+    The session is rebuilt after a fork so gunicorn/Celery children never share
+    sockets with their parent.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+            logger.info(f"Created pooled BHASHINI session for worker {pid}")
+    return _session
+
+
+def get_async_bhashini_client() -> httpx.AsyncClient:
+    """Return the pooled httpx client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=getattr(settings, 'BHASHINI_POOL_MAXSIZE', 20),
+                max_keepalive_connections=getattr(settings, 'BHASHINI_POOL_MAXSIZE', 20),
+            ),
+            # Connection-level retries only; status retries are handled per call
+            transport=httpx.AsyncHTTPTransport(
+                retries=getattr(settings, 'BHASHINI_INFERENCE_CONNECT_RETRIES', 1)
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def get_async_timeout(operation: str) -> httpx.Timeout:
+    connect, read = get_timeout(operation)
+    return httpx.Timeout(read, connect=connect)
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, matching the sync config retry policy"""
+    backoff_factor = getattr(settings, 'BHASHINI_RETRY_BACKOFF', 0.3)
+    return backoff_factor * (2 ** attempt) + random.uniform(0, backoff_factor)
+
+
+def get_timeout(operation: str) -> Tuple[float, float]:
+    """Return the (connect, read) timeout for a BHASHINI operation"""
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    timeouts.update(getattr(settings, 'BHASHINI_TIMEOUTS', {}))
+    return tuple(timeouts.get(operation, timeouts['config']))
+
+
+def get_pool_stats() -> Dict:
+    """Connection pool statistics for the current worker's BHASHINI session"""
+    if _session is None or _session_pid != os.getpid():
+        return {'initialized': False, 'pools': []}
+
+    pools = []
+    seen = set()
+    for prefix, adapter in _session.adapters.items():
+        pool_manager = getattr(adapter, 'poolmanager', None)
+        if pool_manager is None or id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                'adapter': prefix,
+                'host': pool.host,
+                'max_size': pool.pool.maxsize if pool.pool else 0,
+                # The queue is pre-filled with None placeholders for unopened slots
+                'idle_connections': sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+                'connections_created': pool.num_connections,
+                'requests_sent': pool.num_requests,
+            })
+
+    return {'initialized': True, 'pid': _session_pid, 'pools': pools}
+
+
+def _build_session() -> requests.Session:
+    pool_connections = getattr(settings, 'BHASHINI_POOL_CONNECTIONS', 10)
+    pool_maxsize = getattr(settings, 'BHASHINI_POOL_MAXSIZE', 20)
+    backoff_factor = getattr(settings, 'BHASHINI_RETRY_BACKOFF', 0.3)
+
+    # getModelsPipeline only reads configuration, so it is safe to retry on
+    # transient status codes as well as connection and read errors.
+    config_retry = Retry(
+        total=getattr(settings, 'BHASHINI_CONFIG_RETRIES', 3),
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({'POST'}),
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_factor,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+    # Inference calls are billed and not idempotent: only retry when the
+    # connection was never established.
+    inference_retry = Retry(
+        total=getattr(settings, 'BHASHINI_INFERENCE_CONNECT_RETRIES', 1),
+        connect=getattr(settings, 'BHASHINI_INFERENCE_CONNECT_RETRIES', 1),
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_factor,
+        raise_on_status=False,
+    )
+
+    session = requests.Session()
+    inference_adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=inference_retry,
+    )
+    session.mount('https://', inference_adapter)
+    session.mount('http://', inference_adapter)
+
+    config_adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        max_retries=config_retry,
+    )
+    session.mount(f"{settings.BHASHINI_BASE_URL.rstrip('/')}{CONFIG_PATH_PREFIX}", config_adapter)
+
+    return session
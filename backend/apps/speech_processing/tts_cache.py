@@ -0,0 +1,273 @@
+# apps/speech_processing/tts_cache.py
+import time
+import uuid
+import hashlib
+import json
+import threading
+import logging
+import unicodedata
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+ENTRY_KEY_PREFIX = 'tts_audio_cache:entry'
+TOTAL_BYTES_KEY = 'tts_audio_cache:total_bytes'
+TOTAL_ENTRIES_KEY = 'tts_audio_cache:total_entries'
+EVICTION_LOCK_KEY = 'tts_audio_cache:eviction:lock'
+EVICTION_LOCK_TIMEOUT = 60
+# Hits only rewrite an entry's access time when the recorded one is older than this
+TOUCH_INTERVAL = 60
+# Eviction trims to this fraction of each limit, so the next scan is many stores away
+EVICTION_LOW_WATER = 0.9
+
+
+class TTSAudioCache:
+    """
+    Content-addressed store of synthesized speech.
+
+    Audio is saved in default_storage under the sha256 of (text, language,
+    gender, sampling rate), so identical prompts map to the same file for
+    every user. Each file has its own metadata entry (size and last use) in
+    the shared Django cache, and running totals are kept in two counters, so
+    a lookup reads one small entry. When a store pushes the totals past
+    TTS_CACHE_MAX_BYTES / TTS_CACHE_MAX_ENTRIES, one worker scans the stored
+    files and deletes the least recently used ones down to EVICTION_LOW_WATER
+    of each limit. If the metadata is lost,
+    files are found again by path and the totals are rebuilt by the next scan.
+    """
+
+    def __init__(self, prefix: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.prefix = prefix or getattr(settings, 'TTS_CACHE_PREFIX', 'tts_cache')
+        self.max_bytes = max_bytes or getattr(settings, 'TTS_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+        self.max_entries = max_entries or getattr(settings, 'TTS_CACHE_MAX_ENTRIES', 10000)
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(text: str, language: str, gender: str, sampling_rate: int) -> str:
+        normalized = unicodedata.normalize('NFC', text.strip())
+        material = json.dumps([normalized, language, gender, int(sampling_rate)], ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return f"{self.prefix}/{key[:2]}/{key}.wav"
+
+    def get_or_synthesize(self, text: str, language: str, gender: str, sampling_rate: int,
+                          synthesize: Callable[[], bytes]) -> Dict:
+        """
+        Return {'audio_url', 'path', 'size', 'cached'} for the prompt, calling
+        synthesize() (which must return WAV bytes) only on a miss.
+        """
+        key = self.make_key(text, language, gender, sampling_rate)
+
+        entry = self._lookup(key)
+        if entry:
+            self._record('hits')
+            return self._describe(entry, cached=True)
+
+        self._record('misses')
+        audio_data = synthesize()
+        entry = self._store(key, audio_data)
+        return self._describe(entry, cached=False)
+
+    def get_cached(self, text: str, language: str, gender: str, sampling_rate: int) -> Optional[Dict]:
+        """Return the stored audio for the prompt, or None without synthesizing"""
+        entry = self._lookup(self.make_key(text, language, gender, sampling_rate))
+        self._record('hits' if entry else 'misses')
+        return self._describe(entry, cached=True) if entry else None
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+
+        totals = self._read_totals()
+        stats['entries'] = totals.get(TOTAL_ENTRIES_KEY, 0)
+        stats['total_bytes'] = totals.get(TOTAL_BYTES_KEY, 0)
+        return stats
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        try:
+            entry = cache.get(self._entry_key(key))
+        except Exception as e:
+            logger.warning(f"TTS cache entry read failed: {e}")
+            entry = None
+
+        if entry:
+            if now - entry['last_used'] > TOUCH_INTERVAL:
+                self._write_entry(key, dict(entry, last_used=now))
+            return entry
+
+        # The metadata lives in the cache and may have been flushed; the file path is deterministic
+        path = self.path_for(key)
+        try:
+            if not default_storage.exists(path):
+                return None
+            entry = {'path': path, 'size': default_storage.size(path), 'last_used': now}
+        except Exception as e:
+            logger.warning(f"TTS cache storage lookup failed: {e}")
+            return None
+
+        if self._add_entry(key, entry):
+            self._adjust_totals(1, entry['size'])
+        return entry
+
+    def _store(self, key: str, audio_data: bytes) -> Dict:
+        path = self.path_for(key)
+        # Another worker may have synthesized the same prompt meanwhile
+        if not default_storage.exists(path):
+            saved = default_storage.save(path, ContentFile(audio_data))
+            if saved != path:
+                # It won the race to the same path and storage renamed our copy; keep only its file
+                default_storage.delete(saved)
+
+        entry = {'path': path, 'size': len(audio_data), 'last_used': time.time()}
+        if not self._add_entry(key, entry):
+            self._write_entry(key, entry)
+            return entry
+
+        totals = self._adjust_totals(1, entry['size'])
+        # Missing totals (a flushed cache) are rebuilt by the scan
+        if totals is None or totals[0] > self.max_entries or totals[1] > self.max_bytes:
+            self._evict(keep=key)
+        return entry
+
+    def _evict(self, keep: str):
+        """
+        Scan the stored files, delete the least recently used until the
+        cache is down to EVICTION_LOW_WATER of its limits, and reset the
+        totals to what remains. Only one worker scans at a time; the others
+        leave it to that worker.
+        """
+        token = self._acquire_eviction_lock()
+        if not token:
+            logger.info("TTS cache eviction already running in another worker")
+            return
+
+        try:
+            target_bytes = int(self.max_bytes * EVICTION_LOW_WATER)
+            target_entries = max(1, int(self.max_entries * EVICTION_LOW_WATER))
+            entries = self._scan()
+            total_bytes = sum(entry['size'] for entry in entries.values())
+            evicted = []
+            for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+                if total_bytes <= target_bytes and len(entries) - len(evicted) <= target_entries:
+                    break
+                if key == keep:
+                    continue
+                evicted.append(key)
+                total_bytes -= entries[key]['size']
+
+            for key in evicted:
+                try:
+                    cache.delete(self._entry_key(key))
+                    default_storage.delete(entries[key]['path'])
+                except Exception as e:
+                    logger.warning(f"Failed to delete evicted TTS audio {entries[key]['path']}: {e}")
+
+            cache.set_many({TOTAL_ENTRIES_KEY: len(entries) - len(evicted), TOTAL_BYTES_KEY: total_bytes},
+                           timeout=None)
+            if evicted:
+                self._record('evictions', len(evicted))
+        except Exception as e:
+            logger.warning(f"TTS cache eviction failed: {e}")
+        finally:
+            self._release_eviction_lock(token)
+
+    def _scan(self) -> Dict[str, Dict]:
+        """Every stored file with its metadata, falling back to storage for entries the cache lost"""
+        paths = {}
+        shards, _ = default_storage.listdir(self.prefix)
+        for shard in shards:
+            _, files = default_storage.listdir(f"{self.prefix}/{shard}")
+            for name in files:
+                if name.endswith('.wav'):
+                    paths[name[:-len('.wav')]] = f"{self.prefix}/{shard}/{name}"
+
+        stored = cache.get_many([self._entry_key(key) for key in paths])
+        entries = {}
+        for key, path in paths.items():
+            entry = stored.get(self._entry_key(key))
+            if entry is None:
+                entry = {
+                    'path': path,
+                    'size': default_storage.size(path),
+                    'last_used': default_storage.get_modified_time(path).timestamp(),
+                }
+            entries[key] = entry
+        return entries
+
+    def _entry_key(self, key: str) -> str:
+        return f"{ENTRY_KEY_PREFIX}:{key}"
+
+    def _add_entry(self, key: str, entry: Dict) -> bool:
+        """Record a new entry; False if it was already recorded (or the cache is unavailable)"""
+        try:
+            return cache.add(self._entry_key(key), entry, timeout=None)
+        except Exception as e:
+            logger.warning(f"TTS cache entry write failed: {e}")
+            return False
+
+    def _write_entry(self, key: str, entry: Dict):
+        try:
+            cache.set(self._entry_key(key), entry, timeout=None)
+        except Exception as e:
+            logger.warning(f"TTS cache entry write failed: {e}")
+
+    def _adjust_totals(self, entries: int, size: int) -> Optional[Tuple[int, int]]:
+        """Add to the shared totals and return (entries, bytes), or None if the totals are missing"""
+        try:
+            return cache.incr(TOTAL_ENTRIES_KEY, entries), cache.incr(TOTAL_BYTES_KEY, size)
+        except ValueError:
+            return None
+        except Exception as e:
+            logger.warning(f"TTS cache totals update failed: {e}")
+            return None
+
+    def _read_totals(self) -> Dict:
+        try:
+            return cache.get_many([TOTAL_ENTRIES_KEY, TOTAL_BYTES_KEY])
+        except Exception as e:
+            logger.warning(f"TTS cache totals read failed: {e}")
+            return {}
+
+    @staticmethod
+    def _acquire_eviction_lock() -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            return token if cache.add(EVICTION_LOCK_KEY, token, timeout=EVICTION_LOCK_TIMEOUT) else None
+        except Exception as e:
+            logger.warning(f"TTS cache eviction lock failed: {e}")
+            return None
+
+    @staticmethod
+    def _release_eviction_lock(token: str):
+        """Release the lock only if it is still ours, not one another worker took after it expired"""
+        try:
+            if cache.get(EVICTION_LOCK_KEY) == token:
+                cache.delete(EVICTION_LOCK_KEY)
+        except Exception as e:
+            logger.warning(f"TTS cache eviction lock release failed: {e}")
+
+    def _describe(self, entry: Dict, cached: bool) -> Dict:
+        return {
+            'audio_url': default_storage.url(entry['path']),
+            'path': entry['path'],
+            'size': entry['size'],
+            'cached': cached,
+        }
+
+    def _record(self, counter: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[counter] += amount
+
+
+tts_audio_cache = TTSAudioCache()
@@ -0,0 +1,40 @@
+# apps/speech_processing/upload_handlers.py
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+class HashingUploadHandlerMixin:
+    """
+    Computes each uploaded file's sha256 while Django receives it.
+
+    The digest is stored on the resulting file as ``sha256``, so
+    transcript_cache.hash_audio does not read the upload a second time.
+    Only the handler that keeps the data (the one returning None from
+    receive_data_chunk) hashes it.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Set first: MemoryFileUploadHandler.new_file raises StopFutureHandlers
+        self.digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        passed_on = super().receive_data_chunk(raw_data, start)
+        if passed_on is None:
+            self.digest.update(raw_data)
+        return passed_on
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
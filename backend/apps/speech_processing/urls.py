@@ -1,10 +1,14 @@
 # ============ apps/speech_processing/urls.py ============
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('speech-to-text/', views.speech_to_text, name='speech_to_text'),
     path('text-to-speech/', views.text_to_speech, name='text_to_speech'),
     path('analyze-speech/', views.analyze_speech_for_form, name='analyze_speech_for_form'),
     path('translate/', views.translate_text, name='translate_text'),
+
+    # Async (ASGI) endpoints
+    path('async/speech-to-text/', async_views.speech_to_text_async, name='speech_to_text_async'),
+    path('async/translate/', async_views.translate_texts_async, name='translate_texts_async'),
 ]
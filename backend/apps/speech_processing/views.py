@@ -3,15 +3,18 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import tempfile
-import os
 import json
+from django.conf import settings
 from .bhashini_client import BhashiniClient
 from .azure_openai_client import AzureOpenAIClient
+from .voice_prompts import build_voice_prompt, get_ready_voice_prompt
+from .audio_metadata import probe_wav, upload_limit_error
+from .resilience import CircuitOpenError
+from .transcript_cache import hash_audio
+from .language_id import identify_language, language_id_stats
 from apps.legal_forms.models import LegalCase, CaseTypeMapping
 from apps.legal_forms.services.case_processor import CaseProcessor
+from apps.legal_forms.services.keyword_matcher import keyword_matcher
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,7 +25,7 @@ def speech_to_text_legal(request):
     """Enhanced speech to text specifically for legal case processing"""
     try:
         audio_file = request.FILES.get('audio')
-        source_language = request.data.get('language', 'hi')
+        source_language, language_chosen = _requested_language(request)
         case_id = request.data.get('case_id')  # Optional: for context-aware processing
         
         if not audio_file:
@@ -31,16 +34,15 @@ def speech_to_text_legal(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Save audio file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            for chunk in audio_file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-
         try:
-            # Use BHASHINI for speech recognition
-            bhashini_client = BhashiniClient()
-            result = bhashini_client.speech_to_text(temp_file_path, source_language)
+            audio_metadata, rejection = _probe_upload(audio_file)
+            if rejection:
+                return rejection
+
+            # Use BHASHINI for speech recognition; the upload is streamed into
+            # the request body without an intermediate temp file
+            result = _transcribe_upload(audio_file, source_language, reroute=not language_chosen)
+            source_language = result['language']
             
             transcribed_text = result['text']
             confidence = result['confidence']
@@ -53,9 +55,13 @@ def speech_to_text_legal(request):
                 'language': result['language'],
                 'word_count': len(transcribed_text.split()),
                 'processing_metadata': {
-                    'audio_duration_estimate': _estimate_audio_duration(temp_file_path),
+                    'audio_duration': audio_metadata['duration'] if audio_metadata else None,
+                    'audio_format': audio_metadata,
                     'language_detected': source_language,
-                    'bhashini_service_used': True
+                    'language_identification': result.get('language_id'),
+                    'bhashini_service_used': True,
+                    'transcript_cached': result.get('cached', False),
+                    'upload': result.get('payload_stats', {})
                 }
             }
             
@@ -75,11 +81,13 @@ def speech_to_text_legal(request):
                 enhanced_result['suggested_case_types'] = _suggest_case_types(legal_keywords)
             
             return Response(enhanced_result)
-            
+
         finally:
-            # Clean up temporary file
-            os.unlink(temp_file_path)
-            
+            audio_file.close()
+
+    except CircuitOpenError as e:
+        return _service_unavailable(e)
+
     except Exception as e:
         logger.error(f"Enhanced speech to text conversion failed: {e}")
         return Response(
@@ -93,7 +101,7 @@ def process_voice_legal_input(request):
     """Process voice input directly for legal case creation"""
     try:
         audio_file = request.FILES.get('audio')
-        source_language = request.data.get('language', 'hi')
+        source_language, language_chosen = _requested_language(request)
         
         if not audio_file:
             return Response(
@@ -101,17 +109,17 @@ def process_voice_legal_input(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Convert speech to text
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            for chunk in audio_file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-
         try:
-            # Speech recognition
-            bhashini_client = BhashiniClient()
-            speech_result = bhashini_client.speech_to_text(temp_file_path, source_language)
+            _, rejection = _probe_upload(audio_file)
+            if rejection:
+                return rejection
+
+            # Speech recognition and translation to English in one pipeline call
+            speech_result = _transcribe_upload(
+                audio_file, source_language, target_language='en', reroute=not language_chosen
+            )
             transcribed_text = speech_result['text']
+            source_language = speech_result['language']
             
             # Process as legal case input
             case_processor = CaseProcessor()
@@ -119,14 +127,18 @@ def process_voice_legal_input(request):
                 user=request.user,
                 input_text=transcribed_text,
                 mode='voice',
-                language=source_language
+                language=source_language,
+                translated_text=speech_result.get('translated_text')
             )
             
             # Prepare comprehensive response
             response_data = {
                 'success': True,
                 'transcription': transcribed_text,
+                'translated_text': speech_result.get('translated_text'),
                 'speech_confidence': speech_result['confidence'],
+                'language': source_language,
+                'language_identification': speech_result.get('language_id'),
                 'case_id': str(case.case_id),
                 'case_status': case.status,
                 'requires_questions': len(case.questions_asked) > 0
@@ -143,8 +155,7 @@ def process_voice_legal_input(request):
                 
                 # Generate voice prompt for first question if needed
                 if case.questions_asked:
-                    voice_prompt = _generate_voice_prompt(case.get_current_question(), source_language)
-                    response_data['voice_prompt'] = voice_prompt
+                    response_data.update(_voice_prompt_fields(case.get_current_question(), source_language))
             else:
                 response_data.update({
                     'error': case.error_details or 'Could not determine case type',
@@ -154,8 +165,11 @@ def process_voice_legal_input(request):
             return Response(response_data)
             
         finally:
-            os.unlink(temp_file_path)
+            audio_file.close()
             
+    except CircuitOpenError as e:
+        return _service_unavailable(e)
+
     except Exception as e:
         logger.error(f"Voice legal input processing failed: {e}")
         return Response(
@@ -170,7 +184,7 @@ def answer_question_by_voice(request):
     try:
         audio_file = request.FILES.get('audio')
         case_id = request.data.get('case_id')
-        source_language = request.data.get('language', 'hi')
+        source_language, language_chosen = _requested_language(request)
         
         if not audio_file or not case_id:
             return Response(
@@ -187,17 +201,15 @@ def answer_question_by_voice(request):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Convert speech to text
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            for chunk in audio_file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-
         try:
+            _, rejection = _probe_upload(audio_file)
+            if rejection:
+                return rejection
+
             # Speech recognition
-            bhashini_client = BhashiniClient()
-            speech_result = bhashini_client.speech_to_text(temp_file_path, source_language)
+            speech_result = _transcribe_upload(audio_file, source_language, reroute=not language_chosen)
             answer_text = speech_result['text']
+            source_language = speech_result['language']
             
             # Validate answer based on question context
             current_question = case.get_current_question()
@@ -219,6 +231,8 @@ def answer_question_by_voice(request):
                 'transcribed_answer': answer_text,
                 'validated_answer': validated_answer,
                 'speech_confidence': speech_result['confidence'],
+                'language': source_language,
+                'language_identification': speech_result.get('language_id'),
                 'question_answered': current_question,
                 'questioning_complete': case.is_questioning_complete()
             }
@@ -228,9 +242,8 @@ def answer_question_by_voice(request):
                 next_question = case.get_current_question()
                 response_data['next_question'] = next_question
                 
-                # Generate voice prompt for next question
-                voice_prompt = _generate_voice_prompt(next_question, source_language)
-                response_data['voice_prompt'] = voice_prompt
+                # Voice prompt for next question, with pre-synthesized audio when warmed
+                response_data.update(_voice_prompt_fields(next_question, source_language))
             else:
                 # All questions answered
                 response_data['ready_for_generation'] = True
@@ -240,8 +253,11 @@ def answer_question_by_voice(request):
             return Response(response_data)
             
         finally:
-            os.unlink(temp_file_path)
+            audio_file.close()
             
+    except CircuitOpenError as e:
+        return _service_unavailable(e)
+
     except Exception as e:
         logger.error(f"Voice answer processing failed: {e}")
         return Response(
@@ -257,6 +273,7 @@ def generate_voice_guidance(request):
         text = request.data.get('text')
         target_language = request.data.get('language', 'hi')
         guidance_type = request.data.get('type', 'general')  # general, question, instruction
+        gender = request.data.get('gender', 'female')
         
         if not text:
             return Response(
@@ -267,22 +284,22 @@ def generate_voice_guidance(request):
         # Enhance text based on guidance type
         enhanced_text = _enhance_guidance_text(text, guidance_type, target_language)
         
-        # Convert to speech using BHASHINI
+        # Convert to speech using BHASHINI; identical prompts are served from the TTS cache
         bhashini_client = BhashiniClient()
-        audio_data = bhashini_client.text_to_speech(enhanced_text, target_language)
-        
-        # Save audio file
-        file_name = f"guidance_{request.user.id}_{target_language}_{guidance_type}.wav"
-        file_path = default_storage.save(file_name, ContentFile(audio_data))
+        audio = bhashini_client.text_to_speech_cached(enhanced_text, target_language, gender)
         
         return Response({
             'success': True,
-            'audio_url': default_storage.url(file_path),
+            'audio_url': audio['audio_url'],
+            'cached': audio['cached'],
             'text': enhanced_text,
             'language': target_language,
             'guidance_type': guidance_type
         })
         
+    except CircuitOpenError as e:
+        return _service_unavailable(e)
+
     except Exception as e:
         logger.error(f"Voice guidance generation failed: {e}")
         return Response(
@@ -292,15 +309,71 @@ def generate_voice_guidance(request):
 
 # Helper functions
 
-def _estimate_audio_duration(file_path):
-    """Estimate audio duration from file size"""
-    try:
-        file_size = os.path.getsize(file_path)
-        # Rough estimate: 16kHz, 16-bit mono WAV ≈ 32KB per second
-        estimated_duration = file_size / 32000
-        return round(estimated_duration, 2)
-    except:
-        return 0.0
+def _service_unavailable(error):
+    """503 for calls rejected by an open BHASHINI circuit breaker"""
+    return Response(
+        {
+            'error': 'Speech service temporarily unavailable',
+            'code': error.code,
+            'retry_after': error.retry_after
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(error.retry_after)}
+    )
+
+def _probe_upload(audio_file):
+    """Read the upload's WAV header; returns (metadata, 413 response if over the upload limits)"""
+    metadata = probe_wav(audio_file)
+    limit_error = upload_limit_error(audio_file.size, metadata)
+    if limit_error:
+        return metadata, Response(
+            {'error': 'Audio upload too large', 'details': limit_error},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    return metadata, None
+
+def _requested_language(request):
+    """(language, chosen): the client's language, else the user's preferred one"""
+    language = request.data.get('language')
+    if language:
+        return language, True
+
+    preferred = getattr(request.user, 'preferred_language', None)
+    return (preferred if preferred in settings.SUPPORTED_LANGUAGES else 'hi'), False
+
+def _transcribe_upload(audio_file, source_language, target_language=None, reroute=False):
+    """
+    ASR (chained with translation when target_language is given) for an upload.
+
+    The transcript's script is checked against source_language. On a
+    confident mismatch the audio is transcribed again in the identified
+    language if reroute is set (the client did not choose a language);
+    otherwise the result only carries the suggestion in 'language_id'.
+    """
+    audio_hash = hash_audio(audio_file)
+    result = _recognize_upload(audio_file, audio_hash, source_language, target_language)
+
+    identified = identify_language(result['text'], source_language)
+    if identified['mismatch'] and reroute and getattr(settings, 'LANGUAGE_ID_AUTO_REROUTE', True):
+        logger.info(f"Re-routing ASR from {source_language} to {identified['language']}")
+        rerouted = _recognize_upload(audio_file, audio_hash, identified['language'], target_language)
+        confirmed = identify_language(rerouted['text'], identified['language'])
+        language_id_stats.record_reroute(confirmed['language'] == identified['language'])
+        rerouted['language_id'] = dict(identified, rerouted_from=source_language)
+        return rerouted
+
+    result['language_id'] = identified
+    return result
+
+def _recognize_upload(audio_file, audio_hash, source_language, target_language=None):
+    """
+    ASR for an upload, answered from the transcript cache when the same
+    recording (by sha256 of its bytes) was transcribed before, e.g. a retried upload.
+    """
+    bhashini_client = BhashiniClient()
+    if target_language:
+        return bhashini_client.speech_to_english(audio_file, source_language, target_language, audio_hash)
+    return bhashini_client.speech_to_text(audio_file, source_language, audio_hash)
 
 def _analyze_legal_context(text, case):
     """Analyze text in the context of the legal case"""
@@ -312,10 +385,9 @@ def _analyze_legal_context(text, case):
     
     if case.detected_case_type:
         case_keywords = case.detected_case_type.keywords
-        text_lower = text.lower()
         
         # Check for case-type specific keywords
-        matching_keywords = [kw for kw in case_keywords if kw.lower() in text_lower]
+        matching_keywords = keyword_matcher.keywords_for_case_type(text, case.detected_case_type)
         
         if matching_keywords:
             analysis['confidence_boost'] = min(0.2, len(matching_keywords) * 0.05)
@@ -326,18 +398,7 @@ def _analyze_legal_context(text, case):
 
 def _detect_legal_keywords(text):
     """Detect legal keywords in text"""
-    legal_keywords = [
-        'complaint', 'petition', 'case', 'court', 'legal', 'law', 'judge', 'lawyer',
-        'damage', 'injury', 'accident', 'contract', 'agreement', 'breach', 'violation',
-        'property', 'rent', 'tenant', 'landlord', 'money', 'payment', 'compensation',
-        # Add Hindi/regional language keywords
-        'शिकायत', 'न्यायालय', 'कानून', 'न्यायाधीश', 'वकील', 'नुकसान', 'चोट', 'दुर्घटना',
-        'अनुबंध', 'समझौता', 'उल्लंघन', 'संपत्ति', 'किराया', 'किरायेदार', 'मकान मालिक',
-    ]
-    
-    text_lower = text.lower()
-    detected = [kw for kw in legal_keywords if kw in text_lower]
-    return detected
+    return keyword_matcher.detect_legal_keywords(text)
 
 def _suggest_case_types(keywords):
     """Suggest case types based on detected keywords"""
@@ -358,16 +419,15 @@ def _suggest_case_types(keywords):
     
     return list(set(suggestions))
 
-def _generate_voice_prompt(question, language):
-    """Generate voice prompt for a question"""
-    prompts = {
-        'hi': f"कृपया निम्नलिखित प्रश्न का उत्तर दें: {question}",
-        'en': f"Please answer the following question: {question}",
-        'te': f"దయచేసి ఈ ప్రశ్నకు సమాధానం ఇవ్వండి: {question}",
-        'ta': f"தயவுசெய்து பின்வரும் கேள்விக்கு பதிலளிக்கவும்: {question}",
-    }
-    
-    return prompts.get(language, prompts['en'])
+def _voice_prompt_fields(question, language):
+    """Voice prompt for a question, plus its audio URL if warm_voice_prompts has synthesized it"""
+    ready_prompt = get_ready_voice_prompt(question, language)
+    if ready_prompt:
+        return {
+            'voice_prompt': ready_prompt['text'],
+            'voice_prompt_audio_url': ready_prompt['audio_url'],
+        }
+    return {'voice_prompt': build_voice_prompt(question, language)}
 
 def _get_voice_suggestions(language):
     """Get voice suggestions for unclear input"""
@@ -0,0 +1,161 @@
+# apps/speech_processing/voice_prompts.py
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .bhashini_client import BhashiniClient
+from .tts_cache import tts_audio_cache
+
+logger = logging.getLogger(__name__)
+
+# QuestionMapping.question is authored in English
+QUESTION_LANGUAGE = 'en'
+PROMPT_GENDER = 'female'
+PROMPT_SAMPLING_RATE = 22050
+
+PROMPT_LEAD_IN = "Please answer the following question:"
+PROMPT_TEMPLATES = {
+    'hi': "कृपया निम्नलिखित प्रश्न का उत्तर दें: {question}",
+    'en': PROMPT_LEAD_IN + " {question}",
+    'te': "దయచేసి ఈ ప్రశ్నకు సమాధానం ఇవ్వండి: {question}",
+    'ta': "தயவுசெய்து பின்வரும் கேள்விக்கு பதிலளிக்கவும்: {question}",
+}
+# Templates for other languages are translated from PROMPT_LEAD_IN while warming
+TRANSLATED_TEMPLATE_KEY = 'voice_prompt_template:{language}'
+
+
+def build_voice_prompt(question: str, language: str, template: Optional[str] = None) -> str:
+    """Wrap a (localized) question in the spoken prompt for language"""
+    return (template or prompt_template(language)).format(question=question)
+
+
+def prompt_template(language: str) -> str:
+    """The built-in template, else the one translated by warm_voice_prompts, else English"""
+    if language in PROMPT_TEMPLATES:
+        return PROMPT_TEMPLATES[language]
+    try:
+        translated = cache.get(TRANSLATED_TEMPLATE_KEY.format(language=language))
+    except Exception as e:
+        logger.warning(f"Voice prompt template lookup failed: {e}")
+        translated = None
+    return translated or PROMPT_TEMPLATES[QUESTION_LANGUAGE]
+
+
+def localize_questions(questions: List[str], language: str, client: BhashiniClient) -> Tuple[List[str], str]:
+    """
+    Translate questions into language with one translate_batch call and
+    return (localized questions, prompt template). For a language without a
+    built-in template, PROMPT_LEAD_IN is translated in the same batch and
+    the resulting template is cached for build_voice_prompt.
+    """
+    if language == QUESTION_LANGUAGE:
+        return list(questions), PROMPT_TEMPLATES[language]
+
+    needs_template = language not in PROMPT_TEMPLATES
+    texts = list(questions) + ([PROMPT_LEAD_IN] if needs_template else [])
+    localized = [translation['translated_text'] for translation in client.translate_batch(texts, QUESTION_LANGUAGE, language)]
+    if not needs_template:
+        return localized, PROMPT_TEMPLATES[language]
+
+    lead_in = localized.pop().strip().replace('{', '{{').replace('}', '}}')
+    template = lead_in + " {question}"
+    cache.set(TRANSLATED_TEMPLATE_KEY.format(language=language), template, timeout=None)
+    return localized, template
+
+
+def _ready_prompt_key(question: str, language: str) -> str:
+    digest = hashlib.sha256(question.strip().encode('utf-8')).hexdigest()
+    return f"voice_prompt:{language}:{digest}"
+
+
+def get_ready_voice_prompt(question: str, language: str) -> Optional[Dict]:
+    """
+    Return {'text', 'audio_url'} for a question that has already been warmed.
+
+    Never calls BHASHINI: returns None if the prompt was not pre-synthesized
+    or its audio has since been evicted from the TTS cache.
+    """
+    if not question:
+        return None
+
+    try:
+        prompt = cache.get(_ready_prompt_key(question, language))
+    except Exception as e:
+        logger.warning(f"Voice prompt lookup failed: {e}")
+        return None
+    if not prompt:
+        return None
+
+    audio = tts_audio_cache.get_cached(prompt['text'], language, PROMPT_GENDER, PROMPT_SAMPLING_RATE)
+    if not audio:
+        return None
+    return {'text': prompt['text'], 'audio_url': audio['audio_url']}
+
+
+def warm_voice_prompt(question: str, language: str, client: Optional[BhashiniClient] = None,
+                      localized: Optional[str] = None, template: Optional[str] = None) -> Dict:
+    """Translate (unless localized is given) and synthesize one question prompt into the TTS cache"""
+    client = client or BhashiniClient()
+
+    if localized is None:
+        [localized], template = localize_questions([question], language, client)
+
+    text = build_voice_prompt(localized, language, template)
+    audio = client.text_to_speech_cached(text, language, PROMPT_GENDER, PROMPT_SAMPLING_RATE)
+    cache.set(_ready_prompt_key(question, language), {'text': text}, timeout=None)
+    return {'text': text, 'audio_url': audio['audio_url'], 'cached': audio['cached']}
+
+
+def warm_voice_prompts(questions: Iterable[str], languages: Optional[Iterable[str]] = None,
+                       max_workers: Optional[int] = None) -> Dict:
+    """
+    Pre-synthesize prompts for every (question, language) pair in parallel.
+
+    Questions are translated with one batched request per language (along
+    with the prompt's lead-in for languages without a template), then
+    synthesized with concurrency bounded by VOICE_PROMPT_WARM_CONCURRENCY so
+    warming does not exhaust the BHASHINI connection pool. Failures are
+    counted and logged rather than aborting the run.
+    """
+    languages = list(languages or settings.SUPPORTED_LANGUAGES.keys())
+    questions = [question for question in dict.fromkeys(questions) if question]
+    max_workers = max_workers or getattr(settings, 'VOICE_PROMPT_WARM_CONCURRENCY', 4)
+    client = BhashiniClient()
+
+    summary = {'prompts': len(questions) * len(languages), 'synthesized': 0, 'already_cached': 0, 'failed': 0}
+    if not questions:
+        return summary
+
+    pairs = []
+    for language in languages:
+        try:
+            localized, template = localize_questions(questions, language, client)
+        except Exception as e:
+            logger.error(f"Failed to translate voice prompts to {language}: {e}")
+            summary['failed'] += len(questions)
+            continue
+        pairs.extend((question, language, text, template) for question, text in zip(questions, localized))
+
+    def warm(pair):
+        question, language, localized, template = pair
+        try:
+            return warm_voice_prompt(question, language, client, localized, template)
+        except Exception as e:
+            logger.error(f"Failed to warm voice prompt ({language}) for '{question[:50]}': {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='voice-prompts') as executor:
+        results: List[Optional[Dict]] = list(executor.map(warm, pairs))
+
+    for result in results:
+        if result is None:
+            summary['failed'] += 1
+        elif result['cached']:
+            summary['already_cached'] += 1
+        else:
+            summary['synthesized'] += 1
+    return summary
@@ -0,0 +1,39 @@
+"""
+ASGI config for legal_app_backend project.
+
+Serves the same Django application as wsgi.py; async views (for example the
+BHASHINI endpoints in apps.speech_processing.async_views) only release the
+worker while awaiting I/O when the project runs under an ASGI server such as
+``uvicorn legal_app_backend.asgi:application``.
+
+WebSocket connections are routed to the plain ASGI handlers in
+WEBSOCKET_ROUTES; everything else goes to Django.
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'legal_app_backend.settings')
+
+django_application = get_asgi_application()
+
+# Imported after Django is set up, since the handlers use models and settings
+from apps.legal_forms.services.detection_model import warm_up_case_detection  # noqa: E402
+from apps.speech_processing.streaming_transcription import transcription_websocket  # noqa: E402
+
+# Case type detection models are loaded (or fitted) here, before the worker accepts requests
+warm_up_case_detection()
+
+WEBSOCKET_ROUTES = {
+    '/ws/speech/transcribe/': transcription_websocket,
+}
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        handler = WEBSOCKET_ROUTES.get(scope['path'])
+        if handler is None:
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        return await handler(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -3,6 +3,7 @@
 # ============ backend/legal_app_backend/celery.py ============
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 from django.conf import settings
 
 # Set default Django settings
@@ -16,6 +17,13 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Auto-discover tasks from all registered Django apps
 app.autodiscover_tasks()
 
+
+@worker_process_init.connect
+def warm_up_worker_process(**kwargs):
+    """Load the case type detection models in each pool process before it runs tasks"""
+    from apps.legal_forms.services.detection_model import warm_up_case_detection
+    warm_up_case_detection()
+
 # Periodic tasks configuration
 from celery.schedules import crontab
 
@@ -90,12 +90,107 @@ BHASHINI_USER_ID = config('BHASHINI_USER_ID', default='udyat')
 BHASHINI_INFERENCE_API_KEY = config('BHASHINI_INFERENCE_API_KEY', 
     default='uPUvNS1__NtJYtMIyyu6QGMFLzZWccanxPanZE7QR4vO2Ljumu8T87tX69MPdy7fuPUvNS1__NtJYtMI4vO2Ljumu8T87tX69MPdy7f')
 BHASHINI_BASE_URL = config('BHASHINI_BASE_URL', default='https://meity-auth.ulcacontrib.org')
+BHASHINI_PIPELINE_ID = config('BHASHINI_PIPELINE_ID', default='64392f96daac500b55c543cd')
+BHASHINI_PIPELINE_CONFIG_TTL = config('BHASHINI_PIPELINE_CONFIG_TTL', default=3600, cast=int)  # seconds
+BHASHINI_PIPELINE_CONFIG_REFRESH_MARGIN = config('BHASHINI_PIPELINE_CONFIG_REFRESH_MARGIN', default=300, cast=int)
+
+# Shared BHASHINI HTTP transport (one pooled session per worker process)
+BHASHINI_POOL_MAXSIZE = config('BHASHINI_POOL_MAXSIZE', default=20, cast=int)
+BHASHINI_CONFIG_RETRIES = config('BHASHINI_CONFIG_RETRIES', default=3, cast=int)
+# Per-operation (connect, read) overrides in seconds; defaults are transport.DEFAULT_TIMEOUTS
+BHASHINI_TIMEOUTS = {}
+BHASHINI_ASYNC_MAX_CONCURRENCY = config('BHASHINI_ASYNC_MAX_CONCURRENCY', default=8, cast=int)
+
+# Per-endpoint circuit breaker, shared across workers through CACHES['default']
+BHASHINI_CIRCUIT_BREAKER = {
+    'failure_rate': 0.5,
+    'slow_call_rate': 0.8,
+    'slow_call_fraction': 0.5,  # of the operation's read timeout
+    'minimum_calls': 10,
+    'window_seconds': 60,
+    'open_seconds': config('BHASHINI_CIRCUIT_OPEN_SECONDS', default=30, cast=int),
+}
+# Re-send slow ASR requests after the recent p95 latency and keep the first response
+BHASHINI_ASR_HEDGING_ENABLED = config('BHASHINI_ASR_HEDGING_ENABLED', default=False, cast=bool)
+BHASHINI_ASR_HEDGE_PERCENTILE = config('BHASHINI_ASR_HEDGE_PERCENTILE', default=95, cast=int)
+
+# Long recordings are cut at silences and the segments transcribed in parallel
+BHASHINI_ASR_MAX_SEGMENT_SECONDS = config('BHASHINI_ASR_MAX_SEGMENT_SECONDS', default=30, cast=int)
+BHASHINI_ASR_MAX_PARALLEL_SEGMENTS = config('BHASHINI_ASR_MAX_PARALLEL_SEGMENTS', default=4, cast=int)
+# Downmix/resample WAV uploads to 16 kHz mono (and trim edge silence) before sending
+BHASHINI_ASR_NORMALIZE_AUDIO = config('BHASHINI_ASR_NORMALIZE_AUDIO', default=True, cast=bool)
+BHASHINI_ASR_TRIM_SILENCE = config('BHASHINI_ASR_TRIM_SILENCE', default=True, cast=bool)
+# Uploads over these limits are rejected with 413 before any BHASHINI call. The byte
+# limit applies to PCM WAVs once normalized to 16 kHz mono, and to other files as uploaded
+AUDIO_UPLOAD_MAX_BYTES = config('AUDIO_UPLOAD_MAX_BYTES', default=25 * 1024 * 1024, cast=int)
+AUDIO_UPLOAD_MAX_SECONDS = config('AUDIO_UPLOAD_MAX_SECONDS', default=600, cast=int)
+# Django's default upload handlers, also computing each upload's sha256 as it is received
+FILE_UPLOAD_HANDLERS = [
+    'apps.speech_processing.upload_handlers.HashingMemoryFileUploadHandler',
+    'apps.speech_processing.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+# Live transcription over /ws/speech/transcribe/ cuts a segment at a pause this long...
+STREAMING_ASR_PAUSE_MS = config('STREAMING_ASR_PAUSE_MS', default=500, cast=int)
+# ...or, failing one, once this much audio has been buffered
+STREAMING_ASR_MAX_SEGMENT_SECONDS = config('STREAMING_ASR_MAX_SEGMENT_SECONDS', default=15, cast=int)
+
+# Content-addressed cache of synthesized speech in default_storage
+TTS_CACHE_PREFIX = config('TTS_CACHE_PREFIX', default='tts_cache')
+TTS_CACHE_MAX_BYTES = config('TTS_CACHE_MAX_BYTES', default=500 * 1024 * 1024, cast=int)
+TTS_CACHE_MAX_ENTRIES = config('TTS_CACHE_MAX_ENTRIES', default=10000, cast=int)
+VOICE_PROMPT_WARM_CONCURRENCY = config('VOICE_PROMPT_WARM_CONCURRENCY', default=4, cast=int)
+
+# Memo of BHASHINI translations (in-process LRU in front of CACHES['default'])
+TRANSLATION_MEMO_TTL = config('TRANSLATION_MEMO_TTL', default=30 * 24 * 3600, cast=int)
+TRANSLATION_MEMO_LOCAL_ENTRIES = config('TRANSLATION_MEMO_LOCAL_ENTRIES', default=4096, cast=int)
+# Transcripts by audio sha256 and language, so re-uploads after a timeout skip ASR
+ASR_TRANSCRIPT_CACHE_TTL = config('ASR_TRANSCRIPT_CACHE_TTL', default=24 * 3600, cast=int)
+ASR_TRANSCRIPT_CACHE_LOCAL_ENTRIES = config('ASR_TRANSCRIPT_CACHE_LOCAL_ENTRIES', default=512, cast=int)
+# Script-based language ID of transcripts: when the client sent no language and the
+# transcript is confidently in another one, ASR is re-run in the identified language
+LANGUAGE_ID_AUTO_REROUTE = config('LANGUAGE_ID_AUTO_REROUTE', default=True, cast=bool)
+LANGUAGE_ID_MIN_CONFIDENCE = config('LANGUAGE_ID_MIN_CONFIDENCE', default=0.8, cast=float)
+# Limits for packing several segments into one translation request
+BHASHINI_TRANSLATION_BATCH_MAX_CHARS = config('BHASHINI_TRANSLATION_BATCH_MAX_CHARS', default=5000, cast=int)
+BHASHINI_TRANSLATION_BATCH_MAX_SEGMENTS = config('BHASHINI_TRANSLATION_BATCH_MAX_SEGMENTS', default=25, cast=int)
 
 # Azure OpenAI Configuration
 AZURE_OPENAI_ENDPOINT = config('AZURE_OPENAI_ENDPOINT')
 AZURE_OPENAI_API_KEY = config('AZURE_OPENAI_API_KEY')
 AZURE_OPENAI_API_VERSION = config('AZURE_OPENAI_API_VERSION', default='2023-12-01-preview')
 AZURE_OPENAI_DEPLOYMENT_NAME = config('AZURE_OPENAI_DEPLOYMENT_NAME', default='gpt-4')
+# Shared Azure OpenAI client (one pooled connection pool per worker process)
+AZURE_OPENAI_POOL_MAXSIZE = config('AZURE_OPENAI_POOL_MAXSIZE', default=20, cast=int)
+AZURE_OPENAI_MAX_RETRIES = config('AZURE_OPENAI_MAX_RETRIES', default=2, cast=int)
+# Per-operation (connect, read) overrides in seconds; defaults are openai_transport.DEFAULT_OPENAI_TIMEOUTS
+AZURE_OPENAI_TIMEOUTS = {}
+# Cache of low-temperature responses with identical prompts; operations without a TTL are never cached
+AZURE_OPENAI_CACHE_TTLS = {
+    'case_type': 24 * 3600,
+    'questions': 7 * 24 * 3600,
+    'translation': 30 * 24 * 3600,
+    'document_review': 3600,
+}
+AZURE_OPENAI_CACHE_LOCAL_ENTRIES = config('AZURE_OPENAI_CACHE_LOCAL_ENTRIES', default=1024, cast=int)
+AZURE_OPENAI_CACHE_MAX_RESPONSE_BYTES = config('AZURE_OPENAI_CACHE_MAX_RESPONSE_BYTES', default=64 * 1024, cast=int)
+
+# Case type detection stops at the first stage (local matching, translation, LLM) whose
+# best weighted confidence reaches accept_confidence and leads the runner-up by min_margin.
+# A character n-gram similarity of char_accept_similarity, char_min_margin ahead of the
+# next case type, settles native-script input without translation.
+CASE_DETECTION_CASCADE = {
+    'accept_confidence': config('CASE_DETECTION_ACCEPT_CONFIDENCE', default=0.25, cast=float),
+    'min_margin': config('CASE_DETECTION_MIN_MARGIN', default=0.1, cast=float),
+    'use_llm': config('CASE_DETECTION_USE_LLM', default=True, cast=bool),
+    'char_accept_similarity': config('CASE_DETECTION_CHAR_ACCEPT_SIMILARITY', default=0.3, cast=float),
+    'char_min_margin': config('CASE_DETECTION_CHAR_MIN_MARGIN', default=0.1, cast=float),
+}
+# Past inputs of completed cases the character n-gram model learns from
+CASE_DETECTION_CHAR_MODEL_MAX_TRANSCRIPTS = config('CASE_DETECTION_CHAR_MODEL_MAX_TRANSCRIPTS', default=2000, cast=int)
+# Memory-mapped model artifacts written by build_detection_model; share this directory
+# between the web and Celery containers so every worker maps the same files
+CASE_DETECTION_MODEL_DIR = config('CASE_DETECTION_MODEL_DIR', default=os.path.join(BASE_DIR, 'models', 'case_detection'))
+CASE_DETECTION_MODEL_KEEP_VERSIONS = config('CASE_DETECTION_MODEL_KEEP_VERSIONS', default=3, cast=int)
 
 # Azure Storage Configuration
 AZURE_ACCOUNT_NAME = config('AZURE_ACCOUNT_NAME')
@@ -108,6 +203,15 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+# Cache Configuration (shared across gunicorn and Celery workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL', default='redis://localhost:6379/0'),
+        'KEY_PREFIX': 'legal_app',
+    }
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
@@ -0,0 +1,20 @@
+"""
+WSGI config for legal_app_backend project.
+
+It exposes the WSGI callable as a module-level variable named ``application``.
+Async views and the live transcription WebSocket need the ASGI entry point
+(asgi.py) instead.
+"""
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'legal_app_backend.settings')
+
+application = get_wsgi_application()
+
+# Imported after Django is set up, since the detection models use models and settings
+from apps.legal_forms.services.detection_model import warm_up_case_detection  # noqa: E402
+
+# Case type detection models are loaded (or fitted) here, before the worker accepts requests
+warm_up_case_detection()
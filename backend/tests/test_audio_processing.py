@@ -0,0 +1,300 @@
+import os
+import struct
+import tempfile
+import threading
+import tracemalloc
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import AsyncMock, Mock, patch
+from apps.speech_processing.audio_metadata import probe_wav, upload_limit_error
+from apps.speech_processing.audio_processing import (
+    StreamingResampler, encode_wav, normalize_audio, read_wav, segment_wav, split_on_silence, wav_section
+)
+from apps.speech_processing.bhashini_client import BhashiniClient, NoSpeechRecognized
+
+
+def make_speech(pattern, sample_rate=16000):
+    """Build int16 audio from (seconds, is_speech) pairs; speech is a 220 Hz tone"""
+    parts = []
+    rng = np.random.default_rng(0)
+    for seconds, is_speech in pattern:
+        n = int(seconds * sample_rate)
+        if is_speech:
+            t = np.arange(n) / sample_rate
+            parts.append(8000 * np.sin(2 * np.pi * 220 * t))
+        else:
+            parts.append(rng.normal(0, 20, n))
+    return np.concatenate(parts).astype(np.int16).reshape(-1, 1)
+
+
+class SilenceSegmentationTestCase(SimpleTestCase):
+    def test_cuts_fall_inside_silences(self):
+        """Segments respect the length bound and are cut in pauses, not words"""
+        pattern = [(12, True), (1, False), (12, True), (1, False), (12, True), (1, False), (12, True)]
+        samples = make_speech(pattern)
+
+        segments = split_on_silence(samples, 16000, max_segment_seconds=30)
+
+        self.assertGreater(len(segments), 1)
+        self.assertEqual(segments[0][0], 0)
+        self.assertEqual(segments[-1][1], len(samples))
+        for (start, end), (next_start, _) in zip(segments, segments[1:]):
+            self.assertEqual(end, next_start)
+            self.assertLessEqual((end - start) / 16000, 30)
+            # Cut point lies in one of the 1 s pauses
+            self.assertLess(abs(samples[end - 160:end + 160]).max(), 1000)
+
+    def test_segments_are_boundaries_streamed_from_the_source(self):
+        """segment_wav returns frame ranges; wav_section streams each one as a standalone WAV"""
+        samples = make_speech([(20, True), (1, False), (20, True)])
+        audio = encode_wav(samples, 16000)
+
+        segments = segment_wav(audio, max_segment_seconds=30)
+
+        self.assertEqual(len(segments), 2)
+        self.assertNotIn('audio', segments[0])
+        metadata, lock = probe_wav(audio), threading.Lock()
+        pieces = []
+        for segment in segments:
+            section = wav_section(audio, metadata, segment['start_frame'], segment['end_frame'], lock)
+            decoded, sample_rate = read_wav(b''.join(bytes(chunk) for chunk in section.chunks(4096)))
+            self.assertEqual(sample_rate, 16000)
+            self.assertEqual(len(decoded), segment['end_frame'] - segment['start_frame'])
+            pieces.append(decoded)
+        np.testing.assert_array_equal(np.concatenate(pieces), samples)
+
+    def test_short_recording_is_not_segmented(self):
+        """Recordings under the limit are sent unchanged"""
+        audio = encode_wav(make_speech([(3, True)]), 16000)
+        self.assertIsNone(segment_wav(audio, max_segment_seconds=30))
+
+    def test_wav_roundtrip(self):
+        samples = make_speech([(1, True)])
+        decoded, sample_rate = read_wav(encode_wav(samples, 16000))
+        self.assertEqual(sample_rate, 16000)
+        np.testing.assert_array_equal(decoded, samples)
+
+
+class AudioMetadataProbeTestCase(SimpleTestCase):
+    def test_pcm_header(self):
+        """Exact duration for a 44.1 kHz stereo recording, not a size-based guess"""
+        samples = np.hstack([make_speech([(2.5, True)], 44100)] * 2)
+        metadata = probe_wav(encode_wav(samples, 44100))
+
+        self.assertEqual(metadata['sample_rate'], 44100)
+        self.assertEqual(metadata['channels'], 2)
+        self.assertEqual(metadata['bits_per_sample'], 16)
+        self.assertEqual(metadata['frames'], len(samples))
+        self.assertEqual(metadata['duration'], 2.5)
+
+    def test_extensible_header_with_extra_chunks(self):
+        """WAVE_FORMAT_EXTENSIBLE, a LIST chunk before data and an unset data size"""
+        data = b'\x00' * (48000 * 3 * 2)
+        subformat = struct.pack('<H', 1) + b'\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71'
+        fmt = struct.pack('<HHIIHHHHI', 0xFFFE, 2, 48000, 48000 * 6, 6, 24, 22, 24, 3) + subformat
+        list_chunk = b'INFOISFT\x05\x00\x00\x00test\x00\x00'
+        body = (b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+                + b'LIST' + struct.pack('<I', len(list_chunk)) + list_chunk
+                + b'data' + struct.pack('<I', 0xFFFFFFFF) + data)
+        metadata = probe_wav(b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + body)
+
+        self.assertEqual(metadata['format'], 'pcm')
+        self.assertEqual(metadata['bits_per_sample'], 24)
+        self.assertEqual(metadata['frames'], 48000)
+        self.assertEqual(metadata['duration'], 1.0)
+
+    def test_non_wav_returns_none(self):
+        self.assertIsNone(probe_wav(b'ID3\x03\x00 mp3 data'))
+
+    @override_settings(AUDIO_UPLOAD_MAX_BYTES=1000, AUDIO_UPLOAD_MAX_SECONDS=60)
+    def test_upload_limits(self):
+        self.assertIsNone(upload_limit_error(500, {'format': 'mulaw', 'duration': 30.0}))
+        self.assertIn('limit', upload_limit_error(5000, None))
+        self.assertIn('seconds', upload_limit_error(500, {'format': 'pcm', 'duration': 90.0}))
+
+    def test_browser_recordings_judged_after_normalization(self):
+        """A 9-minute 48 kHz stereo WAV is far over 25 MiB raw but fits once normalized"""
+        nine_minutes = {'format': 'pcm', 'sample_rate': 48000, 'channels': 2, 'duration': 540.0}
+        raw_size = 540 * 48000 * 2 * 2
+
+        self.assertGreater(raw_size, 25 * 1024 * 1024)
+        self.assertIsNone(upload_limit_error(raw_size, nine_minutes))
+        self.assertIn('seconds', upload_limit_error(raw_size * 2, dict(nine_minutes, duration=1080.0)))
+        with override_settings(BHASHINI_ASR_NORMALIZE_AUDIO=False):
+            self.assertIn('bytes', upload_limit_error(raw_size, nine_minutes))
+
+
+class AudioNormalizationTestCase(SimpleTestCase):
+    def test_browser_recording_normalized(self):
+        """48 kHz stereo is downmixed, resampled to 16 kHz and edge silence trimmed"""
+        mono = make_speech([(1, False), (4, True), (2, False)], sample_rate=48000)
+        stereo = np.hstack([mono, mono])
+
+        result = normalize_audio(encode_wav(stereo, 48000))
+
+        samples, sample_rate = read_wav(result['audio'])
+        self.assertEqual(sample_rate, 16000)
+        self.assertEqual(samples.shape[1], 1)
+        self.assertAlmostEqual(len(samples) / 16000, 4.4, delta=0.1)
+        self.assertEqual(result['original_sample_rate'], 48000)
+        self.assertGreater(result['bytes_saved'], 0.8 * result['original_bytes'])
+
+    def test_resampling_preserves_pitch(self):
+        tone = make_speech([(1, True)], sample_rate=44100)
+        samples, _ = read_wav(normalize_audio(encode_wav(tone, 44100), trim=False)['audio'])
+        spectrum = np.abs(np.fft.rfft(samples[:, 0]))
+        peak = np.fft.rfftfreq(len(samples), 1 / 16000)[spectrum.argmax()]
+        self.assertAlmostEqual(peak, 220, delta=2)
+
+    def test_block_resampling_matches_whole_signal(self):
+        """Feeding the resampler in uneven blocks gives the same output as filtering the whole signal"""
+        signal = np.random.default_rng(1).normal(0, 0.1, 48000 * 3 + 17).astype(np.float32)
+        for source_rate in (48000, 44100, 22050, 8000):
+            ratio = source_rate / 16000.0
+            expected = signal
+            if source_rate > 16000:
+                half_width = int(np.ceil(8 * ratio))
+                n = np.arange(-half_width, half_width + 1)
+                taps = 2 * (0.45 / ratio) * np.sinc(2 * (0.45 / ratio) * n) * np.kaiser(len(n), 8.0)
+                expected = np.convolve(signal, taps / taps.sum(), mode='same')
+            expected = np.interp(np.arange(int(round(len(signal) / ratio))) * ratio, np.arange(len(signal)), expected)
+
+            resampler = StreamingResampler(source_rate, 16000)
+            blocks = np.split(signal, [5, 999, 1000, 30000, 90001])
+            output = np.concatenate([resampler.process(block) for block in blocks] + [resampler.flush()])
+
+            np.testing.assert_allclose(output, expected, atol=1e-5)
+
+    def test_long_recording_normalized_in_bounded_memory(self):
+        """Three minutes of 48 kHz stereo are normalized block by block, never decoded whole"""
+        mono = make_speech([(1, False), (178, True), (1, False)], sample_rate=48000)
+        path = os.path.join(tempfile.mkdtemp(), 'browser.wav')
+        self.addCleanup(os.remove, path)
+        with open(path, 'wb') as wav_file:
+            wav_file.write(encode_wav(np.hstack([mono, mono]), 48000))
+        del mono
+
+        tracemalloc.start()
+        try:
+            result = normalize_audio(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        with result['audio']:
+            samples, sample_rate = read_wav(result['audio'])
+        self.assertEqual(sample_rate, 16000)
+        self.assertAlmostEqual(len(samples) / 16000, 178.4, delta=0.1)
+        # Decoding the 34.5 MB source whole would take twice its size as float32
+        self.assertLess(peak, result['original_bytes'] / 4)
+
+    def test_already_normalized_audio_untouched(self):
+        """16 kHz mono input is streamed as-is"""
+        self.assertIsNone(normalize_audio(encode_wav(make_speech([(2, True)]), 16000)))
+        self.assertIsNone(normalize_audio(b'not a wav file'))
+
+
+class SegmentedSpeechToTextTestCase(SimpleTestCase):
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._transcribe')
+    def test_segments_stitched_in_order(self, mock_transcribe):
+        """Segment transcripts are joined in order with duration-weighted confidence"""
+        audio = encode_wav(make_speech([(20, True), (1, False), (20, True)]), 16000)
+        transcripts = iter([
+            {'text': 'first part', 'confidence': 0.9, 'payload_stats': {'audio_bytes': 1, 'peak_buffer_bytes': 1}},
+            {'text': 'second part', 'confidence': 0.6, 'payload_stats': {'audio_bytes': 1, 'peak_buffer_bytes': 1}},
+        ])
+        mock_transcribe.side_effect = lambda *args: next(transcripts)
+
+        client = BhashiniClient()
+        client.max_parallel_segments = 1
+        result = client.speech_to_text(audio, 'hi')
+
+        self.assertEqual(result['text'], 'first part second part')
+        self.assertEqual(len(result['segments']), 2)
+        self.assertGreater(result['confidence'], 0.6)
+        self.assertLess(result['confidence'], 0.9)
+
+    def test_async_client_streams_segments(self):
+        """The async client segments long recordings like the sync one and streams each segment"""
+        import base64
+        import json
+        from asgiref.sync import async_to_sync
+        from apps.speech_processing.async_bhashini_client import AsyncBhashiniClient
+
+        audio = encode_wav(make_speech([(20, True), (1, False), (20, True)]), 16000)
+        sent = []
+
+        async def post(url, headers=None, timeout=None, content=None, json=None):
+            body = b''.join([chunk async for chunk in content])
+            self.assertEqual(len(body), int(headers['Content-Length']))
+            sent.append(body)
+            response = Mock(status_code=200)
+            response.json.return_value = {'pipelineResponse': [{'output': [{'source': f'part {len(sent)}'}]}]}
+            return response
+
+        async def transcribe():
+            client = AsyncBhashiniClient()
+            client.max_parallel_segments = 1
+            client.http = Mock(post=post)
+            return await client.speech_to_text(audio, 'hi')
+
+        config = ('asr-key', {'service_id': 'asr-service', 'callback_url': 'https://asr-test.com/infer'})
+        with patch.object(AsyncBhashiniClient, '_get_pipeline_config', new=AsyncMock(return_value=config)):
+            result = async_to_sync(transcribe)()
+
+        self.assertEqual(result['text'], 'part 1 part 2')
+        self.assertEqual(result['payload_stats']['segments'], 2)
+        segment = base64.b64decode(json.loads(sent[0])['inputData']['audio'][0]['audioContent'])
+        self.assertEqual(probe_wav(segment)['sample_rate'], 16000)
+        self.assertLess(probe_wav(segment)['duration'], 30)
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._transcribe')
+    def test_silent_segments_are_skipped(self, mock_transcribe):
+        audio = encode_wav(make_speech([(20, True), (1, False), (20, True)]), 16000)
+        mock_transcribe.side_effect = [
+            NoSpeechRecognized("No speech recognized"),
+            {'text': 'only speech', 'confidence': 0.8, 'payload_stats': {'audio_bytes': 1, 'peak_buffer_bytes': 1}},
+        ]
+
+        client = BhashiniClient()
+        client.max_parallel_segments = 1
+        result = client.speech_to_text(audio, 'hi')
+
+        self.assertEqual(result['text'], 'only speech')
+        self.assertEqual(result['confidence'], 0.8)
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._run_inference')
+    def test_long_recording_streamed_in_constant_memory(self, mock_run_inference):
+        """Segments are read from the file as they are sent; memory does not grow with the recording"""
+        pattern = [(20, True), (1, False)] * 6
+        path = os.path.join(tempfile.mkdtemp(), 'long.wav')
+        self.addCleanup(os.remove, path)
+        with open(path, 'wb') as wav_file:
+            wav_file.write(encode_wav(make_speech(pattern), 16000))
+        recording_bytes = os.path.getsize(path)
+        sent_frames = []
+
+        def run_inference(task_type, source_language, target_language, build_payload):
+            body = build_payload('asr-service')
+            sent = sum(len(block) for block in iter(lambda: body.read(8192), b''))
+            self.assertEqual(sent, len(body))
+            sent_frames.append((body.audio.size - 44) // 2)
+            return {'pipelineResponse': [{'output': [{'source': 'words', 'confidence': 0.9}]}]}
+
+        mock_run_inference.side_effect = run_inference
+        client = BhashiniClient()
+        client.max_parallel_segments = 1
+
+        client.speech_to_text(path, 'hi')
+        sent_frames.clear()
+        tracemalloc.start()
+        try:
+            result = client.speech_to_text(path, 'hi')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertGreater(result['payload_stats']['segments'], 3)
+        self.assertEqual(sum(sent_frames), probe_wav(path)['frames'])
+        self.assertLessEqual(result['payload_stats']['peak_buffer_bytes'], 64 * 1024 + 2)
+        self.assertLess(peak, recording_bytes / 4)
@@ -0,0 +1,84 @@
+import io
+import base64
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.test import SimpleTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from apps.speech_processing.streaming import AUDIO_PLACEHOLDER, AudioSection, BufferMeter, StreamingAudioBody
+
+
+class FakeRecording:
+    """Chunked audio source that never holds the whole recording in memory"""
+
+    def __init__(self, size):
+        self.size = size
+
+    def chunks(self, chunk_size):
+        remaining = self.size
+        while remaining > 0:
+            length = min(chunk_size, remaining)
+            yield b'\x01' * length
+            remaining -= length
+
+
+class StreamingAudioBodyTestCase(SimpleTestCase):
+    def _payload(self):
+        return {
+            'pipelineTasks': [{'taskType': 'asr', 'config': {'serviceId': 'test-service'}}],
+            'inputData': {'audio': [{'audioContent': AUDIO_PLACEHOLDER}]}
+        }
+
+    def test_body_is_valid_json_with_base64_audio(self):
+        """Streamed body decodes to the same JSON a json= request would send"""
+        audio = bytes(range(256)) * 1000 + b'tail'
+        upload = SimpleUploadedFile('recording.wav', audio, content_type='audio/wav')
+        body = StreamingAudioBody(self._payload(), upload, chunk_size=1000)
+
+        data = b''.join(iter(lambda: body.read(8192), b''))
+
+        self.assertEqual(len(data), len(body))
+        decoded = json.loads(data)
+        self.assertEqual(
+            base64.b64decode(decoded['inputData']['audio'][0]['audioContent']),
+            audio
+        )
+
+    def test_peak_memory_bounded_for_long_recording(self):
+        """A 10-minute 16 kHz 16-bit recording is sent without buffering it"""
+        ten_minutes = 16000 * 2 * 600
+        body = StreamingAudioBody(self._payload(), FakeRecording(ten_minutes), chunk_size=64 * 1024)
+
+        sent = 0
+        for block in iter(lambda: body.read(8192), b''):
+            sent += len(block)
+
+        self.assertEqual(sent, len(body))
+        self.assertLessEqual(body.peak_buffer_bytes, 64 * 1024 + 2)
+        self.assertEqual(body.stats()['audio_bytes'], ten_minutes)
+
+    def test_rewind_replays_body(self):
+        """Rewinding produces the same bytes again"""
+        body = StreamingAudioBody(self._payload(), b'0123456789')
+        first = body.read()
+        body.rewind()
+        self.assertEqual(body.read(), first)
+
+    def test_sections_of_one_handle_stream_concurrently(self):
+        """Sections sharing a file handle each send their own byte range, with the combined peak metered"""
+        audio = bytes(range(256)) * 400
+        handle = io.BytesIO(audio)
+        meter = BufferMeter()
+        lock = threading.Lock()
+        sections = [AudioSection(handle, offset, 25600, b'HDR', lock) for offset in range(0, len(audio), 25600)]
+
+        def send(section):
+            body = StreamingAudioBody(self._payload(), section, chunk_size=999, meter=meter)
+            return base64.b64decode(json.loads(body.read())['inputData']['audio'][0]['audioContent'])
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            sent = list(executor.map(send, sections))
+
+        self.assertEqual(sent, [b'HDR' + audio[offset:offset + 25600] for offset in range(0, len(audio), 25600)])
+        self.assertLessEqual(meter.peak, 4 * (999 + 2))
+        self.assertEqual(meter.current, 0)
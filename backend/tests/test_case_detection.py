@@ -0,0 +1,424 @@
+import os
+import json
+import shutil
+import tempfile
+import tracemalloc
+import numpy as np
+from scipy import sparse
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from unittest.mock import Mock, patch
+from apps.legal_forms.models import CaseTypeMapping, LegalCase
+from apps.legal_forms.services.case_processor import CaseTypeDetector, clean_input_text
+from apps.legal_forms.services.detection_benchmark import check_thresholds, load_corpus, run_benchmark
+from apps.legal_forms.services.detection_model import (
+    DetectionModel, DetectionModelRegistry, build_model_artifacts, detection_model_registry, load_active_mappings,
+    load_training_transcripts
+)
+from apps.legal_forms.services.keyword_matcher import keyword_matcher
+from apps.legal_forms.services.versioned import NOT_LOADED
+
+
+class CascadeDetectionTestCase(TestCase):
+    def setUp(self):
+        self.tenant = CaseTypeMapping.objects.create(
+            case_type='Tenant Dispute', keywords=['tenant', 'landlord', 'deposit', 'rent'], confidence_threshold=0.5
+        )
+        self.consumer = CaseTypeMapping.objects.create(
+            case_type='Consumer Complaint', keywords=['refund', 'defective', 'product', 'seller'],
+            confidence_threshold=0.5
+        )
+        keyword_matcher.invalidate()
+        detection_model_registry.rebuild()
+        self.detector = CaseTypeDetector()
+
+    @patch('apps.speech_processing.azure_openai_client.AzureOpenAIClient.analyze_text')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_batch')
+    def test_confident_local_match_skips_translation_and_llm(self, mock_translate, mock_analyze):
+        """Strong keyword evidence in English resolves without network calls"""
+        case_type, confidence, keywords = self.detector.detect_case_type(
+            'My landlord will not return the deposit or fix the rent receipt', 'en'
+        )
+
+        self.assertEqual(case_type, self.tenant)
+        self.assertGreaterEqual(confidence, 0.25)
+        self.assertEqual(sorted(keywords), ['deposit', 'landlord', 'rent'])
+        mock_translate.assert_not_called()
+        mock_analyze.assert_not_called()
+
+    @patch('apps.speech_processing.azure_openai_client.AzureOpenAIClient.analyze_text')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_batch')
+    def test_translation_only_when_local_stage_is_inconclusive(self, mock_translate, mock_analyze):
+        """Hindi input is translated, and the LLM is skipped once the translation is decisive"""
+        mock_translate.return_value = [{'translated_text': 'the seller sold a defective product and refuses a refund'}]
+
+        case_type, _, _ = self.detector.detect_case_type('विक्रेता ने खराब सामान बेचा', 'hi')
+
+        self.assertEqual(case_type, self.consumer)
+        mock_translate.assert_called_once()
+        mock_analyze.assert_not_called()
+
+    @patch('apps.speech_processing.azure_openai_client.AzureOpenAIClient.analyze_text')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_batch')
+    def test_native_script_keywords_match_locally(self, mock_translate, mock_analyze):
+        """Cleaning keeps vowel signs, so Hindi keywords resolve without translation"""
+        property_damage = CaseTypeMapping.objects.create(
+            case_type='Property Damage', keywords=['संपत्ति', 'नुकसान'], confidence_threshold=0.5
+        )
+        keyword_matcher.invalidate()
+        detection_model_registry.rebuild()
+
+        self.assertEqual(clean_input_text('मेरी संपत्ति को, नुकसान हुआ!'), 'मेरी संपत्ति को नुकसान हुआ')
+        case_type, _, keywords = self.detector.detect_case_type('मेरी संपत्ति को, नुकसान हुआ!', 'hi')
+
+        self.assertEqual(case_type, property_damage)
+        self.assertEqual(sorted(keywords), sorted(['संपत्ति', 'नुकसान']))
+        mock_translate.assert_not_called()
+        mock_analyze.assert_not_called()
+
+    @patch('apps.speech_processing.azure_openai_client.AzureOpenAIClient.analyze_text')
+    def test_llm_breaks_ties(self, mock_analyze):
+        """The LLM is consulted when local evidence is weak"""
+        mock_analyze.return_value = {'case_type': 'Consumer Complaint', 'confidence': 0.9}
+
+        case_type, _, _ = self.detector.detect_case_type('I want my money back', 'en')
+
+        self.assertEqual(case_type, self.consumer)
+        mock_analyze.assert_called_once()
+
+    @patch('apps.speech_processing.azure_openai_client.AzureOpenAIClient.analyze_text')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_text')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_batch')
+    def test_batch_matches_single_text_path(self, mock_translate_batch, mock_translate, mock_analyze):
+        """Batched detection returns what detect_case_type returns for each text"""
+        hindi = ['विक्रेता ने खराब सामान बेचा', 'मकान मालिक ने जमा राशि नहीं लौटाई']
+        translations = dict(zip(
+            [clean_input_text(text) for text in hindi],
+            ['the seller sold a defective product and refuses a refund', 'the landlord kept the rent deposit of the tenant']
+        ))
+        mock_translate.side_effect = lambda text, src, tgt: {'translated_text': translations[text]}
+        mock_translate_batch.side_effect = lambda texts, src, tgt: [{'translated_text': translations[t]} for t in texts]
+        mock_analyze.return_value = {'case_type': 'Consumer Complaint', 'confidence': 0.9}
+        texts = [
+            ('My landlord will not return the deposit or fix the rent receipt', 'en'),
+            (hindi[0], 'hi'),
+            ('I want my money back', 'en'),
+            (hindi[1], 'hi'),
+        ]
+
+        single = [self.detector.detect_case_type(text, language) for text, language in texts]
+        mock_analyze.reset_mock()
+        mock_translate_batch.reset_mock()
+        batch = self.detector.detect_case_types_batch([t for t, _ in texts], [l for _, l in texts])
+
+        self.assertEqual(
+            [(case_type, round(confidence, 6), sorted(keywords)) for case_type, confidence, keywords in batch],
+            [(case_type, round(confidence, 6), sorted(keywords)) for case_type, confidence, keywords in single]
+        )
+        self.assertEqual([case_type for case_type, _, _ in batch], [self.tenant, self.consumer, self.consumer, self.tenant])
+        mock_translate_batch.assert_called_once_with(list(translations), 'hi', 'en')
+        mock_analyze.assert_called_once()
+
+
+class CharacterModelTestCase(TestCase):
+    def setUp(self):
+        self.rental = CaseTypeMapping.objects.create(
+            case_type='Rental Issues', keywords=['eviction notice', 'किराया समस्या', 'बेदखली नोटिस', 'मकान मालिक समस्या'],
+            confidence_threshold=0.6
+        )
+        self.consumer = CaseTypeMapping.objects.create(
+            case_type='Consumer Complaint', keywords=['defective product', 'खराब उत्पाद', 'रिफंड समस्या'],
+            confidence_threshold=0.6
+        )
+        keyword_matcher.invalidate()
+        detection_model_registry.rebuild()
+        self.detector = CaseTypeDetector()
+
+    @patch('apps.speech_processing.azure_openai_client.AzureOpenAIClient.analyze_text')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_batch')
+    def test_confident_native_match_skips_translation(self, mock_translate, mock_analyze):
+        """Hindi close to the Hindi keywords resolves without translation or the LLM"""
+        case_type, confidence, _ = self.detector.detect_case_type('मकान मालिक ने किराया बढ़ाया, यह किराया समस्या है', 'hi')
+
+        self.assertEqual(case_type, self.rental)
+        self.assertGreater(confidence, 0)
+        mock_translate.assert_not_called()
+        mock_analyze.assert_not_called()
+
+    def test_transcripts_teach_other_scripts(self):
+        """Past Telugu inputs let the model score Telugu without any Telugu keywords"""
+        user = get_user_model().objects.create_user(username='litigant', password='pass')
+        LegalCase.objects.create(
+            user=user, initial_input='నా ఇంటి యజమాని డిపాజిట్ తిరిగి ఇవ్వడం లేదు', input_mode='voice',
+            input_language='te', detected_case_type=self.rental, status='completed'
+        )
+        mappings = load_active_mappings()
+
+        without = DetectionModel.fit(1, mappings).best_matches(['ఇంటి యజమాని డిపాజిట్ ఇవ్వలేదు'], 'char')[0]
+        with_transcripts = DetectionModel.fit(1, mappings, load_training_transcripts(mappings)).best_matches(
+            ['ఇంటి యజమాని డిపాజిట్ ఇవ్వలేదు'], 'char'
+        )[0]
+
+        self.assertEqual(without[1], 0.0)
+        self.assertEqual(with_transcripts[0], self.rental)
+        self.assertGreater(with_transcripts[1], 0.3)
+
+
+class DetectionModelRegistryTestCase(TestCase):
+    def setUp(self):
+        self.tenant = CaseTypeMapping.objects.create(
+            case_type='Tenant Dispute', keywords=['tenant', 'landlord', 'deposit', 'rent']
+        )
+        self.registry = DetectionModelRegistry()
+
+    def test_detectors_share_one_fitted_model(self):
+        """Creating detectors does not refit; the model is fitted once per process"""
+        with patch('apps.legal_forms.services.case_processor.detection_model_registry', self.registry), \
+                patch.object(DetectionModel, 'fit', wraps=DetectionModel.fit) as mock_fit:
+            self.registry.warm_up()
+            for _ in range(3):
+                [(case_type, score)] = CaseTypeDetector()._detect_by_similarity_batch(['landlord kept my deposit'])
+                self.assertEqual(case_type, self.tenant)
+                self.assertGreater(score, 0.3)
+
+        mock_fit.assert_called_once()
+
+    def test_version_bump_refits_off_the_request_path(self):
+        """After invalidation the old model keeps serving until the background refit swaps in"""
+        old_model = self.registry.warm_up()
+
+        with patch.object(DetectionModelRegistry, '_rebuild_in_background') as mock_rebuild:
+            self.registry.invalidate()
+            self.assertIs(self.registry.current(), old_model)
+
+        mock_rebuild.assert_called_once_with(self.registry._shared_version())
+        self.assertNotEqual(self.registry._shared_version(), old_model.version)
+
+        new_model = self.registry.rebuild()
+        self.assertIs(self.registry.current(), new_model)
+        self.assertEqual(new_model.version, self.registry._shared_version())
+
+    def test_first_use_without_warm_up_does_not_fit(self):
+        """Without a warm-up or artifacts, the first request gets an empty model and the fit runs in the background"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with override_settings(CASE_DETECTION_MODEL_DIR=directory), \
+                patch.object(DetectionModel, 'fit') as mock_fit, \
+                patch.object(DetectionModelRegistry, '_rebuild_in_background') as mock_rebuild:
+            model = self.registry.current()
+
+        mock_fit.assert_not_called()
+        self.assertEqual(model.case_types, [])
+        self.assertEqual(model.most_similar('landlord kept my deposit'), (None, 0.0))
+        mock_rebuild.assert_called_once_with(self.registry._shared_version())
+
+    def test_wsgi_and_celery_workers_warm_up(self):
+        """Importing the WSGI app and starting a Celery pool process both load the model"""
+        import importlib
+        import sys
+        from celery.signals import worker_process_init
+        from apps.legal_forms.services.keyword_matcher import KeywordMatcher
+
+        # Connects the worker_process_init handler
+        importlib.import_module('legal_app_backend.celery')
+        for start_worker in (
+            lambda: importlib.import_module('legal_app_backend.wsgi'),
+            lambda: worker_process_init.send(sender=None),
+        ):
+            registry = DetectionModelRegistry()
+            sys.modules.pop('legal_app_backend.wsgi', None)
+            with patch('apps.legal_forms.services.detection_model.detection_model_registry', registry), \
+                    patch('apps.legal_forms.services.keyword_matcher.keyword_matcher', KeywordMatcher()):
+                start_worker()
+
+            self.assertIsNot(registry._version, NOT_LOADED)
+            self.assertEqual(registry.current().case_types, [self.tenant])
+
+    def test_mapping_change_bumps_version_after_artifacts_are_published(self):
+        """Workers are told to reload only once the build has saved the new artifacts, which they then map"""
+        import sys
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        before = self.registry._shared_version()
+        tasks = Mock()
+
+        with override_settings(CASE_DETECTION_MODEL_DIR=directory), \
+                patch.dict(sys.modules, {'apps.legal_forms.tasks': tasks}), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.tenant.keywords = ['tenant', 'eviction']
+            self.tenant.save()
+
+        tasks.build_detection_model.delay.assert_called_once_with()
+        self.assertEqual(self.registry._shared_version(), before)
+
+        with override_settings(CASE_DETECTION_MODEL_DIR=directory):
+            build_model_artifacts()
+            self.assertEqual(self.registry._shared_version(), before + 1)
+            with patch.object(DetectionModel, 'fit') as mock_fit:
+                model = self.registry.rebuild()
+
+        mock_fit.assert_not_called()
+        self.assertEqual(model.source, 'artifact')
+        self.assertEqual(model.most_similar('eviction notice')[0], self.tenant)
+
+    def test_mapping_change_without_broker_refits_in_workers(self):
+        """When the build cannot be enqueued, the version is bumped so workers refit themselves"""
+        import sys
+        before = self.registry._shared_version()
+        tasks = Mock()
+        tasks.build_detection_model.delay.side_effect = ConnectionError('broker down')
+
+        with patch.dict(sys.modules, {'apps.legal_forms.tasks': tasks}), self.captureOnCommitCallbacks(execute=True):
+            self.tenant.delete()
+
+        self.assertEqual(self.registry._shared_version(), before + 1)
+
+
+class DetectionModelArtifactTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.tenant = CaseTypeMapping.objects.create(
+            case_type='Tenant Dispute', keywords=['tenant', 'landlord', 'deposit', 'rent'], priority=2
+        )
+        self.consumer = CaseTypeMapping.objects.create(
+            case_type='Consumer Complaint', keywords=['refund', 'defective', 'product', 'seller'], priority=1
+        )
+
+    def test_artifacts_round_trip_through_mmap(self):
+        """A loaded model scores exactly like the fitted one, backed by read-only memory maps"""
+        fitted = DetectionModel.fit(1, load_active_mappings())
+        fitted.save(self.directory)
+
+        loaded = DetectionModel.load(2, load_active_mappings(), self.directory)
+
+        self.assertEqual(loaded.source, 'artifact')
+        texts = ['my landlord kept the deposit', 'seller sent a defective product', 'मकान मालिक ने जमा राशि रखी', '']
+        for kind in ('word', 'char'):
+            vectorizer, case_type_vectors = loaded.indexes[kind]
+            self.assertIsInstance(vectorizer.terms, np.memmap)
+            self.assertIsInstance(vectorizer.idf_, np.memmap)
+            self.assertFalse(case_type_vectors.data.flags.writeable)
+
+            fitted_vectorizer = fitted.indexes[kind][0]
+            fitted_columns = [fitted_vectorizer.vocabulary_[term] for term in vectorizer.terms]
+            np.testing.assert_allclose(
+                vectorizer.transform(texts).toarray(), fitted_vectorizer.transform(texts).toarray()[:, fitted_columns]
+            )
+            for loaded_match, fitted_match in zip(loaded.best_matches(texts, kind), fitted.best_matches(texts, kind)):
+                self.assertEqual(loaded_match[0], fitted_match[0])
+                self.assertAlmostEqual(loaded_match[1], fitted_match[1])
+
+    def test_scoring_does_not_copy_case_type_matrix(self):
+        """Scoring allocates per input text, not per byte of the shared case type matrix"""
+        vectorizer, _ = DetectionModel.fit(1, load_active_mappings()).indexes['char']
+        rows = 3000
+        dense = np.random.default_rng(0).random((rows, len(vectorizer.vocabulary_)))
+        case_type_vectors = sparse.csr_matrix(dense / np.linalg.norm(dense, axis=1, keepdims=True))
+        for array in (case_type_vectors.data, case_type_vectors.indices, case_type_vectors.indptr):
+            array.flags.writeable = False
+        matrix_bytes = case_type_vectors.data.nbytes + case_type_vectors.indices.nbytes
+        model = DetectionModel(1, [self.tenant] * rows, {'char': (vectorizer, case_type_vectors)})
+
+        tracemalloc.start()
+        try:
+            model.best_matches(['my landlord kept the deposit'], 'char')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertLess(peak, matrix_bytes / 4)
+
+    def test_stale_artifacts_are_not_loaded(self):
+        """Artifacts fitted before a keyword change are ignored"""
+        DetectionModel.fit(1, load_active_mappings()).save(self.directory)
+        self.tenant.keywords = ['tenant', 'eviction']
+        self.tenant.save()
+
+        self.assertIsNone(DetectionModel.load(2, load_active_mappings(), self.directory))
+
+    def test_command_publishes_and_registry_maps_without_fitting(self):
+        """After build_detection_model, a worker starts from the artifacts instead of refitting"""
+        with override_settings(CASE_DETECTION_MODEL_DIR=self.directory, CASE_DETECTION_MODEL_KEEP_VERSIONS=1):
+            DetectionModel.fit(1, [self.consumer]).save(self.directory)
+            call_command('build_detection_model', stdout=open(os.devnull, 'w'))
+            self.assertEqual(len(os.listdir(self.directory)), 1)
+
+            with patch.object(DetectionModel, 'fit') as mock_fit:
+                model = DetectionModelRegistry().current()
+
+        mock_fit.assert_not_called()
+        self.assertEqual(model.source, 'artifact')
+        self.assertEqual(model.most_similar('landlord deposit')[0], self.tenant)
+
+
+class DetectionBenchmarkTestCase(TestCase):
+    corpus = {
+        'version': 1,
+        'thresholds': {'min_accuracy': 0.5, 'max_p95_ms': {'total': 1000}},
+        'samples': [
+            {'id': 'rent', 'language': 'en', 'expected': 'Rental Issues',
+             'text': 'I got an eviction notice and there is a deposit problem with my landlord'},
+            {'id': 'loan', 'language': 'hi', 'expected': 'Money Recovery', 'text': 'उधार पैसा वापस नहीं मिला',
+             'translation': 'borrowed money was not returned, I need loan recovery'},
+            {'id': 'other', 'language': 'en', 'expected': None, 'text': 'How do I register a trademark'},
+        ],
+    }
+
+    def test_report_covers_accuracy_latency_and_confusion(self):
+        """The run is scored against the seeded case types and rolled back afterwards"""
+        existing = CaseTypeMapping.objects.create(case_type='Rental Issues', keywords=['unrelated'], is_active=False)
+
+        report = run_benchmark(self.corpus, iterations=2)
+
+        self.assertEqual(report['samples'], 3)
+        self.assertEqual(report['accuracy'], 1.0)
+        self.assertEqual(report['confusion_matrix']['Money Recovery']['Money Recovery'], 1)
+        self.assertEqual(report['confusion_matrix']['(none)']['(none)'], 1)
+        self.assertEqual(report['latency_ms']['total']['count'], 6)
+        self.assertEqual(report['backend_requests_per_pass']['translation'], 1)
+        self.assertTrue(report['batch_matches_single'])
+        self.assertEqual(CaseTypeMapping.objects.get().pk, existing.pk)
+        self.assertFalse(CaseTypeMapping.objects.get().is_active)
+
+    def test_regressions_fail_the_check(self):
+        """Accuracy or latency past the corpus thresholds fails --check"""
+        report = {'accuracy': 0.4, 'latency_ms': {'total': {'p95': 80.0}}, 'batch_matches_single': True}
+        failures = check_thresholds(report, {'min_accuracy': 0.7, 'max_p95_ms': {'total': 30}})
+        self.assertEqual(len(failures), 2)
+
+        corpus = dict(self.corpus, thresholds={'min_accuracy': 1.1})
+        path = os.path.join(tempfile.mkdtemp(), 'corpus.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+        with open(path, 'w', encoding='utf-8') as corpus_file:
+            json.dump(corpus, corpus_file)
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_case_detection', corpus=path, iterations=1, check=True, stdout=open(os.devnull, 'w'))
+
+    def test_latency_gated_against_runner_baseline(self):
+        """A uniformly slower runner passes; detection slower relative to the same runner's baseline fails"""
+        thresholds = load_corpus()['thresholds']
+
+        def report(baseline_ms, total_p95_ms):
+            return {
+                'accuracy': 0.9, 'batch_matches_single': True,
+                'latency_ms': {'total': {'p95': total_p95_ms}},
+                'p95_vs_baseline': {'total': total_p95_ms / baseline_ms},
+            }
+
+        self.assertEqual(check_thresholds(report(10.0, 8.0), thresholds), [])
+        self.assertEqual(check_thresholds(report(30.0, 24.0), thresholds), [])
+        failures = check_thresholds(report(10.0, 40.0), thresholds)
+        self.assertEqual(len(failures), 1)
+        self.assertIn('baseline', failures[0])
+
+    def test_report_includes_runner_baseline(self):
+        """Every measured stage's p95 is also reported as a multiple of the runner baseline"""
+        report = run_benchmark(self.corpus, iterations=1)
+
+        self.assertGreater(report['baseline_ms'], 0)
+        self.assertAlmostEqual(
+            report['p95_vs_baseline']['total'], report['latency_ms']['total']['p95'] / report['baseline_ms'], places=2
+        )
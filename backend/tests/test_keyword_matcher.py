@@ -0,0 +1,75 @@
+import random
+import unicodedata
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from unittest.mock import patch
+from apps.legal_forms.models import CaseTypeMapping
+from apps.legal_forms.services.keyword_matcher import (
+    BUILTIN, VERSION_CACHE_KEY, KeywordAutomaton, KeywordMatcher, keyword_matcher
+)
+
+
+class KeywordAutomatonTestCase(SimpleTestCase):
+    def test_overlapping_keywords(self):
+        """Keywords that overlap or nest inside each other are all found"""
+        automaton = KeywordAutomaton([('a', 'he'), ('a', 'she'), ('b', 'his'), ('b', 'hers')])
+        self.assertEqual(sorted(automaton.find('ushers')), ['he', 'hers', 'she'])
+        self.assertEqual(automaton.match('ushers'), {'a': ['she', 'he'], 'b': ['hers']})
+
+    def test_matches_naive_substring_search(self):
+        """Same result as checking keyword in text for every keyword"""
+        rng = random.Random(7)
+        alphabet = 'abcab '
+        keywords = sorted({''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))).strip() or 'a'
+                           for _ in range(40)})
+        automaton = KeywordAutomaton([(None, keyword) for keyword in keywords])
+        for _ in range(50):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            expected = {keyword for keyword in keywords if keyword in text}
+            self.assertEqual(set(automaton.find(text)), expected)
+
+    def test_unicode_normalization_and_case(self):
+        """Decomposed Devanagari and mixed case still match"""
+        automaton = KeywordAutomaton([('property', 'Property'), ('property', 'संपत्ति'), ('rent', 'కిరాయి')])
+        decomposed = unicodedata.normalize('NFD', 'मेरी संपत्ति का PROPERTY विवाद, కిరాయి')
+        self.assertEqual(
+            automaton.match(decomposed),
+            {'property': ['संपत्ति', 'Property'], 'rent': ['కిరాయి']}
+        )
+
+
+class KeywordMatcherTestCase(TestCase):
+    def setUp(self):
+        self.mapping = CaseTypeMapping.objects.create(
+            case_type='Tenant Dispute', keywords=['tenant', 'rent', 'deposit'], confidence_threshold=0.3
+        )
+        keyword_matcher.invalidate()
+
+    def test_builtin_and_case_type_keywords(self):
+        """One pass reports built-in keywords and each case type's keywords"""
+        matches = keyword_matcher.match('My landlord kept the deposit after the tenant left')
+        self.assertEqual(matches[self.mapping.id], ['deposit', 'tenant'])
+        self.assertIn('landlord', matches[BUILTIN])
+
+    def test_rebuilds_when_mapping_changes(self):
+        """Saving a mapping invalidates the automaton once committed"""
+        self.assertEqual(keyword_matcher.keywords_for_case_type('an eviction notice', self.mapping), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mapping.keywords = ['eviction']
+            self.mapping.save()
+
+        self.assertEqual(keyword_matcher.keywords_for_case_type('an eviction notice', self.mapping), ['eviction'])
+
+    def test_change_elsewhere_rebuilds_off_the_request_path(self):
+        """A version bumped by another worker is rebuilt in the background while the old automaton serves"""
+        automaton, _ = keyword_matcher.current()
+        cache.incr(VERSION_CACHE_KEY)
+        keyword_matcher._checked_at = 0.0
+
+        with patch.object(KeywordMatcher, '_rebuild_in_background') as mock_rebuild, \
+                patch.object(KeywordMatcher, '_load') as mock_load:
+            self.assertIs(keyword_matcher.current()[0], automaton)
+
+        mock_load.assert_not_called()
+        mock_rebuild.assert_called_once_with(cache.get(VERSION_CACHE_KEY))
@@ -1,43 +1,711 @@
-
-
-
-
-
-# ============ backend/tests/test_speech_processing.py ============
-import pytest
-from django.test import TestCase
-from unittest.mock import Mock, patch
-from apps.speech_processing.bhashini_client import BhashiniClient
-from apps.speech_processing.azure_openai_client import AzureOpenAIClient
-
-class SpeechProcessingTestCase(TestCase):
-    def setUp(self):
-        self.bhashini_client = BhashiniClient()
-        self.openai_client = AzureOpenAIClient()
-
-    @patch('apps.speech_processing.bhashini_client.requests.Session.post')
-    def test_bhashini_auth_token(self, mock_post):
-        """Test BHASHINI authentication token retrieval"""
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            'pipelineResponseConfig': [
-                {'config': [{'serviceId': 'test-service', 'inferenceEndPoint': {'callbackUrl': 'test-url'}}]}
-            ]
-        }
-        mock_post.return_value = mock_response
-        
-        result = self.bhashini_client.get_auth_token()
-        self.assertIn('pipelineResponseConfig', result)
-
-    @patch('openai.ChatCompletion.create')
-    def test_azure_openai_analysis(self, mock_create):
-        """Test Azure OpenAI document analysis"""
-        mock_create.return_value.choices = [
-            Mock(message=Mock(content='{"extracted_fields": {}, "confidence_scores": {}}'))
-        ]
-        
-        result = self.openai_client.analyze_speech_for_form_filling(
-            "Test speech", 
-            {"fields": []}
-        )
-        self.assertIn('extracted_fields', result)
\ No newline at end of file
+
+
+
+
+
+# ============ backend/tests/test_speech_processing.py ============
+import time
+import pytest
+from django.test import TestCase
+from unittest.mock import AsyncMock, Mock, patch
+from apps.speech_processing.bhashini_client import BhashiniClient
+from apps.speech_processing.azure_openai_client import AzureOpenAIClient
+
+class SpeechProcessingTestCase(TestCase):
+    def setUp(self):
+        self.bhashini_client = BhashiniClient()
+        self.openai_client = AzureOpenAIClient()
+
+    @patch('apps.speech_processing.bhashini_client.requests.Session.post')
+    def test_bhashini_auth_token(self, mock_post):
+        """Test BHASHINI authentication token retrieval"""
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            'pipelineResponseConfig': [
+                {'config': [{'serviceId': 'test-service', 'inferenceEndPoint': {'callbackUrl': 'test-url'}}]}
+            ]
+        }
+        mock_post.return_value = mock_response
+        
+        result = self.bhashini_client.get_auth_token()
+        self.assertIn('pipelineResponseConfig', result)
+
+    @patch('apps.speech_processing.openai_transport.get_azure_openai_client')
+    def test_azure_openai_analysis(self, mock_get_client):
+        """Test Azure OpenAI document analysis"""
+        mock_create = mock_get_client.return_value.chat.completions.create
+        mock_create.return_value.choices = [
+            Mock(message=Mock(content='{"extracted_fields": {}, "confidence_scores": {}}'))
+        ]
+        
+        result = self.openai_client.analyze_speech_for_form_filling(
+            "Test speech", 
+            {"fields": []}
+        )
+        self.assertIn('extracted_fields', result)
+        self.assertEqual(mock_create.call_args.kwargs['model'], self.openai_client.deployment_name)
+
+class PipelineConfigCacheTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.speech_processing.pipeline_cache import pipeline_config_cache
+        cache.clear()
+        pipeline_config_cache.store.local.clear()
+        self.client = BhashiniClient()
+        self.config_response = {
+            'pipelineResponseConfig': [
+                {'config': [{'serviceId': 'test-service', 'inferenceEndPoint': {'callbackUrl': 'https://test-inference.com'}}]}
+            ]
+        }
+
+    def _inference_response(self):
+        response = Mock(status_code=200)
+        response.raise_for_status = Mock()
+        response.json.return_value = {
+            'pipelineResponse': [{'output': [{'source': 'Test transcription', 'confidence': 0.9}]}]
+        }
+        return response
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.get_auth_token')
+    @patch('apps.speech_processing.bhashini_client.requests.Session.post')
+    def test_config_fetched_once_per_task(self, mock_post, mock_auth):
+        """Repeated inference calls reuse the cached pipeline configuration"""
+        mock_auth.return_value = self.config_response
+        mock_post.return_value = self._inference_response()
+
+        self.client.speech_to_text(b'fake audio data', 'hi')
+        self.client.speech_to_text(b'fake audio data', 'hi')
+
+        self.assertEqual(mock_auth.call_count, 1)
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.get_auth_token')
+    @patch('apps.speech_processing.bhashini_client.requests.Session.post')
+    def test_auth_error_invalidates_config(self, mock_post, mock_auth):
+        """An auth error from inference drops the cached configuration"""
+        import requests
+
+        mock_auth.return_value = self.config_response
+        failed = Mock(status_code=401)
+        failed.raise_for_status.side_effect = requests.HTTPError('401 Unauthorized')
+        mock_post.side_effect = [failed, self._inference_response()]
+
+        with self.assertRaises(requests.HTTPError):
+            self.client.speech_to_text(b'fake audio data', 'hi')
+        self.client.speech_to_text(b'fake audio data', 'hi')
+
+        self.assertEqual(mock_auth.call_count, 2)
+
+class TTSAudioCacheTestCase(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.core.cache import cache
+        from django.test import override_settings
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+    def test_repeated_prompt_served_from_storage(self):
+        """The same prompt is synthesized once and shared across requests"""
+        from apps.speech_processing.tts_cache import TTSAudioCache
+
+        tts_cache = TTSAudioCache()
+        synthesize = Mock(return_value=b'RIFF fake wav')
+
+        first = tts_cache.get_or_synthesize('Question: Your name?', 'en', 'female', 22050, synthesize)
+        second = tts_cache.get_or_synthesize('Question: Your name?', 'en', 'female', 22050, synthesize)
+        other_voice = tts_cache.get_or_synthesize('Question: Your name?', 'en', 'male', 22050, synthesize)
+
+        self.assertEqual(synthesize.call_count, 2)
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(first['audio_url'], second['audio_url'])
+        self.assertNotEqual(first['path'], other_voice['path'])
+
+    def test_least_recently_used_audio_evicted(self):
+        """Exceeding the entry limit deletes the least recently used files down to the low-water mark"""
+        import itertools
+        from django.core.files.storage import default_storage
+        from apps.speech_processing.tts_cache import TTSAudioCache
+
+        tts_cache = TTSAudioCache(max_entries=4)
+        clock = itertools.count(1000, 1000)
+        with patch('apps.speech_processing.tts_cache.time.time', side_effect=lambda: next(clock)):
+            stored = [
+                tts_cache.get_or_synthesize(text, 'hi', 'female', 22050, lambda: b'1')
+                for text in ('one', 'two', 'three', 'four', 'five')
+            ]
+
+        self.assertFalse(default_storage.exists(stored[0]['path']))
+        self.assertFalse(default_storage.exists(stored[1]['path']))
+        self.assertTrue(default_storage.exists(stored[2]['path']))
+        self.assertEqual(tts_cache.get_stats()['entries'], 3)
+
+    def test_store_after_eviction_does_not_rescan(self):
+        """Trimming below the limit leaves room, so the next miss does not scan storage again"""
+        from apps.speech_processing.tts_cache import TTSAudioCache
+
+        tts_cache = TTSAudioCache(max_entries=10)
+        for index in range(11):
+            tts_cache.get_or_synthesize(f'prompt {index}', 'hi', 'female', 22050, lambda: b'1')
+
+        with patch.object(tts_cache, '_scan', wraps=tts_cache._scan) as mock_scan:
+            tts_cache.get_or_synthesize('one more', 'hi', 'female', 22050, lambda: b'1')
+
+        mock_scan.assert_not_called()
+        self.assertEqual(tts_cache.get_stats()['entries'], 10)
+
+    def test_concurrent_store_keeps_one_file(self):
+        """When another worker saved the same prompt first, the renamed duplicate is deleted"""
+        import os
+        from django.conf import settings
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from apps.speech_processing.tts_cache import TTSAudioCache
+
+        tts_cache = TTSAudioCache()
+        path = tts_cache.path_for(tts_cache.make_key('one', 'hi', 'female', 22050))
+        default_storage.save(path, ContentFile(b'from another worker'))
+
+        # This worker looked before the other one saved; storage itself sees the file
+        exists = default_storage.exists
+        checked = []
+
+        def exists_after_first_check(name):
+            checked.append(name)
+            return len(checked) > 1 and exists(name)
+
+        with patch.object(default_storage, 'exists', side_effect=exists_after_first_check):
+            result = tts_cache.get_or_synthesize('one', 'hi', 'female', 22050, lambda: b'ours')
+
+        self.assertEqual(result['path'], path)
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, os.path.dirname(path))), [os.path.basename(path)])
+
+    def test_eviction_lock_held_elsewhere_is_left_alone(self):
+        """A busy eviction lock neither drops the new entry nor gets released by a non-owner"""
+        from django.core.cache import cache
+        from apps.speech_processing.tts_cache import EVICTION_LOCK_KEY, TTSAudioCache
+
+        tts_cache = TTSAudioCache(max_entries=1)
+        tts_cache.get_or_synthesize('one', 'hi', 'female', 22050, lambda: b'1')
+        cache.set(EVICTION_LOCK_KEY, 'other-worker', timeout=60)
+        tts_cache.get_or_synthesize('two', 'hi', 'female', 22050, lambda: b'2')
+
+        self.assertEqual(cache.get(EVICTION_LOCK_KEY), 'other-worker')
+        self.assertEqual(tts_cache.get_stats()['entries'], 2)
+        self.assertTrue(tts_cache.get_cached('two', 'hi', 'female', 22050)['cached'])
+
+        cache.delete(EVICTION_LOCK_KEY)
+        tts_cache.get_or_synthesize('three', 'hi', 'female', 22050, lambda: b'3')
+        self.assertEqual(tts_cache.get_stats()['entries'], 1)
+
+    def test_lost_metadata_is_rebuilt_from_storage(self):
+        """After a cache flush, files are found by path and the totals are recounted"""
+        from django.core.cache import cache
+        from apps.speech_processing.tts_cache import TTSAudioCache
+
+        tts_cache = TTSAudioCache(max_entries=3)
+        synthesize = Mock(return_value=b'RIFF')
+        tts_cache.get_or_synthesize('one', 'hi', 'female', 22050, synthesize)
+        tts_cache.get_or_synthesize('two', 'hi', 'female', 22050, synthesize)
+        cache.clear()
+
+        self.assertTrue(tts_cache.get_or_synthesize('one', 'hi', 'female', 22050, synthesize)['cached'])
+        tts_cache.get_or_synthesize('three', 'hi', 'female', 22050, synthesize)
+
+        self.assertEqual(synthesize.call_count, 3)
+        self.assertEqual(tts_cache.get_stats()['entries'], 2)
+        self.assertEqual(tts_cache.get_stats()['total_bytes'], 8)
+
+class VoicePromptWarmingTestCase(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.core.cache import cache
+        from django.test import override_settings
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.text_to_speech')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_batch')
+    def test_warmed_prompt_ready_without_tts(self, mock_translate, mock_tts):
+        """Warmed questions have audio ready; re-warming does not synthesize again"""
+        from apps.speech_processing.voice_prompts import get_ready_voice_prompt, warm_voice_prompts
+
+        mock_translate.side_effect = lambda texts, src, tgt: [{'translated_text': f'[{tgt}] {text}'} for text in texts]
+        mock_tts.return_value = b'RIFF fake wav'
+        questions = ['What is your name?', 'When did it happen?']
+
+        summary = warm_voice_prompts(questions, ['en', 'hi'], max_workers=2)
+        self.assertEqual(summary['synthesized'], 4)
+        self.assertEqual(mock_tts.call_count, 4)
+
+        prompt = get_ready_voice_prompt('What is your name?', 'hi')
+        self.assertIn('[hi] What is your name?', prompt['text'])
+        self.assertTrue(prompt['audio_url'])
+        self.assertIsNone(get_ready_voice_prompt('What is your name?', 'ta'))
+
+        summary = warm_voice_prompts(questions, ['en', 'hi'])
+        self.assertEqual(summary['already_cached'], 4)
+        self.assertEqual(mock_tts.call_count, 4)
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.text_to_speech')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_text')
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.translate_batch')
+    def test_lead_in_translated_for_languages_without_template(self, mock_translate, mock_translate_text, mock_tts):
+        """A Bengali prompt gets a Bengali lead-in, translated in the same batch as its questions"""
+        from apps.speech_processing.voice_prompts import build_voice_prompt, warm_voice_prompt, warm_voice_prompts
+
+        mock_translate.side_effect = lambda texts, src, tgt: [{'translated_text': f'[{tgt}] {text}'} for text in texts]
+        mock_tts.return_value = b'RIFF fake wav'
+
+        warm_voice_prompts(['What is your name?', 'When did it happen?'], ['bn'])
+
+        mock_translate.assert_called_once()
+        self.assertIn('Please answer the following question:', mock_translate.call_args[0][0])
+        self.assertEqual(
+            build_voice_prompt('[bn] Where?', 'bn'), '[bn] Please answer the following question: [bn] Where?'
+        )
+
+        result = warm_voice_prompt('Where do you live?', 'pa')
+        self.assertEqual(result['text'], '[pa] Please answer the following question: [pa] Where do you live?')
+        self.assertEqual(mock_translate.call_count, 2)
+        mock_translate_text.assert_not_called()
+
+class TranslationMemoTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.speech_processing.translation_memo import translation_memo
+        cache.clear()
+        translation_memo.store.local.clear()
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._run_inference')
+    def test_repeated_text_skips_network(self, mock_inference):
+        """Re-translating the same normalized text is served from the memo"""
+        mock_inference.return_value = {
+            'pipelineResponse': [{'output': [{'source': 'मेरा मकान', 'target': 'my house'}]}]
+        }
+        client = BhashiniClient()
+
+        first = client.translate_text('मेरा  मकान', 'hi', 'en')
+        second = client.translate_text(' मेरा मकान ', 'hi', 'en')
+        client.translate_text('मेरा मकान', 'hi', 'ta')
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_inference.call_count, 2)
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._run_inference')
+    def test_batch_packs_segments_and_keeps_order(self, mock_inference):
+        """translate_batch sends several segments per request and skips memoized or repeated texts"""
+        def respond(task_type, src, tgt, build_payload):
+            payload = build_payload('test-service')
+            return {'pipelineResponse': [{'output': [
+                {'source': item['source'], 'target': item['source'].upper()}
+                for item in payload['inputData']['input']
+            ]}]}
+        mock_inference.side_effect = respond
+
+        client = BhashiniClient()
+        client.translation_batch_max_segments = 2
+        client.translate_text('alpha', 'hi', 'en')
+
+        results = client.translate_batch(['alpha', 'beta', 'gamma', 'beta', '', 'delta'], 'hi', 'en')
+
+        self.assertEqual(
+            [result['translated_text'] for result in results],
+            ['ALPHA', 'BETA', 'GAMMA', 'BETA', '', 'DELTA']
+        )
+        # One call for the single translate_text, two packed calls for beta/gamma/delta
+        self.assertEqual(mock_inference.call_count, 3)
+
+class SpeechToEnglishTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.speech_processing.pipeline_cache import pipeline_config_cache
+        from apps.speech_processing.translation_memo import translation_memo
+        cache.clear()
+        pipeline_config_cache.store.local.clear()
+        translation_memo.store.local.clear()
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.get_auth_token')
+    @patch('apps.speech_processing.bhashini_client.requests.Session.post')
+    def test_asr_and_translation_in_one_call(self, mock_post, mock_auth):
+        """One chained pipeline request returns both transcript and translation"""
+        import json
+
+        mock_auth.return_value = {'pipelineResponseConfig': [
+            {'config': [{'serviceId': 'asr-service', 'inferenceEndPoint': {'callbackUrl': 'https://test-inference.com'}}]},
+            {'config': [{'serviceId': 'nmt-service', 'inferenceEndPoint': {'callbackUrl': 'https://test-inference.com'}}]},
+        ]}
+        response = Mock(status_code=200)
+        response.json.return_value = {'pipelineResponse': [
+            {'output': [{'source': 'मेरा मकान मालिक', 'confidence': 0.9}]},
+            {'output': [{'source': 'मेरा मकान मालिक', 'target': 'my landlord'}]},
+        ]}
+        mock_post.return_value = response
+
+        client = BhashiniClient()
+        result = client.speech_to_english(b'fake audio data', 'hi')
+
+        self.assertEqual(result['text'], 'मेरा मकान मालिक')
+        self.assertEqual(result['translated_text'], 'my landlord')
+        self.assertEqual(mock_post.call_count, 1)
+        mock_auth.assert_called_once_with('asr+translation', 'hi', 'en')
+
+        body = b''.join(mock_post.call_args.kwargs['data'])
+        tasks = json.loads(body)['pipelineTasks']
+        self.assertEqual([task['config']['serviceId'] for task in tasks], ['asr-service', 'nmt-service'])
+
+        # The detector's later translation of the same transcript is already memoized
+        self.assertEqual(client.translate_text('मेरा मकान मालिक', 'hi', 'en')['translated_text'], 'my landlord')
+        self.assertEqual(mock_post.call_count, 1)
+
+class CircuitBreakerTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.speech_processing.pipeline_cache import pipeline_config_cache
+        cache.clear()
+        pipeline_config_cache.store.local.clear()
+        self.client = BhashiniClient()
+        self.config_response = {
+            'pipelineResponseConfig': [
+                {'config': [{'serviceId': 'test-service', 'inferenceEndPoint': {'callbackUrl': 'https://breaker-test.com/infer'}}]}
+            ]
+        }
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.get_auth_token')
+    @patch('apps.speech_processing.bhashini_client.requests.Session.post')
+    def test_opens_after_failures_and_fails_fast(self, mock_post, mock_auth):
+        """Repeated timeouts open the circuit; later calls fail without a network call"""
+        import requests
+        from apps.speech_processing.resilience import CircuitOpenError
+
+        mock_auth.return_value = self.config_response
+        mock_post.side_effect = requests.Timeout('read timed out')
+
+        for _ in range(10):
+            with self.assertRaises(requests.Timeout):
+                self.client.translate_text(f'text {_}', 'hi', 'en')
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.translate_text('another text', 'hi', 'en')
+        self.assertEqual(mock_post.call_count, 10)
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient.get_auth_token')
+    @patch('apps.speech_processing.bhashini_client.requests.Session.post')
+    def test_half_open_probe_closes_circuit(self, mock_post, mock_auth):
+        """After the open period a successful probe closes the circuit"""
+        from apps.speech_processing.resilience import CLOSED, OPEN, get_circuit_breaker
+
+        mock_auth.return_value = self.config_response
+        response = Mock(status_code=200)
+        response.json.return_value = {'pipelineResponse': [{'output': [{'source': 'a', 'target': 'A'}]}]}
+        mock_post.return_value = response
+
+        breaker = get_circuit_breaker('https://breaker-test.com/infer')
+        breaker._open()
+        self.assertEqual(breaker.state(), OPEN)
+
+        with patch('apps.speech_processing.resilience.time.time', return_value=time.time() + 60):
+            self.client.translate_text('probe text', 'hi', 'en')
+            self.assertEqual(breaker.state(), CLOSED)
+
+    def test_async_client_fails_fast_while_open(self):
+        """The async client shares the breaker and does not call an endpoint known to be down"""
+        from asgiref.sync import async_to_sync
+        from apps.speech_processing.async_bhashini_client import AsyncBhashiniClient
+        from apps.speech_processing.resilience import CircuitOpenError, get_circuit_breaker
+
+        get_circuit_breaker('https://breaker-test.com/infer')._open()
+
+        async def translate():
+            client = AsyncBhashiniClient()
+            client.http = Mock(post=AsyncMock())
+            with patch.object(client, 'get_auth_token', new=AsyncMock(return_value=self.config_response)):
+                with self.assertRaises(CircuitOpenError):
+                    await client.translate_text('text', 'hi', 'en')
+            client.http.post.assert_not_called()
+
+        async_to_sync(translate)()
+
+    @patch('apps.speech_processing.resilience._get_hedge_executor')
+    def test_fast_primary_is_not_hedged(self, mock_executor):
+        """A primary that finishes before the delay never touches the hedge executor"""
+        from apps.speech_processing.resilience import hedged_call
+
+        backup = Mock()
+        self.assertEqual(hedged_call(lambda: 'primary', backup, delay=5), 'primary')
+
+        mock_executor.assert_not_called()
+        backup.assert_not_called()
+
+    def test_hedged_backup_wins_over_slow_primary(self):
+        """A backup that answers first is returned without waiting for the slow primary"""
+        import threading
+        from apps.speech_processing.resilience import hedged_call
+
+        release_primary = threading.Event()
+        self.addCleanup(release_primary.set)
+
+        def primary():
+            release_primary.wait(5)
+            return 'primary'
+
+        started = time.monotonic()
+        self.assertEqual(hedged_call(primary, lambda: 'backup', delay=0.01), 'backup')
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_hedged_backup_used_when_slow_primary_fails(self):
+        """A primary that fails after the backup started returns the backup's result"""
+        import requests
+        from apps.speech_processing.resilience import hedged_call
+
+        def primary():
+            time.sleep(0.2)
+            raise requests.Timeout('read timed out')
+
+        self.assertEqual(hedged_call(primary, lambda: 'backup', delay=0.01), 'backup')
+
+        with self.assertRaises(requests.Timeout):
+            hedged_call(primary, lambda: 'backup', delay=5)
+
+    def test_hedged_primary_error_raised_when_both_fail(self):
+        """When the backup fails too, the primary's error is raised"""
+        import requests
+        from apps.speech_processing.resilience import hedged_call
+
+        def primary():
+            time.sleep(0.1)
+            raise requests.Timeout('primary timed out')
+
+        def backup():
+            raise requests.ConnectionError('backup refused')
+
+        with self.assertRaisesRegex(requests.Timeout, 'primary'):
+            hedged_call(primary, backup, delay=0.01)
+
+    def test_hedged_transcription_reports_primary_body(self):
+        """Building a backup body does not replace the primary's payload stats"""
+        def run_inference(task_type, source_language, target_language, build_payload):
+            primary = build_payload('asr-service')
+            b''.join(primary)
+            build_payload('asr-service')
+            return {'pipelineResponse': [{'output': [{'source': 'namaste', 'confidence': 0.9}]}]}
+
+        with patch.object(self.client, '_run_inference', side_effect=run_inference):
+            transcript = self.client._transcribe(b'\x00' * 3000, 'hi')
+
+        self.assertEqual(transcript['payload_stats']['bytes_sent'], transcript['payload_stats']['body_bytes'])
+
+class TranscriptCacheTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.speech_processing.transcript_cache import transcript_cache
+        cache.clear()
+        transcript_cache.store.local.clear()
+
+    def test_hash_is_computed_over_chunks(self):
+        """Uploads hash to the sha256 of their bytes and are rewound"""
+        import hashlib
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from apps.speech_processing.transcript_cache import hash_audio
+
+        data = b'RIFF' + bytes(range(256)) * 1000
+        upload = SimpleUploadedFile('answer.wav', data, content_type='audio/wav')
+        upload.DEFAULT_CHUNK_SIZE = 1024
+
+        self.assertEqual(hash_audio(upload), hashlib.sha256(data).hexdigest())
+        self.assertEqual(upload.read(4), b'RIFF')
+
+    def test_uploads_hashed_while_received(self):
+        """The upload handlers hash in-memory and spooled uploads as they arrive; hash_audio reuses the digest"""
+        import hashlib
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import RequestFactory, override_settings
+        from apps.speech_processing.transcript_cache import hash_audio
+
+        data = b'RIFF' + bytes(range(256)) * 4000
+        handlers = [
+            'apps.speech_processing.upload_handlers.HashingMemoryFileUploadHandler',
+            'apps.speech_processing.upload_handlers.HashingTemporaryFileUploadHandler',
+        ]
+        for max_memory_size in (len(data) * 2, 1024):
+            with override_settings(FILE_UPLOAD_HANDLERS=handlers, FILE_UPLOAD_MAX_MEMORY_SIZE=max_memory_size):
+                request = RequestFactory().post('/', {'audio': SimpleUploadedFile('answer.wav', data)})
+                upload = request.FILES['audio']
+            self.addCleanup(upload.close)
+
+            self.assertEqual(upload.sha256, hashlib.sha256(data).hexdigest())
+            with patch.object(upload, 'chunks') as mock_chunks:
+                self.assertEqual(hash_audio(upload), upload.sha256)
+            mock_chunks.assert_not_called()
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._recognize')
+    def test_retried_upload_skips_asr(self, mock_speech_to_text):
+        """The same recording uploaded again returns the stored transcript"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from apps.speech_processing.views import _transcribe_upload
+
+        mock_speech_to_text.return_value = {
+            'text': 'मेरा किराया', 'confidence': 0.9, 'language': 'hi', 'payload_stats': {'wire_bytes': 10}
+        }
+
+        first = _transcribe_upload(SimpleUploadedFile('a.wav', b'same audio'), 'hi')
+        retry = _transcribe_upload(SimpleUploadedFile('b.wav', b'same audio'), 'hi')
+        other_language = _transcribe_upload(SimpleUploadedFile('c.wav', b'same audio'), 'te')
+
+        self.assertNotIn('cached', first)
+        self.assertTrue(retry['cached'])
+        self.assertEqual((retry['text'], retry['confidence']), ('मेरा किराया', 0.9))
+        self.assertNotIn('payload_stats', retry)
+        self.assertNotIn('cached', other_language)
+        self.assertEqual(mock_speech_to_text.call_count, 2)
+
+    @patch('apps.speech_processing.async_bhashini_client.AsyncBhashiniClient._recognize', new_callable=AsyncMock)
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._recognize')
+    def test_async_client_shares_transcript_cache(self, mock_recognize, mock_async_recognize):
+        """A recording transcribed by the sync client is answered from the cache by the async one"""
+        from asgiref.sync import async_to_sync
+        from apps.speech_processing.async_bhashini_client import AsyncBhashiniClient
+
+        mock_recognize.return_value = {'text': 'मेरा किराया', 'confidence': 0.9, 'language': 'hi'}
+        BhashiniClient().speech_to_text(b'same audio', 'hi', audio_hash='abc123')
+
+        async def transcribe():
+            return await AsyncBhashiniClient().speech_to_text(b'same audio', 'hi', audio_hash='abc123')
+
+        result = async_to_sync(transcribe)()
+        self.assertTrue(result['cached'])
+        mock_async_recognize.assert_not_called()
+
+class LanguageIdentificationTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.speech_processing.transcript_cache import transcript_cache
+        cache.clear()
+        transcript_cache.store.local.clear()
+
+    def test_identifies_script(self):
+        """Transcripts are attributed to the language of their dominant script"""
+        from apps.speech_processing.language_id import identify_language
+
+        telugu = identify_language('నా ఇంటి యజమాని డిపాజిట్ ఇవ్వలేదు 2024', 'hi')
+        self.assertEqual((telugu['language'], telugu['script']), ('te', 'telugu'))
+        self.assertTrue(telugu['mismatch'])
+        self.assertGreaterEqual(telugu['confidence'], 0.99)
+        self.assertIn('latency_ms', telugu)
+
+        # Devanagari is shared by Hindi and Marathi; the requested one is kept
+        self.assertFalse(identify_language('माझा घरमालक', 'mr')['mismatch'])
+        self.assertFalse(identify_language('', 'hi')['mismatch'])
+
+    @patch('apps.speech_processing.bhashini_client.BhashiniClient._recognize')
+    def test_reroutes_only_when_language_was_not_chosen(self, mock_speech_to_text):
+        """A confident mismatch re-runs ASR in the identified language, or is only suggested"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from apps.speech_processing.views import _transcribe_upload
+
+        transcripts = {'hi': 'నా ఇంటి యజమాని', 'te': 'నా ఇంటి యజమాని డిపాజిట్'}
+        mock_speech_to_text.side_effect = lambda audio, language: {
+            'text': transcripts[language], 'confidence': 0.8, 'language': language
+        }
+
+        suggested = _transcribe_upload(SimpleUploadedFile('a.wav', b'telugu audio'), 'hi')
+        self.assertEqual(suggested['language'], 'hi')
+        self.assertEqual(suggested['language_id']['language'], 'te')
+        self.assertEqual(mock_speech_to_text.call_count, 1)
+
+        rerouted = _transcribe_upload(SimpleUploadedFile('a.wav', b'telugu audio'), 'hi', reroute=True)
+        self.assertEqual(rerouted['language'], 'te')
+        self.assertEqual(rerouted['text'], 'నా ఇంటి యజమాని డిపాజిట్')
+        self.assertEqual(rerouted['language_id']['rerouted_from'], 'hi')
+        # The 'hi' transcript came from the transcript cache; only the Telugu pass hit ASR
+        self.assertEqual(mock_speech_to_text.call_count, 2)
+
+class AzureOpenAITransportTestCase(TestCase):
+    def test_client_is_shared_and_rebuilt_after_fork(self):
+        """Every caller gets the same pooled client until the process forks"""
+        from django.test import override_settings
+        from apps.speech_processing import openai_transport
+
+        with override_settings(AZURE_OPENAI_ENDPOINT='https://test.openai.azure.com/',
+                               AZURE_OPENAI_API_KEY='test-key', AZURE_OPENAI_API_VERSION='2024-06-01'), \
+                patch.object(openai_transport, '_client', None):
+            first = openai_transport.get_azure_openai_client()
+            self.assertIs(openai_transport.get_azure_openai_client(), first)
+            self.assertEqual(first.max_retries, 2)
+
+            with patch('apps.speech_processing.openai_transport.os.getpid', return_value=-1):
+                self.assertIsNot(openai_transport.get_azure_openai_client(), first)
+
+    def test_operation_timeouts(self):
+        """Each operation uses its own read timeout"""
+        from apps.speech_processing.openai_transport import get_openai_timeout
+
+        self.assertEqual(get_openai_timeout('case_type').read, 20)
+        self.assertEqual(get_openai_timeout('unknown').read, 60)
+
+class LLMResponseCacheTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.speech_processing.llm_cache import llm_response_cache
+        cache.clear()
+        llm_response_cache.store.local.clear()
+        self.client = AzureOpenAIClient()
+
+    def completion(self, content, total_tokens=120):
+        return Mock(choices=[Mock(message=Mock(content=content))], usage=Mock(total_tokens=total_tokens))
+
+    @patch('apps.speech_processing.openai_transport.get_azure_openai_client')
+    def test_identical_prompts_are_served_from_cache(self, mock_get_client):
+        """The second identical call costs no tokens and is counted as saved"""
+        from apps.speech_processing.llm_cache import llm_response_cache
+
+        mock_create = mock_get_client.return_value.chat.completions.create
+        mock_create.return_value = self.completion('[{"question": "When did you move in?"}]')
+        saved_before = llm_response_cache.get_stats()['saved_tokens']
+
+        first = self.client.generate_legal_questions('Tenant Dispute', 'deposit not returned')
+        second = self.client.generate_legal_questions('Tenant Dispute', 'deposit not returned')
+        other = self.client.generate_legal_questions('Tenant Dispute', 'rent increase')
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(other), 1)
+        self.assertEqual(mock_create.call_count, 2)
+        self.assertEqual(llm_response_cache.get_stats()['saved_tokens'] - saved_before, 120)
+
+    @patch('apps.speech_processing.openai_transport.get_azure_openai_client')
+    def test_opt_out_and_uncached_operations(self, mock_get_client):
+        """use_cache=False, uncached operations and malformed replies always reach the model"""
+        mock_create = mock_get_client.return_value.chat.completions.create
+        mock_create.return_value = self.completion('{"detected_case_type": "other", "confidence": 0.4, "reasoning": ""}')
+
+        self.client.detect_case_type_advanced('text', ['Tenant Dispute'], use_cache=False)
+        self.client.detect_case_type_advanced('text', ['Tenant Dispute'], use_cache=False)
+        self.client.analyze_answer_quality('Name?', 'Asha', 'text')
+        self.client.analyze_answer_quality('Name?', 'Asha', 'text')
+        self.assertEqual(mock_create.call_count, 4)
+
+        mock_create.return_value = self.completion('not json')
+        self.client.translate_legal_content('notice', 'en', 'hi')
+        self.client.translate_legal_content('notice', 'en', 'hi')
+        self.assertEqual(mock_create.call_count, 6)
+
+    @patch('apps.speech_processing.openai_transport.get_azure_openai_client')
+    def test_failed_translation_returns_original_content(self, mock_get_client):
+        """A reply that is not JSON falls back to the input text, not the model's reply"""
+        mock_create = mock_get_client.return_value.chat.completions.create
+        mock_create.return_value = self.completion('Sorry, I cannot help with that')
+
+        result = self.client.translate_legal_content('Notice of eviction', 'en', 'hi')
+
+        self.assertEqual(result['translated_content'], 'Notice of eviction')
+        self.assertEqual(result['confidence'], 0.1)
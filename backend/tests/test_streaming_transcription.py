@@ -0,0 +1,170 @@
+import json
+import asyncio
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import AsyncMock, Mock, patch
+from apps.speech_processing import streaming_transcription
+from apps.speech_processing.streaming_transcription import StreamingSegmenter, transcription_websocket
+
+
+def make_speech(pattern, sample_rate=16000):
+    """Build int16 PCM bytes from (seconds, is_speech) pairs; speech is a 220 Hz tone"""
+    parts = []
+    rng = np.random.default_rng(0)
+    for seconds, is_speech in pattern:
+        n = int(seconds * sample_rate)
+        if is_speech:
+            t = np.arange(n) / sample_rate
+            parts.append(8000 * np.sin(2 * np.pi * 220 * t))
+        else:
+            parts.append(rng.normal(0, 20, n))
+    return np.concatenate(parts).astype('<i2').tobytes()
+
+
+def chunked(data, size=3200):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class StreamingSegmenterTestCase(SimpleTestCase):
+    def test_segments_are_cut_at_pauses_as_audio_arrives(self):
+        """Each utterance is emitted once the following pause is long enough"""
+        segmenter = StreamingSegmenter(16000, pause_ms=500, max_segment_seconds=15)
+        emitted_after = []
+        received = 0
+        for chunk in chunked(make_speech([(0.5, False), (2, True), (1, False), (3, True), (1, False), (1, True)])):
+            received += len(chunk)
+            for segment in segmenter.feed(chunk):
+                emitted_after.append((segment, received / 32000))
+        final = segmenter.flush()
+
+        self.assertEqual([segment['index'] for segment, _ in emitted_after], [0, 1])
+        self.assertEqual([segment['index'] for segment in final], [2])
+        # The first segment is available well before the recording ends
+        first, seconds_in = emitted_after[0]
+        self.assertLess(seconds_in, 3.5)
+        self.assertAlmostEqual(first['start'] + first['duration'], 2.5, delta=0.6)
+        for segment, _ in emitted_after:
+            self.assertEqual(len(segment['samples']) / 16000, segment['duration'])
+
+    def test_long_speech_is_capped_at_max_segment(self):
+        """Without pauses, segments are cut at max_segment_seconds"""
+        segmenter = StreamingSegmenter(16000, pause_ms=500, max_segment_seconds=4)
+        segments = []
+        for chunk in chunked(make_speech([(10, True)])):
+            segments.extend(segmenter.feed(chunk))
+        segments.extend(segmenter.flush())
+
+        self.assertEqual(len(segments), 3)
+        self.assertTrue(all(segment['duration'] <= 4 for segment in segments))
+        self.assertAlmostEqual(sum(segment['duration'] for segment in segments), 10, delta=0.05)
+
+    def test_silence_is_never_sent(self):
+        """A stream with no speech produces no segments and bounded buffering"""
+        segmenter = StreamingSegmenter(16000)
+        for chunk in chunked(make_speech([(20, False)])):
+            self.assertEqual(segmenter.feed(chunk), [])
+        self.assertEqual(segmenter.flush(), [])
+        self.assertLessEqual(len(segmenter._energies), segmenter.pause_frames)
+
+    def test_cuts_copy_only_the_audio_they_take(self):
+        """Many cuts from one large buffer copy each sample once, not the remainder on every cut"""
+        segmenter = StreamingSegmenter(16000, pause_ms=500, max_segment_seconds=2)
+        audio = make_speech([(60, True)])
+        original_concatenate = np.concatenate
+        copied = []
+
+        def concatenate(arrays, *args, **kwargs):
+            arrays = list(arrays)
+            copied.append(sum(len(array) for array in arrays))
+            return original_concatenate(arrays, *args, **kwargs)
+
+        with patch.object(streaming_transcription.np, 'concatenate', side_effect=concatenate):
+            segments = segmenter.feed(audio)
+
+        self.assertEqual(len(segments), 30)
+        self.assertLessEqual(sum(copied), 60 * 16000)
+
+
+class TranscriptionWebSocketTestCase(SimpleTestCase):
+    def run_socket(self, messages, query=b'token=t&language=hi&sample_rate=16000'):
+        incoming = asyncio.Queue()
+        sent = []
+
+        async def receive():
+            return await incoming.get()
+
+        async def send(message):
+            sent.append(message)
+
+        async def scenario():
+            await incoming.put({'type': 'websocket.connect'})
+            for message in messages:
+                await incoming.put(message)
+            await transcription_websocket(
+                {'type': 'websocket', 'path': '/ws/speech/transcribe/', 'query_string': query}, receive, send
+            )
+
+        asyncio.run(scenario())
+        return sent
+
+    @patch.object(streaming_transcription, '_authenticate', new_callable=AsyncMock)
+    @patch.object(streaming_transcription, 'AsyncBhashiniClient')
+    def test_partials_then_final(self, mock_client_class, mock_authenticate):
+        """Partial transcripts are pushed per segment and stitched in order at the end"""
+        mock_authenticate.return_value = Mock(id=1)
+        texts = iter(['नमस्ते', 'दुनिया'])
+        mock_client_class.return_value.speech_to_text = AsyncMock(
+            side_effect=lambda audio, language: {'text': next(texts), 'confidence': 0.9, 'language': language}
+        )
+
+        audio = make_speech([(2, True), (1, False), (2, True)])
+        messages = [{'type': 'websocket.receive', 'bytes': chunk} for chunk in chunked(audio)]
+        messages.append({'type': 'websocket.receive', 'text': json.dumps({'type': 'end'})})
+        sent = self.run_socket(messages)
+
+        self.assertEqual(sent[0], {'type': 'websocket.accept'})
+        self.assertEqual(sent[-1], {'type': 'websocket.close', 'code': 1000})
+        payloads = [json.loads(message['text']) for message in sent if message['type'] == 'websocket.send']
+        self.assertEqual([p['type'] for p in payloads], ['partial', 'partial', 'final'])
+        self.assertEqual(payloads[-1]['text'], 'नमस्ते दुनिया')
+        self.assertEqual(payloads[-1]['segments'], 2)
+        audio_sent, language = mock_client_class.return_value.speech_to_text.call_args_list[0].args
+        self.assertEqual(audio_sent[:4], b'RIFF')
+        self.assertEqual(language, 'hi')
+
+    @patch.object(streaming_transcription, '_authenticate', new_callable=AsyncMock)
+    @patch.object(streaming_transcription, 'AsyncBhashiniClient')
+    def test_segments_resampled_to_16khz(self, mock_client_class, mock_authenticate):
+        """A 48 kHz stream is sent to ASR as 16 kHz segments"""
+        from apps.speech_processing.audio_metadata import probe_wav
+
+        mock_authenticate.return_value = Mock(id=1)
+        mock_client_class.return_value.speech_to_text = AsyncMock(return_value={'text': 'x', 'confidence': 1.0})
+
+        audio = make_speech([(2, True), (1, False)], sample_rate=48000)
+        messages = [{'type': 'websocket.receive', 'bytes': chunk} for chunk in chunked(audio, 9600)]
+        messages.append({'type': 'websocket.receive', 'text': json.dumps({'type': 'end'})})
+        self.run_socket(messages, query=b'token=t&language=hi&sample_rate=48000')
+
+        audio_sent, _ = mock_client_class.return_value.speech_to_text.call_args_list[0].args
+        metadata = probe_wav(audio_sent)
+        self.assertEqual(metadata['sample_rate'], 16000)
+        self.assertAlmostEqual(metadata['duration'], 2.25, delta=0.3)
+
+    def test_invalid_token_is_rejected(self):
+        """The handshake is refused without a valid JWT"""
+        sent = self.run_socket([], query=b'token=not-a-jwt&language=hi')
+        self.assertEqual(sent, [{'type': 'websocket.close', 'code': 4401}])
+
+    @override_settings(AUDIO_UPLOAD_MAX_SECONDS=2)
+    @patch.object(streaming_transcription, '_authenticate', new_callable=AsyncMock)
+    @patch.object(streaming_transcription, 'AsyncBhashiniClient')
+    def test_stream_length_is_limited(self, mock_client_class, mock_authenticate):
+        """Streams longer than AUDIO_UPLOAD_MAX_SECONDS are closed"""
+        mock_authenticate.return_value = Mock(id=1)
+        mock_client_class.return_value.speech_to_text = AsyncMock(return_value={'text': 'x', 'confidence': 1.0})
+
+        audio = make_speech([(3, True)])
+        sent = self.run_socket([{'type': 'websocket.receive', 'bytes': chunk} for chunk in chunked(audio)])
+
+        self.assertEqual(sent[-1], {'type': 'websocket.close', 'code': 1009})